@@ -0,0 +1,126 @@
+from typing import List  # noqa: F401
+
+from pandas import DataFrame
+import argparse
+import time
+
+import networkx
+import numpy as np
+
+from rolling_pin.repo_etl import RepoETL
+# ------------------------------------------------------------------------------
+
+
+'''
+Benchmarks RepoETL._anneal_coordinate against the original networkx
+implementation, on synthetic repositories.
+
+Usage, from the python directory:
+    PYTHONPATH=. python benchmarks/anneal_benchmark.py --sizes 1000 10000
+'''
+
+
+def anneal_reference(data, iterations=10):
+    # type: (DataFrame, int) -> DataFrame
+    '''
+    Original networkx implementation of RepoETL._anneal_coordinate.
+
+    Args:
+        data (DataFrame): DataFrame with x and y columns.
+        iterations (int, optional): Number of iterations. Default: 10.
+
+    Returns:
+        DataFrame: DataFrame with annealed x coordinates.
+    '''
+    data.x = data.x.astype(float)
+    data.y = data.y.astype(float)
+    for iteration in range(iterations):
+        graph = RepoETL._to_networkx_graph(data)
+        if iteration % 2 == 0:
+            graph = graph.reverse()
+
+        for name in graph.nodes:
+            tree = networkx.bfs_tree(graph, name)
+            mu = np.mean([graph.nodes[n]['x'] for n in tree])
+            graph.nodes[name]['x'] = mu
+
+        for node in graph.nodes:
+            mask = data[data.node_name == node].index
+            data.loc[mask, 'x'] = graph.nodes[node]['x']
+
+        data.sort_values('x', inplace=True)
+        for yi in data.y.unique():
+            mask = data[data.y == yi].index
+            data.loc[mask, 'x'] = list(range(len(mask)))
+    return data
+
+
+def get_synthetic_data(size, seed=42, levels=8, degree=3):
+    # type: (int, int, int, int) -> DataFrame
+    '''
+    Creates a synthetic repository, in which each node depends upon random
+    nodes in lower levels.
+
+    Args:
+        size (int): Number of nodes.
+        seed (int, optional): Random seed. Default: 42.
+        levels (int, optional): Number of levels. Default: 8.
+        degree (int, optional): Dependencies per node. Default: 3.
+
+    Returns:
+        DataFrame: DataFrame of nodes with x and y columns.
+    '''
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, levels, size)
+    deps = []
+    for i in range(size):
+        items = np.flatnonzero(y > y[i])
+        items = rng.choice(items, min(len(items), degree), replace=False)
+        deps.append([f'n{x}' for x in items])
+    data = DataFrame(dict(
+        node_name=[f'n{x}' for x in range(size)],
+        y=y,
+        dependencies=deps,
+    ))
+    data['x'] = data.groupby('y').cumcount()
+    return data
+
+
+def main(sizes, reference_limit):
+    # type: (List[int], int) -> None
+    '''
+    Prints annealing times and whether outputs match, per repository size.
+
+    Args:
+        sizes (list[int]): Node counts of synthetic repositories.
+        reference_limit (int): Largest size the reference is run on.
+    '''
+    for size in sizes:
+        data = get_synthetic_data(size)
+        start = time.perf_counter()
+        result = RepoETL._anneal_coordinate(data.copy())
+        seconds = time.perf_counter() - start
+        line = f'{size:>6} nodes  numpy: {seconds:8.3f}s'
+
+        if size <= reference_limit:
+            start = time.perf_counter()
+            expected = anneal_reference(data.copy())
+            reference = time.perf_counter() - start
+            match = result.index.tolist() == expected.index.tolist() \
+                and result.x.tolist() == expected.x.tolist()
+            line += f'  networkx: {reference:8.3f}s'
+            line += f'  speedup: {reference / seconds:8.1f}x  match: {match}'
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark RepoETL._anneal_coordinate on synthetic repos.'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument(
+        '--reference-limit', type=int, default=1000,
+        help='Largest size the networkx reference is run on. It takes minutes at 10k.',
+    )
+    args = parser.parse_args()
+    main(args.sizes, args.reference_limit)
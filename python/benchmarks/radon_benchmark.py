@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Union  # noqa: F401
+
+from pathlib import Path
+import argparse
+import json
+import time
+
+from radon.cli import CCHarvester, HCHarvester, MIHarvester, RawHarvester
+from radon.cli import Config
+import radon.complexity
+
+from rolling_pin.radon_etl import RadonETL
+# ------------------------------------------------------------------------------
+
+
+'''
+Benchmarks RadonETL._get_radon_report against the original implementation,
+which runs all 4 radon harvesters over a directory.
+
+Usage, from the python directory:
+    PYTHONPATH=. python benchmarks/radon_benchmark.py rolling_pin
+'''
+
+
+def get_report_reference(fullpath):
+    # type: (Union[str, Path]) -> Dict[str, Any]
+    '''
+    Original implementation of RadonETL._get_radon_report.
+
+    Args:
+        fullpath (str or Path): Python file or directory of python files.
+
+    Returns:
+        dict: Radon report blob.
+    '''
+    fullpath_ = [Path(fullpath).absolute().as_posix()]
+    harvesters = [
+        CCHarvester(fullpath_, Config(
+            min='A', max='F', exclude=None, ignore=None,
+            show_complexity=False, average=False, total_average=False,
+            order=radon.complexity.SCORE, no_assert=False,
+            show_closures=False,
+        )),
+        RawHarvester(fullpath_, Config(
+            exclude=None, ignore=None, summary=False
+        )),
+        MIHarvester(fullpath_, Config(
+            min='A', max='C', exclude=None, ignore=None, multi=True,
+            show=False, sort=False,
+        )),
+        HCHarvester(fullpath_, Config(
+            exclude=None, ignore=None, by_function=False
+        )),
+    ]
+    keys = [
+        'cyclomatic_complexity', 'raw_metrics', 'maintainability_index',
+        'halstead_metrics',
+    ]
+    return {k: json.loads(x.as_json()) for k, x in zip(keys, harvesters)}
+
+
+def main(fullpaths, workers):
+    # type: (List[str], int) -> None
+    '''
+    Prints report times and whether reports match, per directory.
+
+    Args:
+        fullpaths (list[str]): Python files or directories of python files.
+        workers (int): Number of processes used by RadonETL.
+    '''
+    for fullpath in fullpaths:
+        start = time.perf_counter()
+        result = RadonETL._get_radon_report(fullpath, workers=workers)
+        seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = get_report_reference(fullpath)
+        reference = time.perf_counter() - start
+
+        match = result == expected
+        print(
+            f'{fullpath}  rolling-pin: {seconds:8.3f}s'
+            f'  radon: {reference:8.3f}s'
+            f'  speedup: {reference / seconds:8.1f}x  match: {match}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark RadonETL._get_radon_report on directories.'
+    )
+    parser.add_argument('fullpaths', nargs='+')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    main(args.fullpaths, args.workers)
@@ -9,6 +9,7 @@
 from rolling_pin import blob_etl        # noqa F401
 from rolling_pin import conform_config  # noqa F401
 from rolling_pin import conform_etl     # noqa F401
+from rolling_pin import file_cache      # noqa F401
 from rolling_pin import repo_etl        # noqa F401
 from rolling_pin import toml_etl        # noqa F401
 from rolling_pin import tools           # noqa F401
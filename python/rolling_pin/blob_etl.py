@@ -1,12 +1,17 @@
-from typing import Any, Callable, Dict, Iterator, List, Optional, Union  # noqa: F401
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union  # noqa: F401
 from IPython.display import HTML, Image  # noqa: F401
 import pydot  # noqa: F401
 
+from array import array
 from collections import Counter
+from collections.abc import MutableMapping
+import hashlib
 import json
 import os
 import re
+import sys
 from copy import deepcopy
+from itertools import chain
 from pathlib import Path
 
 import lunchbox.tools as lbt
@@ -19,18 +24,298 @@
 '''
 Contains the BlobETL class, which is used for coverting JSON blobs, and their
 python equivalents, into flat dictionaries that can easily be modified and
-converted to directed graphs.
+converted to directed graphs. Also contains the CompactFlatDict class, which
+BlobETL uses to store flat dictionaries in compact mode.
 '''
 
 
+class FieldTable:
+    '''
+    Interning table of key fields. Each distinct field is stored once and
+    assigned an integer id.
+    '''
+    __slots__ = ('ids', 'fields')
+
+    def __init__(self):
+        # type: () -> None
+        '''
+        Constructs an empty FieldTable instance.
+        '''
+        self.ids = {}  # type: Dict[str, int]
+        self.fields = []  # type: List[str]
+
+    def intern(self, field):
+        # type: (str) -> int
+        '''
+        Gets id of given field, adding field to table if needed.
+
+        Args:
+            field (str): Key field.
+
+        Returns:
+            int: Field id.
+        '''
+        id_ = self.ids.get(field)
+        if id_ is None:
+            id_ = len(self.fields)
+            self.ids[field] = id_
+            self.fields.append(field)
+        return id_
+
+
+class CompactFlatDict(MutableMapping):
+    '''
+    Memory-compact flat dictionary. Key fields are interned into a FieldTable,
+    and keys are stored as runs of field ids within a single array. Key strings
+    are only rebuilt when keys are iterated. A lookup index is built the first
+    time a key is accessed directly.
+    '''
+    __slots__ = (
+        '_separator', '_table', '_fields', '_offsets', '_values', '_index',
+        '_size'
+    )
+    _DELETED = object()
+
+    def __init__(self, separator='/', table=None):
+        # type: (str, Optional[FieldTable]) -> None
+        '''
+        Constructs an empty CompactFlatDict instance.
+
+        Args:
+            separator (str, optional): Field separator in keys. Default: '/'.
+            table (FieldTable, optional): Field table to share with other
+                instances. Default: None.
+        '''
+        self._separator = separator  # type: str
+        self._table = table or FieldTable()  # type: FieldTable
+        self._fields = array('I')  # type: array
+        self._offsets = array('Q', [0])  # type: array
+        self._values = []  # type: List[Any]
+        self._index = None  # type: Optional[Dict[Tuple[int, ...], int]]
+        self._size = 0  # type: int
+
+    @staticmethod
+    def from_dict(flat_dict, separator='/', table=None):
+        # type: (Dict[str, Any], str, Optional[FieldTable]) -> CompactFlatDict
+        '''
+        Constructs a CompactFlatDict instance from a given flat dictionary.
+
+        Args:
+            flat_dict (dict): Flat dictionary.
+            separator (str, optional): Field separator in keys. Default: '/'.
+            table (FieldTable, optional): Field table to share with other
+                instances. Default: None.
+
+        Returns:
+            CompactFlatDict: New CompactFlatDict instance.
+        '''
+        return CompactFlatDict.from_items(
+            flat_dict.items(), separator=separator, table=table
+        )
+
+    @staticmethod
+    def from_items(items, separator='/', table=None):
+        # type: (Iterable[Tuple[str, Any]], str, Optional[FieldTable]) -> CompactFlatDict
+        '''
+        Constructs a CompactFlatDict instance from given flat key and value
+        pairs, interning each key as it is consumed. Keys are assumed to be
+        unique.
+
+        Args:
+            items (iterable): Flat key and value pairs.
+            separator (str, optional): Field separator in keys. Default: '/'.
+            table (FieldTable, optional): Field table to share with other
+                instances. Default: None.
+
+        Returns:
+            CompactFlatDict: New CompactFlatDict instance.
+        '''
+        output = CompactFlatDict(separator=separator, table=table)
+        for key, val in items:
+            output._append(key, val)
+        return output
+
+    def _append(self, key, value):
+        # type: (str, Any) -> None
+        '''
+        Appends given key and value without checking if key already exists.
+
+        Args:
+            key (str): Flat key.
+            value (object): Value.
+        '''
+        intern = self._table.intern
+        self._fields.extend([intern(x) for x in key.split(self._separator)])
+        self._offsets.append(len(self._fields))
+        self._values.append(value)
+        self._size += 1
+        if self._index is not None:
+            self._index[self._get_ids(len(self._values) - 1)] = len(self._values) - 1
+
+    def _get_ids(self, position):
+        # type: (int) -> Tuple[int, ...]
+        '''
+        Args:
+            position (int): Key position.
+
+        Returns:
+            tuple[int]: Field ids of key at given position.
+        '''
+        start = self._offsets[position]
+        stop = self._offsets[position + 1]
+        return tuple(self._fields[start:stop])
+
+    def _get_key(self, position):
+        # type: (int) -> str
+        '''
+        Args:
+            position (int): Key position.
+
+        Returns:
+            str: Key at given position.
+        '''
+        fields = self._table.fields
+        start = self._offsets[position]
+        stop = self._offsets[position + 1]
+        return self._separator.join([fields[x] for x in self._fields[start:stop]])
+
+    def _find(self, key):
+        # type: (str) -> Optional[int]
+        '''
+        Finds position of given key, building lookup index if needed.
+
+        Args:
+            key (str): Flat key.
+
+        Returns:
+            int or None: Key position.
+        '''
+        if self._index is None:
+            index = {}
+            for i, val in enumerate(self._values):
+                if val is not self._DELETED:
+                    index[self._get_ids(i)] = i
+            self._index = index
+
+        ids = []
+        for field in key.split(self._separator):
+            id_ = self._table.ids.get(field)
+            if id_ is None:
+                return None
+            ids.append(id_)
+        return self._index.get(tuple(ids))
+
+    def __getitem__(self, key):
+        # type: (str) -> Any
+        position = self._find(key)
+        if position is None:
+            raise KeyError(key)
+        return self._values[position]
+
+    def __setitem__(self, key, value):
+        # type: (str, Any) -> None
+        position = self._find(key)
+        if position is None:
+            self._append(key, value)
+        else:
+            self._values[position] = value
+
+    def __delitem__(self, key):
+        # type: (str) -> None
+        position = self._find(key)
+        if position is None:
+            raise KeyError(key)
+        del self._index[self._get_ids(position)]  # type: ignore
+        self._values[position] = self._DELETED
+        self._size -= 1
+
+    def __iter__(self):
+        # type: () -> Iterator[str]
+        for i, val in enumerate(self._values):
+            if val is not self._DELETED:
+                yield self._get_key(i)
+
+    def __len__(self):
+        # type: () -> int
+        return self._size
+
+    def __repr__(self):
+        # type: () -> str
+        return f'CompactFlatDict({dict(self.items())})'
+
+    def __deepcopy__(self, memo):
+        # type: (Dict) -> CompactFlatDict
+        output = CompactFlatDict(separator=self._separator, table=self._table)
+        if self._size == len(self._values):
+            output._fields = array('I', self._fields)
+            output._offsets = array('Q', self._offsets)
+            output._values = deepcopy(self._values, memo)
+            output._size = self._size
+            return output
+
+        # drop deleted keys
+        for i, val in enumerate(self._values):
+            if val is not self._DELETED:
+                output._fields.extend(self._fields[self._offsets[i]:self._offsets[i + 1]])
+                output._offsets.append(len(output._fields))
+                output._values.append(deepcopy(val, memo))
+        output._size = self._size
+        return output
+
+    def items(self):  # type: ignore
+        # type: () -> Iterator[Tuple[str, Any]]
+        '''
+        Yields:
+            tuple[str, object]: Key and value pairs.
+        '''
+        for i, val in enumerate(self._values):
+            if val is not self._DELETED:
+                yield self._get_key(i), val
+
+    def values(self):  # type: ignore
+        # type: () -> Iterator[Any]
+        '''
+        Yields:
+            object: Values.
+        '''
+        for val in self._values:
+            if val is not self._DELETED:
+                yield val
+
+    def memory_usage(self):
+        # type: () -> Dict[str, int]
+        '''
+        Approximates memory used by keys, values and indexes in bytes.
+        Field table memory is attributed to keys.
+
+        Returns:
+            dict: Dictionary with keys, values and indexes keys.
+        '''
+        table = self._table
+        keys = sys.getsizeof(self._fields) + sys.getsizeof(self._offsets)
+        keys += sys.getsizeof(table.ids) + sys.getsizeof(table.fields)
+        keys += sum(sys.getsizeof(x) for x in table.fields)
+
+        values = sys.getsizeof(self._values)
+        values += sum(
+            sys.getsizeof(x) for x in self._values if x is not self._DELETED
+        )
+
+        indexes = 0
+        if self._index is not None:
+            indexes += sys.getsizeof(self._index)
+            indexes += sum(sys.getsizeof(x) for x in self._index.keys())
+        return dict(keys=keys, values=values, indexes=indexes)
+
+
 class BlobETL:
     '''
     Converts blob data internally into a flat dictionary that is universally
     searchable, editable and convertable back to the data's original structure,
     new blob structures or directed graphs.
     '''
-    def __init__(self, blob, separator='/'):
-        # type: (Any, str) -> None
+    def __init__(self, blob, separator='/', compact=False):
+        # type: (Any, str, bool) -> None
         '''
         Contructs BlobETL instance.
 
@@ -38,10 +323,101 @@ def __init__(self, blob, separator='/'):
             blob (object): Iterable object.
             separator (str, optional): String to be used as a field separator in
                 each key. Default: '/'.
+            compact (bool, optional): Whether to store data as a
+                CompactFlatDict, which interns key fields. Trades speed for
+                memory. Default: False.
         '''
-        self._data = rpt \
-            .flatten(blob, separator=separator, embed_types=True)  # type: Dict[str, Any]
+        # flat data is flattened one item at a time, so that compact data is
+        # interned without building an intermediate dictionary
+        data = blob  # type: Any
+        if isinstance(blob, CompactFlatDict):
+            items = self._iter_flat_items(blob, separator)
+            nested = any(rpt.is_iterable(x) and len(x) > 0 for x in blob.values())
+            if compact and not nested:
+                data = blob
+            elif compact:
+                data = CompactFlatDict.from_items(items, separator=separator)
+            else:
+                data = dict(items)
+        else:
+            items = rpt.iter_flatten(blob, separator=separator, embed_types=True)
+            if compact:
+                data = CompactFlatDict.from_items(items, separator=separator)
+            else:
+                data = dict(items)
+
+        self._data = data  # type: Any
         self._separator = separator  # type: str
+        self._compact = compact  # type: bool
+        self._field_index = None  # type: Optional[Dict[str, List[str]]]
+
+    @staticmethod
+    def _iter_flat_items(flat_dict, separator='/'):
+        # type: (CompactFlatDict, str) -> Iterator[Tuple[str, Any]]
+        '''
+        Yields items of given flat dictionary, with nested values flattened
+        beneath their keys.
+
+        Args:
+            flat_dict (CompactFlatDict): Flat dictionary.
+            separator (str, optional): Field separator in keys. Default: '/'.
+
+        Yields:
+            tuple[str, object]: Flat key and value.
+        '''
+        for key, val in flat_dict.items():
+            if rpt.is_iterable(val) and len(val) > 0:
+                items = rpt.iter_flatten(val, separator=separator)
+                for k, v in items:
+                    yield f'{key}{separator}{k}', v
+            else:
+                yield key, val
+
+    @staticmethod
+    def _from_flat_dict(flat_dict, separator='/', compact=False):
+        # type: (Dict[str, Any], str, bool) -> BlobETL
+        '''
+        Constructs BlobETL instance from an already flattened dictionary, without
+        flattening it again.
+
+        Args:
+            flat_dict (dict): Flat dictionary with embedded types.
+            separator (str, optional): String to be used as a field separator in
+                each key. Default: '/'.
+            compact (bool, optional): Whether to store data as a
+                CompactFlatDict. Default: False.
+
+        Returns:
+            BlobETL: New BlobETL instance.
+        '''
+        data = flat_dict  # type: Any
+        if compact and not isinstance(data, CompactFlatDict):
+            data = CompactFlatDict.from_dict(data, separator=separator)
+
+        output = BlobETL.__new__(BlobETL)
+        output._data = data
+        output._separator = separator
+        output._compact = compact
+        output._field_index = None
+        return output
+
+    def _get_field_index(self):
+        # type: () -> Dict[str, List[str]]
+        '''
+        Gets index of keys by their first field. Index is built once and cached.
+
+        Returns:
+            dict: Dictionary of first field keys and lists of keys values.
+        '''
+        if self._field_index is None:
+            index = {}  # type: Dict[str, List[str]]
+            for key in self._data.keys():
+                field = key.split(self._separator, 1)[0]
+                if field not in index:
+                    index[field] = []
+                index[field].append(key)
+            self._field_index = index
+        return self._field_index
 
     # EDIT_METHODS--------------------------------------------------------------
     def query(self, regex, ignore_case=True, invert=False):
@@ -62,6 +438,45 @@ def query(self, regex, ignore_case=True, invert=False):
         r = re.compile(regex, re.IGNORECASE) if ignore_case else re.compile(regex)
         return self.filter(lambda x: bool(r.search(x)), by='key', invert=invert)
 
+    def glob(self, pattern, invert=False):
+        # type: (str, bool) -> BlobETL
+        '''
+        Filter data items by key according to given path pattern. Patterns are
+        compiled into a single regular expression matched against whole keys,
+        see rolling_pin.tools.compile_path_pattern for syntax.
+
+        Example:
+        ========
+            >>> BlobETL(data).glob('users/[*]/name/{first,last}')
+            >>> BlobETL(data).glob('services/**/port')
+
+        Args:
+            pattern (str): Path pattern.
+            invert (bool, optional): Whether to invert the predicate.
+                Default: False.
+
+        Returns:
+            BlobETL: New BlobETL instance.
+        '''
+        sep = self._separator
+        matchers = rpt.compile_path_pattern(pattern, separator=sep)
+        regex = rpt.compile_path_regex(pattern, separator=sep)
+
+        # use field index to only visit keys with matching first fields
+        keys = self._data.keys()  # type: Any
+        if not invert and len(matchers) > 0:
+            kind, value = matchers[0]
+            if kind in ['literal', 'set']:
+                heads = {value} if kind == 'literal' else value
+                index = self._get_field_index()
+                keys = chain(*[v for k, v in index.items() if k in heads])
+
+        data = {}
+        for key in keys:
+            if (regex.fullmatch(key) is None) == invert:
+                data[key] = self._data[key]
+        return BlobETL._from_flat_dict(data, separator=sep, compact=self._compact)
+
     def filter(self, predicate, by='key', invert=False):
         # type: (Callable[[Any], bool], str, bool) -> BlobETL
         '''
@@ -103,7 +518,7 @@ def filter(self, predicate, by='key', invert=False):
             if pred(item):
                 data[key] = val
 
-        return BlobETL(data, separator=self._separator)
+        return BlobETL(data, separator=self._separator, compact=self._compact)
 
     def delete(self, predicate, by='key'):
         # type: (Callable[[Any], bool], str) -> BlobETL
@@ -140,7 +555,7 @@ def delete(self, predicate, by='key'):
             if predicate(*item):
                 del data[key]
 
-        return BlobETL(data, separator=self._separator)
+        return BlobETL(data, separator=self._separator, compact=self._compact)
 
     def set(
         self,
@@ -185,7 +600,7 @@ def set(
                 del data[item[0]]
                 data[k] = v
 
-        return BlobETL(data, separator=self._separator)
+        return BlobETL(data, separator=self._separator, compact=self._compact)
 
     def update(self, item):
         # type: (Union[Dict, BlobETL]) -> BlobETL
@@ -199,12 +614,15 @@ def update(self, item):
         Returns:
             BlobETL: New BlobETL instance.
         '''
-        if isinstance(item, BlobETL):
-            item = item._data
-        temp = rpt.flatten(item, separator=self._separator, embed_types=True)
+        data = item  # type: Any
+        if isinstance(data, BlobETL):
+            data = data._data
+        if isinstance(data, CompactFlatDict):
+            data = dict(data.items())
+        temp = rpt.flatten(data, separator=self._separator, embed_types=True)
         data = deepcopy(self._data)
         data.update(temp)
-        return BlobETL(data, separator=self._separator)
+        return BlobETL(data, separator=self._separator, compact=self._compact)
 
     def set_field(self, index, field_setter):
         # type: (int, Callable[[str], str]) -> BlobETL
@@ -218,13 +636,142 @@ def set_field(self, index, field_setter):
         Returns:
             BlobETL: New BlobETL instance.
         '''
+        return self.set_fields({index: field_setter})
+
+    def set_fields(self, field_setters):
+        # type: (Dict[int, Callable[[str], str]]) -> BlobETL
+        '''
+        Set's fields at given indices according to given functions, in a single
+        pass over all keys. Each function is only called once per distinct
+        field value.
+
+        Args:
+            field_setters (dict): Dictionary of field index keys and
+                functions of form lambda str: str values.
+
+        Returns:
+            BlobETL: New BlobETL instance.
+        '''
+        sep = self._separator
+        setters = [(i, f, {}) for i, f in field_setters.items()]  # type: Any
         output = {}
         for key, val in self._data.items():
-            fields = key.split(self._separator)
-            fields[index] = field_setter(fields[index])
-            key = self._separator.join(fields)
-            output[key] = val
-        return BlobETL(output, separator=self._separator)
+            fields = key.split(sep)
+            for index, setter, memo in setters:
+                field = fields[index]
+                if field not in memo:
+                    memo[field] = setter(field)
+                fields[index] = memo[field]
+            output[sep.join(fields)] = val
+        return BlobETL._from_flat_dict(output, separator=sep, compact=self._compact)
+
+    # CHANGE-DETECTION-METHODS--------------------------------------------------
+    def fingerprint(self, depth=1):
+        # type: (int) -> Dict[str, str]
+        '''
+        Computes stable Merkle hashes of every subtree up to a given depth.
+        Hashes are computed bottom-up, in a single pass over the flat keys in
+        sorted field order. A subtree's hash only changes if a key or value
+        beneath it changes.
+
+        Args:
+            depth (int, optional): Maximum number of fields in the keys of the
+                returned subtrees. Default: 1.
+
+        Returns:
+            dict: Dictionary of subtree key and hexadecimal hash pairs.
+        '''
+        sep = self._separator
+        new = lambda: hashlib.blake2b(digest_size=16)
+        output = {}  # type: Dict[str, str]
+
+        # path holds the fields of open subtrees, hashers holds the hasher of
+        # the root and each open subtree
+        path = []  # type: List[str]
+        hashers = [new()]
+
+        def add(fields, kind, digest):
+            # type: (List[str], str, str) -> None
+            if len(fields) <= depth:
+                output[sep.join(fields)] = digest
+            item = [kind, fields[-1], digest]
+            hashers[-1].update(json.dumps(item).encode('utf-8'))
+
+        def close():
+            # type: () -> None
+            digest = hashers.pop().hexdigest()
+            add(path, 'tree', digest)
+            path.pop()
+
+        for key in rpt.sort_flat_keys(self._data, separator=sep):
+            fields = [x for x in key.split(sep) if x != '']
+            n = 0
+            while n < len(path) and n < len(fields) - 1 and path[n] == fields[n]:
+                n += 1
+            while len(path) > n:
+                close()
+            for field in fields[n:-1]:
+                path.append(field)
+                hashers.append(new())
+
+            value = json.dumps(self._data[key], sort_keys=True, default=repr)
+            digest = new()
+            digest.update(value.encode('utf-8'))
+            add(fields, 'value', digest.hexdigest())
+
+        while len(path) > 0:
+            close()
+        return output
+
+    def changed_subtrees(self, old_fingerprints):
+        # type: (Dict[str, str]) -> List[str]
+        '''
+        Compares the fingerprints of this instance against given fingerprints
+        of a previous instance. Fingerprints are computed to the depth of the
+        deepest given subtree.
+
+        Args:
+            old_fingerprints (dict): Output of a previous fingerprint call.
+
+        Returns:
+            list[str]: Sorted subtree keys which were added, removed or
+                changed.
+        '''
+        depth = [len(x.split(self._separator)) for x in old_fingerprints.keys()]
+        new = self.fingerprint(depth=max(depth, default=1))
+        keys = set(new.keys()).union(old_fingerprints.keys())
+        output = filter(lambda x: new.get(x) != old_fingerprints.get(x), keys)
+        return sorted(output)
+
+    def memory_usage(self):
+        # type: () -> Dict[str, int]
+        '''
+        Approximates memory used by internal data in bytes, broken down into
+        keys, values and indexes. Values are measured shallowly.
+
+        Returns:
+            dict: Dictionary with keys, values, indexes and total keys.
+        '''
+        data = self._data
+        if self._compact:
+            output = data.memory_usage()
+        else:
+            keys = sys.getsizeof(data) + sum(sys.getsizeof(x) for x in data.keys())
+            values = sum(sys.getsizeof(x) for x in data.values())
+            output = dict(keys=keys, values=values, indexes=0)
+
+        index = self._field_index
+        if index is not None:
+            output['indexes'] += sys.getsizeof(index)
+            for key, val in index.items():
+                output['indexes'] += sys.getsizeof(key) + sys.getsizeof(val)
+
+                # compact mode materializes key strings
+                if self._compact:
+                    output['indexes'] += sum(sys.getsizeof(x) for x in val)
+
+        output['total'] = output['keys'] + output['values'] + output['indexes']
+        return output
 
     # EXPORT-METHODS------------------------------------------------------------
     def to_dict(self):
@@ -243,6 +790,8 @@ def to_flat_dict(self):
         Returns:
             dict: Flat dictionary with embedded types.
         '''
+        if self._compact:
+            return deepcopy(dict(self._data.items()))
         return deepcopy(self._data)
 
     def to_records(self):
@@ -385,7 +934,7 @@ def field_combinations(a, b):
         for key in p_keys:
             values = self.query(key).to_flat_dict().values()
             output[key] = Counter(values)
-        return BlobETL(output, separator=self._separator)
+        return BlobETL(output, separator=self._separator, compact=self._compact)
 
     def to_networkx_graph(self):
         # type: () -> networkx.DiGraph
@@ -590,8 +1139,10 @@ def write(
         _, ext = os.path.splitext(fullpath)
         ext = re.sub(r'^\.', '', ext)
         if re.search('^json$', ext, re.I):
+            # stream nested JSON directly from flat keys
+            chunks = rpt.iter_nested_json(self._data, separator=self._separator)
             with open(fullpath, 'w') as f:
-                json.dump(self.to_dict(), f)
+                f.writelines(chunks)
             return self
 
         if color_scheme is None:
@@ -1,6 +1,8 @@
 from collections import deque, Counter
+import json
 import os
 import re
+import tracemalloc
 import unittest
 from copy import deepcopy
 from itertools import chain
@@ -12,7 +14,7 @@
 import numpy as np
 
 import rolling_pin.tools as rpt
-from rolling_pin.blob_etl import BlobETL
+from rolling_pin.blob_etl import BlobETL, CompactFlatDict
 # ------------------------------------------------------------------------------
 
 
@@ -96,6 +98,99 @@ def test_query(self):
         del blob['a0']['b1']
         self.assertEqual(result, blob)
 
+    def test_glob(self):
+        blob = self.get_complex_blob()
+
+        result = BlobETL(blob).glob('a0/b1/[1]/c3/**').to_dict()
+        expected = {'a0': {'b1': [{'c3': blob['a0']['b1'][1]['c3']}]}}
+        self.assertEqual(result, expected)
+
+        result = BlobETL(blob).glob('**/c0').to_flat_dict()
+        expected = {
+            'a0/b0/c0': 'a0/b0/c0/value',
+            'a0/b1/<list_0>/c0': 'a0/b1/c0/value',
+        }
+        self.assertEqual(result, expected)
+
+        result = BlobETL(blob).glob('a0/*/{c1,c2}').to_flat_dict()
+        self.assertEqual(result, {'a0/b0/c1': 'a0/b0/c1/value'})
+
+        result = BlobETL(blob).glob('a0/b1/[*]/c?').to_flat_dict()
+        expected = {
+            'a0/b1/<list_0>/c0': 'a0/b1/c0/value',
+            'a0/b1/<list_0>/c1': 'a0/b1/c1/value',
+            'a0/b1/<list_1>/c2': 'a0/b1/c2/value',
+        }
+        self.assertEqual(result, expected)
+
+        result = BlobETL(blob).glob('{a0,x}/**/d0/[1]/*').to_flat_dict()
+        expected = {
+            'a0/b1/<list_1>/c3/d0/<list_1>/<tuple_0>': 'a0/b1/c3/d0/value0',
+            'a0/b1/<list_1>/c3/d0/<list_1>/<tuple_1>': 'a0/b1/c3/d0/value1',
+        }
+        self.assertEqual(result, expected)
+
+        result = BlobETL(blob).glob('x/**').to_flat_dict()
+        self.assertEqual(result, {})
+
+        # invert
+        result = BlobETL(blob).glob('a0/b1/**', invert=True).to_dict()
+        del blob['a0']['b1']
+        self.assertEqual(result, blob)
+
+    def test_glob_query_parity(self):
+        blob = self.get_complex_blob()
+        etl = BlobETL(blob, separator='.')
+        result = etl.glob('a0.b1.*.c3.**').to_flat_dict()
+        expected = etl.query(r'^a0\.b1\.[^\.]+\.c3\.').to_flat_dict()
+        self.assertEqual(result, expected)
+
+    def test_fingerprint(self):
+        blob = self.get_complex_blob()
+        result = BlobETL(blob).fingerprint()
+        self.assertEqual(list(result.keys()), ['a0'])
+        self.assertEqual(result, BlobETL(blob).fingerprint())
+
+        result = BlobETL(blob).fingerprint(depth=2)
+        self.assertEqual(sorted(result.keys()), ['a0', 'a0/b0', 'a0/b1'])
+
+        # subtree hashes are independent of key order and siblings
+        temp = deepcopy(blob)
+        temp['a0']['b2'] = 'foo'
+        other = BlobETL(temp)
+        other = BlobETL(dict(reversed(other.to_flat_dict().items())))
+        other = other.fingerprint(depth=2)
+        self.assertNotEqual(other['a0'], result['a0'])
+        self.assertEqual(other['a0/b0'], result['a0/b0'])
+        self.assertEqual(other['a0/b1'], result['a0/b1'])
+        self.assertIn('a0/b2', other)
+
+        # values are typed
+        a = BlobETL({'a': {'b': 1}}).fingerprint(depth=2)
+        b = BlobETL({'a': {'b': '1'}}).fingerprint(depth=2)
+        self.assertNotEqual(a['a/b'], b['a/b'])
+
+    def test_changed_subtrees(self):
+        blob = self.get_complex_blob()
+        old = BlobETL(blob).fingerprint(depth=3)
+
+        result = BlobETL(blob).changed_subtrees(old)
+        self.assertEqual(result, [])
+
+        blob['a0']['b0']['c1'] = 'taco'
+        blob['a0']['b1'][1]['c3']['d0'][1] = ('x', 'y')
+        del blob['a0']['b1'][0]['c0']
+        blob['a1'] = {'b0': 'foo'}
+        result = BlobETL(blob).changed_subtrees(old)
+        expected = [
+            'a0', 'a0/b0', 'a0/b0/c1', 'a0/b1', 'a0/b1/<list_0>',
+            'a0/b1/<list_1>', 'a1', 'a1/b0',
+        ]
+        self.assertEqual(result, expected)
+
+        result = BlobETL(blob).changed_subtrees({})
+        self.assertEqual(result, ['a0', 'a1'])
+
     def test_to_dict(self):
         expected = self.get_complex_blob()
         result = BlobETL(expected).to_dict()
@@ -385,6 +480,31 @@ def test_set_field(self):
         }
         self.assertEqual(result, expected)
 
+    def test_set_fields(self):
+        etl = BlobETL({
+            'a/bar/c': 0,
+            'a/b/c/d': 1,
+            'x/bar/c': 2,
+        })
+        calls = []
+
+        def setter(x):
+            calls.append(x)
+            return x.upper()
+
+        result = etl.set_fields({0: setter, -1: lambda x: x + 'z'})._data
+        expected = {
+            'A/bar/cz': 0,
+            'A/b/c/dz': 1,
+            'X/bar/cz': 2,
+        }
+        self.assertEqual(result, expected)
+        self.assertEqual(calls, ['a', 'x'])
+
+        result = etl.set_fields({})._data
+        self.assertEqual(result, etl._data)
+        self.assertIsNot(result, etl._data)
+
     def test_filter_delete_update_set(self):
         blob = self.get_simple_blob()
         etl = BlobETL(blob)
@@ -427,6 +547,128 @@ def test_filter_delete_update_set(self):
         self.assertEqual(result['food'][0]['taco'], 'salad')
         self.assertEqual(result['food'][1]['pepperoni'], 'pizza')
 
+    def test_compact(self):
+        blob = self.get_complex_blob()
+        etl = BlobETL(blob)
+        compact = BlobETL(blob, compact=True)
+        self.assertIsInstance(compact._data, CompactFlatDict)
+        self.assertEqual(compact.to_flat_dict(), etl.to_flat_dict())
+        self.assertIs(type(compact.to_flat_dict()), dict)
+        self.assertEqual(compact.to_dict(), blob)
+
+        temp = {'a0': {'b1': {'bar': 'baz'}}}
+        results = [
+            lambda x: x.query('c3'),
+            lambda x: x.glob('a0/b1/**'),
+            lambda x: x.filter(lambda k, v: 'c0' in k, by='key+value'),
+            lambda x: x.delete(lambda k: 'b1' in k),
+            lambda x: x.set(lambda k, v: 'c1' in k, value_setter=lambda k, v: 1),
+            lambda x: x.set(
+                lambda k, v: 'c1' in k,
+                value_setter=lambda k, v: {'x': [1, {'y': v}]},
+            ),
+            lambda x: x.update(temp),
+            lambda x: x.update(BlobETL(temp, compact=True)),
+            lambda x: x.set_field(1, lambda x: 'foo'),
+        ]
+        for func in results:
+            result = func(compact)
+            self.assertTrue(result._compact)
+            self.assertIsInstance(result._data, CompactFlatDict)
+            self.assertEqual(result.to_flat_dict(), func(etl).to_flat_dict())
+
+        self.assertEqual(compact.to_records(), etl.to_records())
+        self.assertEqual(compact.fingerprint(3), etl.fingerprint(3))
+
+        blob = self.get_simple_blob()
+        self.assertEqual(
+            BlobETL(blob, compact=True).to_prototype().to_flat_dict(),
+            BlobETL(blob).to_prototype().to_flat_dict(),
+        )
+
+        with TemporaryDirectory() as root:
+            target = Path(root, 'foo.json')
+            compact.write(target)
+            with open(target) as f:
+                result = json.load(f)
+            expected = json.loads(json.dumps(compact.to_dict(), default=list))
+            self.assertEqual(result, expected)
+
+    def test_compact_flat_dict(self):
+        data = CompactFlatDict.from_dict({'a/b': 0, 'a/c': 1}, separator='/')
+        self.assertEqual(len(data), 2)
+        self.assertEqual(list(data), ['a/b', 'a/c'])
+        self.assertEqual(data['a/c'], 1)
+        self.assertNotIn('a/d', data)
+        self.assertNotIn('x/b', data)
+        self.assertEqual(data._table.fields, ['a', 'b', 'c'])
+
+        data['a/b'] = 2
+        data['a/d'] = [3]
+        self.assertEqual(dict(data.items()), {'a/b': 2, 'a/c': 1, 'a/d': [3]})
+
+        del data['a/c']
+        self.assertEqual(len(data), 2)
+        self.assertEqual(list(data.values()), [2, [3]])
+        with self.assertRaises(KeyError):
+            del data['a/c']
+        with self.assertRaises(KeyError):
+            data['a/c']
+
+        result = deepcopy(data)
+        self.assertEqual(result, data)
+        self.assertIs(result._table, data._table)
+        self.assertIsNot(result['a/d'], data['a/d'])
+        self.assertEqual(len(result._values), 2)
+
+        data['a/c'] = 4
+        self.assertEqual(data['a/c'], 4)
+        self.assertNotIn('a/c', result)
+
+    def test_compact_construction_memory(self):
+        blob = {
+            'some_long_service_name': [
+                {'configuration': {'port': i, 'hostname': 'localhost'}}
+                for i in range(2000)
+            ]
+        }
+
+        def get_peak(compact):
+            tracemalloc.start()
+            try:
+                BlobETL(blob, compact=compact)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        # compact data is interned without building a flat dict first
+        self.assertLess(get_peak(True), get_peak(False))
+
+    def test_memory_usage(self):
+        blob = {
+            'some_long_service_name': [
+                {'configuration': {'port': i, 'hostname': 'localhost'}}
+                for i in range(200)
+            ]
+        }
+        etl = BlobETL(blob)
+        result = etl.memory_usage()
+        self.assertEqual(
+            sorted(result.keys()), ['indexes', 'keys', 'total', 'values']
+        )
+        self.assertEqual(result['indexes'], 0)
+        self.assertEqual(
+            result['total'],
+            result['keys'] + result['values'] + result['indexes'],
+        )
+
+        etl.glob('some_long_service_name/**')
+        self.assertGreater(etl.memory_usage()['indexes'], 0)
+
+        compact = BlobETL(blob, compact=True).memory_usage()
+        self.assertLess(compact['keys'], result['keys'])
+        self.assertEqual(compact['indexes'], 0)
+
     def test_to_networkx_graph(self):
         blob = self.get_simple_blob()
         etl = BlobETL(blob)
@@ -507,6 +749,47 @@ def test_to_html(self):
         result = etl.to_html()
         self.assertIsInstance(result, IPython.display.HTML)
 
+    def test_write_json(self):
+        with TemporaryDirectory() as root:
+            blob = self.get_complex_blob()
+            blob['a0']['b1'][1]['c3']['d0'][0] = list(range(12))
+            etl = BlobETL(blob)
+
+            target = Path(root, 'foo.json')
+            etl.write(target)
+            with open(target) as f:
+                result = json.load(f)
+            self.assertEqual(result, json.loads(json.dumps(blob)))
+
+    def test_write_json_memory(self):
+        blob = [
+            dict(id=i, name=f'n{i}', tags=['a', 'b'], meta=dict(x=i, y=[1, 2]))
+            for i in range(2000)
+        ]
+        etl = BlobETL(blob)
+
+        def get_peak(func):
+            tracemalloc.start()
+            try:
+                func()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        with TemporaryDirectory() as root:
+            target = Path(root, 'foo.json')
+
+            def write_nested():
+                with open(target, 'w') as f:
+                    json.dump(etl.to_dict(), f)
+
+            expected = get_peak(write_nested)
+            result = get_peak(lambda: etl.write(target))
+            self.assertLessEqual(result, expected)
+
+            with open(target) as f:
+                self.assertEqual(json.load(f), json.loads(json.dumps(blob)))
+
     def test_write(self):
         with TemporaryDirectory() as root:
             blob = self.get_simple_blob()
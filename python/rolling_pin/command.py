@@ -1,7 +1,10 @@
+from typing import Optional  # noqa: F401
+
 import subprocess
 
 import click
 import lunchbox.theme as lbc
+import yaml
 
 from rolling_pin.conform_etl import ConformETL
 from rolling_pin.radon_etl import RadonETL
@@ -53,8 +56,8 @@ def conform(source, groups, dryrun):
 
 
 @main.command()
-@click.argument('source', type=str, nargs=1)
-@click.argument('target', type=str, nargs=1)
+@click.argument('source', type=str, nargs=1, required=False)
+@click.argument('target', type=str, nargs=1, required=False)
 @click.option(
     '--include',
     type=str,
@@ -73,8 +76,39 @@ def conform(source, groups, dryrun):
     '--orient', type=str, nargs=1, default='lr',
     help='graph orientation. default: lr.',
 )
-def graph(source, target, include, exclude, orient):
-    # type: (str, str, str, str, str) -> None
+@click.option(
+    '--workers', type=int, nargs=1, default=1,
+    help='number of processes used to extract imports. default: 1.',
+)
+@click.option(
+    '--cache', type=str, nargs=1, default=None,
+    help='sqlite file in which extracted imports are cached between runs.',
+)
+@click.option(
+    '--layout', type=click.Choice(['anneal', 'layered']), default='anneal',
+    help='engine used to compute node coordinates. default: anneal.',
+)
+@click.option(
+    '--watch', is_flag=True, default=False,
+    help='poll source for changes and rewrite target after each change.',
+)
+@click.option(
+    '--interval', type=float, nargs=1, default=1.0,
+    help='seconds between polls in watch mode. default: 1.',
+)
+@click.option(
+    '--native', is_flag=True, default=False,
+    help='render svg from internal coordinates without graphviz.',
+)
+@click.option(
+    '--batch', type=str, nargs=1, default=None,
+    help='YAML manifest of repositories to be graphed in a process pool.',
+)
+def graph(
+    source, target, include, exclude, orient, workers, cache, layout, watch,
+    interval, native, batch
+):
+    # type: (Optional[str], Optional[str], str, str, str, int, Optional[str], str, bool, float, bool, Optional[str]) -> None
     '''
     {white}Generate a dependency graph of a source repository and write it to a
     given filepath{clear}
@@ -83,17 +117,73 @@ def graph(source, target, include, exclude, orient):
     {cyan2}ARGUMENTS{clear}
         {cyan2}source{clear}  repository path
         {cyan2}target{clear}  target filepath
+
+    \b
+    {yellow2}BATCH-MANIFEST{clear}
+        workers: 4                    {blue2}# processes, overrides --workers{clear}
+        union: graphs/all.svg         {blue2}# optional cross-repo graph{clear}
+        repos:
+          - source: /repos/foo
+            target: graphs/foo.svg
     '''
     include_ = '' if include is None else include
     exclude_ = '' if exclude is None else exclude
-    RepoETL(source, include_, exclude_).write(target, orient=orient)
+    renderer = 'native' if native else 'dot'
+    if batch is not None:
+        if watch:
+            raise click.UsageError('--watch cannot be used with --batch.')
+        with open(batch) as f:
+            manifest = yaml.safe_load(f)
+        items = manifest['repos']
+        repos = RepoETL.batch(
+            [x['source'] for x in items],
+            workers=manifest.get('workers', workers),
+            include_regex=include_,
+            exclude_regex=exclude_,
+            cache=cache,
+            layout=layout,
+        )
+        for repo, item in zip(repos, items):
+            repo.write(item['target'], layout=renderer, orient=orient)
+        if manifest.get('union') is not None:
+            RepoETL.union(repos)\
+                .write(manifest['union'], layout=renderer, orient=orient)
+        return
+
+    if source is None or target is None:
+        raise click.UsageError('SOURCE and TARGET are required without --batch.')
+
+    repo = RepoETL(
+        source,
+        include_,
+        exclude_,
+        workers=workers,
+        cache=cache,
+        layout=layout,
+    )
+    if watch:
+        repo.watch(target, interval=interval, layout=renderer, orient=orient)
+    else:
+        repo.write(target, layout=renderer, orient=orient)
 
 
 @main.command()
 @click.argument('source', type=str, nargs=1)
 @click.argument('target', type=str, nargs=1)
-def plot(source, target):
-    # type: (str, str) -> None
+@click.option(
+    '--workers', type=int, nargs=1, default=1,
+    help='number of processes used to analyze files. default: 1.',
+)
+@click.option(
+    '--cache', type=str, nargs=1, default=None,
+    help='sqlite file in which file metrics are cached between runs.',
+)
+@click.option(
+    '--cache-size', type=int, nargs=1, default=100000,
+    help='maximum number of files kept in the cache. default: 100000.',
+)
+def plot(source, target, workers, cache, cache_size):
+    # type: (str, str, int, Optional[str], int) -> None
     '''
     {white}Write radon metrics plots of given repository to given filepath.
     {clear}
@@ -103,14 +193,28 @@ def plot(source, target):
         {cyan2}source{clear}  repository path
         {cyan2}target{clear}  plot filepath
     '''
-    RadonETL(source).write_plots(target)
+    RadonETL(
+        source, workers=workers, cache=cache, cache_size=cache_size
+    ).write_plots(target)
 
 
 @main.command()
 @click.argument('source', type=str, nargs=1)
 @click.argument('target', type=str, nargs=1)
-def table(source, target):
-    # type: (str, str) -> None
+@click.option(
+    '--workers', type=int, nargs=1, default=1,
+    help='number of processes used to analyze files. default: 1.',
+)
+@click.option(
+    '--cache', type=str, nargs=1, default=None,
+    help='sqlite file in which file metrics are cached between runs.',
+)
+@click.option(
+    '--cache-size', type=int, nargs=1, default=100000,
+    help='maximum number of files kept in the cache. default: 100000.',
+)
+def table(source, target, workers, cache, cache_size):
+    # type: (str, str, int, Optional[str], int) -> None
     '''
     {white}Write radon metrics tables of given repository to given directory
     {clear}
@@ -120,7 +224,9 @@ def table(source, target):
         {cyan2}source{clear}  repository path
         {cyan2}target{clear}  table directory
     '''
-    RadonETL(source).write_tables(target)
+    RadonETL(
+        source, workers=workers, cache=cache, cache_size=cache_size
+    ).write_tables(target)
 
 
 @main.command()
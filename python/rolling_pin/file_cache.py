@@ -0,0 +1,218 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union  # noqa: F401
+
+from contextlib import closing
+from pathlib import Path
+import hashlib
+import json
+import os
+import sqlite3
+import time
+# ------------------------------------------------------------------------------
+
+'''
+Contains the FileCache class, which is used for persisting data derived from
+files between runs.
+'''
+
+Stat = Tuple[int, int, str]
+
+
+class FileCache:
+    '''
+    Persistent cache of JSON serializable data derived from files, stored in a
+    single sqlite database. Entries are keyed by namespace and filepath, and
+    are only returned while the file's modification time and size, and
+    optionally its content hash, are unchanged. If a maximum size is given,
+    least recently used entries are evicted beyond it.
+    '''
+    def __init__(
+        self,
+        fullpath,
+        namespace='default',
+        use_hash=False,
+        use_stat=True,
+        max_size=None,
+    ):
+        # type: (Union[str, Path], str, bool, bool, Optional[int]) -> None
+        '''
+        Constructs a FileCache instance. Creates database if it does not exist.
+
+        Args:
+            fullpath (str or Path): Path to sqlite database file.
+            namespace (str, optional): Namespace of cache entries.
+                Default: 'default'.
+            use_hash (bool, optional): Whether to also compare file content
+                hashes. Default: False.
+            use_stat (bool, optional): Whether to compare file modification
+                times and sizes. Set to False to key entries by content hash
+                alone. Default: True.
+            max_size (int, optional): Maximum number of entries within
+                namespace. Unbounded if None. Default: None.
+
+        Raises:
+            ValueError: If use_hash and use_stat are both False.
+            ValueError: If max_size is less than 1.
+        '''
+        if not use_hash and not use_stat:
+            msg = 'use_hash and use_stat cannot both be False.'
+            raise ValueError(msg)
+        if max_size is not None and max_size < 1:
+            msg = f'Max size must be greater than 0. {max_size} < 1.'
+            raise ValueError(msg)
+
+        self._fullpath = Path(os.path.abspath(fullpath)).as_posix()  # type: str
+        self._namespace = namespace  # type: str
+        self._use_hash = use_hash  # type: bool
+        self._use_stat = use_stat  # type: bool
+        self._max_size = max_size  # type: Optional[int]
+        self._stats = {}  # type: Dict[str, Stat]
+
+        os.makedirs(Path(self._fullpath).parent, exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT,
+                    filepath TEXT,
+                    mtime INTEGER,
+                    size INTEGER,
+                    digest TEXT,
+                    data TEXT,
+                    accessed INTEGER DEFAULT 0,
+                    PRIMARY KEY (namespace, filepath)
+                )
+            ''')
+
+            # databases created before LRU eviction lack an accessed column
+            cols = [x[1] for x in db.execute('PRAGMA table_info(cache)')]
+            if 'accessed' not in cols:
+                db.execute(
+                    'ALTER TABLE cache ADD COLUMN accessed INTEGER DEFAULT 0'
+                )
+
+    def _connect(self):
+        # type: () -> sqlite3.Connection
+        '''
+        Returns:
+            sqlite3.Connection: Connection to cache database.
+        '''
+        return sqlite3.connect(self._fullpath, timeout=60)
+
+    def _stat(self, filepath):
+        # type: (str) -> Stat
+        '''
+        Gets modification time, size and content hash of given file.
+        Content hash is empty if use_hash is False. Modification time and size
+        are 0 if use_stat is False.
+
+        Args:
+            filepath (str): Filepath.
+
+        Returns:
+            tuple[int, int, str]: Modification time in nanoseconds, size and
+                content hash.
+        '''
+        mtime, size, digest = 0, 0, ''
+        if self._use_stat:
+            stat = os.stat(filepath)
+            mtime, size = stat.st_mtime_ns, stat.st_size
+        if self._use_hash:
+            with open(filepath, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        return mtime, size, digest
+
+    def get(self, filepaths):
+        # type: (Iterable[Union[str, Path]]) -> Dict[Any, Any]
+        '''
+        Gets cached data of given files. Files which are missing from cache or
+        have changed since they were cached are omitted. Returned entries are
+        marked as recently used.
+
+        Args:
+            filepaths (list[str or Path]): Filepaths.
+
+        Returns:
+            dict: Dictionary of given filepath keys and cached data values.
+        '''
+        lut = {Path(os.path.abspath(x)).as_posix(): x for x in filepaths}
+        keys = list(lut.keys())
+        for key in keys:
+            self._stats[key] = self._stat(key)
+
+        rows = []  # type: List[Any]
+        query = 'SELECT filepath, mtime, size, digest, data FROM cache '
+        query += 'WHERE namespace = ? AND filepath IN ({})'
+        with closing(self._connect()) as db:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                params = [self._namespace] + batch
+                cursor = db.execute(
+                    query.format(','.join('?' * len(batch))), params
+                )
+                rows.extend(cursor.fetchall())
+
+        output = {}  # type: Dict[Any, Any]
+        hits = []
+        for filepath, mtime, size, digest, data in rows:
+            if self._stats[filepath] == (mtime, size, digest):
+                output[lut[filepath]] = json.loads(data)
+                hits.append(filepath)
+
+        if self._max_size is not None and len(hits) > 0:
+            accessed = time.time_ns()
+            with closing(self._connect()) as db, db:
+                db.executemany(
+                    'UPDATE cache SET accessed = ? '
+                    'WHERE namespace = ? AND filepath = ?',
+                    [(accessed, self._namespace, x) for x in hits]
+                )
+        return output
+
+    def set(self, items):
+        # type: (Dict[Any, Any]) -> FileCache
+        '''
+        Writes given file data to cache. File stats recorded by the last get
+        call are used, so that files which change after being read are
+        invalidated on the next run. If the namespace then exceeds max_size,
+        its least recently used entries are deleted.
+
+        Args:
+            items (dict): Dictionary of filepath keys and JSON serializable
+                data values.
+
+        Returns:
+            FileCache: self.
+        '''
+        accessed = time.time_ns()
+        rows = []
+        for filepath, data in items.items():
+            key = Path(os.path.abspath(filepath)).as_posix()
+            stat = self._stats.get(key) or self._stat(key)
+            rows.append(
+                (self._namespace, key) + stat + (json.dumps(data), accessed)
+            )
+
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            if self._max_size is not None:
+                db.execute('''
+                    DELETE FROM cache WHERE namespace = ? AND filepath NOT IN (
+                        SELECT filepath FROM cache WHERE namespace = ?
+                        ORDER BY accessed DESC LIMIT ?
+                    )
+                ''', [self._namespace, self._namespace, self._max_size])
+        return self
+
+    def clear(self):
+        # type: () -> FileCache
+        '''
+        Deletes all entries within namespace.
+
+        Returns:
+            FileCache: self.
+        '''
+        with closing(self._connect()) as db, db:
+            db.execute('DELETE FROM cache WHERE namespace = ?', [self._namespace])
+        return self
@@ -0,0 +1,164 @@
+from contextlib import closing
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import os
+import sqlite3
+import unittest
+
+from rolling_pin.file_cache import FileCache
+# ------------------------------------------------------------------------------
+
+
+class FileCacheTests(unittest.TestCase):
+    def write(self, filepath, text):
+        with open(filepath, 'w') as f:
+            f.write(text)
+
+    def test_init(self):
+        with TemporaryDirectory() as root:
+            db = Path(root, 'foo', 'cache.db')
+            FileCache(db)
+            self.assertTrue(db.is_file())
+
+    def test_get_set(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            b = Path(root, 'b.py').as_posix()
+            self.write(a, 'import os')
+            self.write(b, 'import re')
+
+            cache = FileCache(Path(root, 'cache.db'))
+            self.assertEqual(cache.get([a, b]), {})
+
+            cache.set({a: ['os'], b: dict(foo=['re'])})
+            result = FileCache(Path(root, 'cache.db')).get([a, b])
+            self.assertEqual(result, {a: ['os'], b: dict(foo=['re'])})
+
+    def test_get_changed(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            b = Path(root, 'b.py').as_posix()
+            self.write(a, 'import os')
+            self.write(b, 'import re')
+
+            cache = FileCache(Path(root, 'cache.db'))
+            cache.get([a, b])
+            cache.set({a: 'a', b: 'b'})
+
+            self.write(b, 'import re, json')
+            result = FileCache(Path(root, 'cache.db')).get([a, b])
+            self.assertEqual(result, {a: 'a'})
+
+    def test_get_use_hash(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            self.write(a, 'import os')
+            cache = FileCache(Path(root, 'cache.db'), use_hash=True)
+            cache.set({a: 'a'})
+
+            # same size and mtime, different content
+            stat = os.stat(a)
+            self.write(a, 'import re')
+            os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            result = FileCache(Path(root, 'cache.db')).get([a])
+            self.assertEqual(result, {})
+            result = FileCache(Path(root, 'cache.db'), use_hash=False).get([a])
+            self.assertEqual(result, {})
+
+    def test_namespace(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            self.write(a, 'import os')
+            db = Path(root, 'cache.db')
+            FileCache(db, namespace='foo').set({a: 'foo'})
+            FileCache(db, namespace='bar').set({a: 'bar'})
+
+            self.assertEqual(FileCache(db, namespace='foo').get([a]), {a: 'foo'})
+            self.assertEqual(FileCache(db, namespace='bar').get([a]), {a: 'bar'})
+
+            FileCache(db, namespace='foo').clear()
+            self.assertEqual(FileCache(db, namespace='foo').get([a]), {})
+            self.assertEqual(FileCache(db, namespace='bar').get([a]), {a: 'bar'})
+
+    def test_relative_paths(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py')
+            self.write(a, 'import os')
+            rel = os.path.relpath(a)
+            cache = FileCache(Path(root, 'cache.db'))
+            cache.set({rel: 'a'})
+            self.assertEqual(cache.get([rel]), {rel: 'a'})
+            self.assertEqual(cache.get([a.as_posix()]), {a.as_posix(): 'a'})
+
+    def test_init_errors(self):
+        with TemporaryDirectory() as root:
+            db = Path(root, 'cache.db')
+            expected = 'use_hash and use_stat cannot both be False.'
+            with self.assertRaisesRegex(ValueError, expected):
+                FileCache(db, use_hash=False, use_stat=False)
+
+            expected = 'Max size must be greater than 0. 0 < 1.'
+            with self.assertRaisesRegex(ValueError, expected):
+                FileCache(db, max_size=0)
+
+    def test_init_migrate(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            self.write(a, 'import os')
+            db = Path(root, 'cache.db').as_posix()
+            with closing(sqlite3.connect(db)) as conn, conn:
+                conn.execute('''
+                    CREATE TABLE cache (
+                        namespace TEXT,
+                        filepath TEXT,
+                        mtime INTEGER,
+                        size INTEGER,
+                        digest TEXT,
+                        data TEXT,
+                        PRIMARY KEY (namespace, filepath)
+                    )
+                ''')
+
+            FileCache(db, max_size=1).set({a: 'a'})
+            self.assertEqual(FileCache(db).get([a]), {a: 'a'})
+
+    def test_get_use_stat(self):
+        with TemporaryDirectory() as root:
+            a = Path(root, 'a.py').as_posix()
+            self.write(a, 'import os')
+            db = Path(root, 'cache.db')
+            FileCache(db, use_hash=True, use_stat=False).set({a: 'a'})
+
+            # same content, different mtime
+            stat = os.stat(a)
+            os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            result = FileCache(db, use_hash=True, use_stat=False).get([a])
+            self.assertEqual(result, {a: 'a'})
+            result = FileCache(db, use_hash=True).get([a])
+            self.assertEqual(result, {})
+
+            self.write(a, 'import re')
+            result = FileCache(db, use_hash=True, use_stat=False).get([a])
+            self.assertEqual(result, {})
+
+    def test_max_size(self):
+        with TemporaryDirectory() as root:
+            a, b, c = [Path(root, f'{x}.py').as_posix() for x in 'abc']
+            for x in [a, b, c]:
+                self.write(x, 'import os')
+            db = Path(root, 'cache.db')
+            FileCache(db, namespace='foo').set({c: 'c'})
+
+            cache = FileCache(db, max_size=2)
+            cache.set({a: 'a'})
+            cache.set({b: 'b'})
+            self.assertEqual(cache.get([a]), {a: 'a'})
+
+            # b is least recently used
+            cache.set({c: 'c'})
+            self.assertEqual(cache.get([a, b, c]), {a: 'a', c: 'c'})
+
+            # other namespaces are untouched
+            result = FileCache(db, namespace='foo').get([a, b, c])
+            self.assertEqual(result, {c: 'c'})
@@ -1,19 +1,28 @@
-from typing import Any, Dict, List, Union  # noqa: F401
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple, Union  # noqa: F401
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import ast
 import json
 import os
 import re
+import time
 from pathlib import Path
 
 from pandas import DataFrame
 from radon.cli import CCHarvester, HCHarvester, MIHarvester, RawHarvester
 from radon.cli import Config
+from radon.cli.tools import cc_to_dict, iter_filenames, raw_to_dict
+from radon.complexity import add_inner_blocks, sorted_results
+from radon.metrics import h_visit_ast, mi_compute, mi_rank
+from radon.raw import analyze
+from radon.visitors import ComplexityVisitor
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import radon.complexity
 
-from rolling_pin.blob_etl import BlobETL
+from rolling_pin.file_cache import FileCache
 import rolling_pin.tools as rpt
 # ------------------------------------------------------------------------------
 
@@ -28,15 +37,26 @@ class RadonETL:
     Conforms all four radon reports (raw metrics, Halstead, maintainability and
     cyclomatic complexity) into a single DataFrame that can then be plotted.
     '''
-    def __init__(self, fullpath):
-        # type: (Union[str, Path]) -> None
+    _CACHE_NAMESPACE = f'radon_etl.report.1.radon-{radon.__version__}'
+
+    def __init__(self, fullpath, workers=1, cache=None, cache_size=100000):
+        # type: (Union[str, Path], int, Optional[Union[str, Path]], Optional[int]) -> None
         '''
         Constructs a RadonETL instance.
 
         Args:
             fullpath (str or Path): Python file or directory of python files.
+            workers (int, optional): Number of processes used to analyze
+                files. Default: 1.
+            cache (str or Path, optional): Path to sqlite file in which
+                per file metrics are cached between runs. Only new or changed
+                files are analyzed. Default: None.
+            cache_size (int, optional): Maximum number of files kept in the
+                cache. If None, the cache is unbounded. Default: 100000.
         '''
-        self._report = RadonETL._get_radon_report(fullpath)
+        self._report = RadonETL._get_radon_report(
+            fullpath, workers=workers, cache=cache, cache_size=cache_size
+        )
     # --------------------------------------------------------------------------
 
     @property
@@ -139,22 +159,33 @@ def _get_radon_data(self):
     # --------------------------------------------------------------------------
 
     @staticmethod
-    def _get_radon_report(fullpath):
-        # type: (Union[str, Path]) -> Dict[str, Any]
+    def _get_radon_report(fullpath, workers=1, cache=None, cache_size=100000):
+        # type: (Union[str, Path], int, Optional[Union[str, Path]], Optional[int]) -> Dict[str, Any]
         '''
         Gets all 4 report from radon and aggregates them into a single blob
-        object.
+        object. Each file is read and parsed once, and its results are formatted
+        into the reports of all 4 radon harvesters.
+
+        If a cache is given, files are looked up by content hash within a
+        namespace specific to the installed radon version. Only files which
+        are not found are analyzed, and the cache keeps the most recently used
+        cache_size files.
 
         Args:
             fullpath (str or Path): Python file or directory of python files.
+            workers (int, optional): Number of processes used to analyze
+                files. Default: 1.
+            cache (str or Path, optional): Path to sqlite cache file.
+                Default: None.
+            cache_size (int, optional): Maximum number of files kept in the
+                cache. If None, the cache is unbounded. Default: 100000.
 
         Returns:
             dict: Radon report blob.
         '''
         fullpath_ = [Path(fullpath).absolute().as_posix()]  # type: List[str]
-        output = []  # type: Any
 
-        config = Config(
+        cc_config = Config(
             min='A',
             max='F',
             exclude=None,
@@ -168,16 +199,14 @@ def _get_radon_report(fullpath):
             no_assert=False,
             show_closures=False,
         )
-        output.append(CCHarvester(fullpath_, config).as_json())
 
-        config = Config(
+        raw_config = Config(
             exclude=None,
             ignore=None,
             summary=False,
         )
-        output.append(RawHarvester(fullpath_, config).as_json())
 
-        config = Config(
+        mi_config = Config(
             min='A',
             max='C',
             exclude=None,
@@ -186,23 +215,280 @@ def _get_radon_report(fullpath):
             show=False,
             sort=False,
         )
-        output.append(MIHarvester(fullpath_, config).as_json())
 
-        config = Config(
+        hc_config = Config(
             exclude=None,
             ignore=None,
             by_function=False,
         )
-        output.append(HCHarvester(fullpath_, config).as_json())
 
-        output = list(map(json.loads, output))
         keys = [
             'cyclomatic_complexity', 'raw_metrics', 'maintainability_index',
             'halstead_metrics',
         ]
-        output = dict(zip(keys, output))
+        harvesters = [
+            (CCHarvester, cc_config),
+            (RawHarvester, raw_config),
+            (MIHarvester, mi_config),
+            (HCHarvester, hc_config),
+        ]
+        names = list(iter_filenames(fullpath_))
+
+        hits = {}  # type: Dict[str, Any]
+        file_cache = None
+        if cache is not None:
+            file_cache = FileCache(
+                cache,
+                namespace=RadonETL._CACHE_NAMESPACE,
+                use_hash=True,
+                use_stat=False,
+                max_size=cache_size,
+            )
+            hits = file_cache.get(names)
+        misses = [x for x in names if x not in hits]
+
+        files = [x for x in misses if not x.endswith('.ipynb')]
+        results = RadonETL._harvest_files(
+            files,
+            workers=workers,
+            no_assert=cc_config.no_assert,
+            show_closures=cc_config.show_closures,
+            multi=mi_config.multi,
+        )
+        lut = dict(zip(files, results))
+
+        report = {k: {} for k in keys}  # type: Dict[str, Any]
+        for name in misses:
+            if name not in lut:
+                # notebooks are left to radon
+                for key, (harvester, config) in zip(keys, harvesters):
+                    output = harvester([name], config).as_json()
+                    report[key].update(json.loads(output))
+                continue
+
+            values = RadonETL._to_report_items(lut[name], cc_config, mi_config)
+            for key, item in zip(keys, values):
+                if item is not None:
+                    report[key][name] = item
+        if file_cache is None:
+            return report
+
+        # files filtered out of a report are cached as None
+        items = {x: [report[k].get(x) for k in keys] for x in misses}
+        if len(items) > 0:
+            file_cache.set(items)
+        hits.update(items)
+
+        report = {}
+        for i, key in enumerate(keys):
+            report[key] = {
+                x: hits[x][i] for x in names if hits[x][i] is not None
+            }
+        return report
+
+    @staticmethod
+    def _to_report_items(results, cc_config, mi_config):
+        # type: (List[Any], Config, Config) -> List[Any]
+        '''
+        Formats the results of _harvest for a python file into the items of
+        its cyclomatic complexity, raw, maintainability index and Halstead
+        reports, as the as_json methods of the respective radon harvesters
+        would. Items filtered out of a report are None.
+
+        Args:
+            results (list): Results of _harvest.
+            cc_config (Config): Cyclomatic complexity harvester config.
+            mi_config (Config): Maintainability index harvester config.
+
+        Returns:
+            list: Report items.
+        '''
+        cc, raw, mi, hal = results
+
+        # sort orders are functions, which cannot be sent to workers
+        if isinstance(cc, list):
+            blocks = sorted_results(cc, order=cc_config.order)
+            cc = [
+                x for x in map(cc_to_dict, blocks)
+                if cc_config.min <= x['rank'] <= cc_config.max
+            ] or None
+
+        if 'error' not in mi:
+            if not mi_config.min <= mi['rank'] <= mi_config.max:
+                mi = None
+
+        return [cc, raw, mi, RadonETL._halstead_to_dict(hal)]
+
+    @staticmethod
+    def _halstead_to_dict(result):
+        # type: (Any) -> Dict[str, Any]
+        '''
+        Converts a Halstead result of a file into the builtin types of its JSON
+        representation, so that reports equal their cached copies.
+
+        Args:
+            result (Halstead or dict): Halstead result or error dict.
+
+        Returns:
+            dict: Halstead result dict.
+        '''
+        if 'error' in result:
+            return result
+        return dict(
+            total=list(result.total),
+            functions=[[k, list(v)] for k, v in result.functions],
+        )
+
+    @staticmethod
+    def _harvest_files(filepaths, workers=1, **kwargs):
+        # type: (List[str], int, Any) -> List[List[Any]]
+        '''
+        Harvests radon results of given python files. Files are analyzed in a
+        process pool if workers is greater than 1. Results are returned in the
+        order of the given filepaths, regardless of the order in which files
+        finish. Progress and per file timing are logged at the info level.
+
+        Args:
+            filepaths (list[str]): Python filepaths.
+            workers (int, optional): Number of processes. Default: 1.
+            **kwargs: Keyword arguments passed to _harvest.
+
+        Returns:
+            list[list]: Results of _harvest per file.
+        '''
+        total = len(filepaths)
+        if workers <= 1 or total < 2:
+            items = map(
+                RadonETL._harvest_file, filepaths, repeat(kwargs)
+            )  # type: Iterable[Tuple[List[Any], float]]
+            return RadonETL._log_progress(filepaths, items)
+
+        chunksize = max(1, total // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            items = pool.map(
+                RadonETL._harvest_file, filepaths, repeat(kwargs),
+                chunksize=chunksize,
+            )
+            return RadonETL._log_progress(filepaths, items)
+
+    @staticmethod
+    def _log_progress(filepaths, items):
+        # type: (List[str], Iterable[Tuple[List[Any], float]]) -> List[List[Any]]
+        '''
+        Collects harvested results while logging progress and per file timing.
+
+        Args:
+            filepaths (list[str]): Python filepaths.
+            items (iterable[tuple]): Results and seconds per file.
+
+        Returns:
+            list[list]: Results per file.
+        '''
+        total = len(filepaths)
+        start = time.perf_counter()
+        output = []
+        for i, (filepath, (results, seconds)) in enumerate(
+            zip(filepaths, items), start=1
+        ):
+            rpt.LOGGER.info(
+                f'Analyzed {i}/{total} files: {filepath} ({seconds:.3f}s)'
+            )
+            output.append(results)
+        if total > 0:
+            rpt.LOGGER.info(
+                f'Analyzed {total} files in {time.perf_counter() - start:.3f}s.'
+            )
         return output
 
+    @staticmethod
+    def _harvest_file(filepath, kwargs):
+        # type: (str, Dict[str, Any]) -> Tuple[List[Any], float]
+        '''
+        Harvests radon results of a given python file and times it.
+
+        Args:
+            filepath (str): Python filepath.
+            kwargs (dict): Keyword arguments passed to _harvest.
+
+        Returns:
+            tuple[list, float]: Results of _harvest and seconds taken.
+        '''
+        start = time.perf_counter()
+        encoding = os.getenv('RADONFILESENCODING', 'utf-8')
+        with open(filepath, encoding=encoding) as fobj:
+            results = RadonETL._harvest(fobj, **kwargs)
+        return results, time.perf_counter() - start
+
+    @staticmethod
+    def _harvest(fobj, no_assert=False, show_closures=False, multi=True):
+        # type: (IO[str], bool, bool, bool) -> List[Any]
+        '''
+        Computes cyclomatic complexity, raw, maintainability index and
+        Halstead results of a python file, from a single read and a single
+        syntax tree. Results are identical to those of the gobble methods of
+        the respective radon harvesters, including error results, except
+        that cyclomatic complexity blocks are not sorted.
+
+        Args:
+            fobj (file): Python file object.
+            no_assert (bool, optional): Whether to ignore assert statements in
+                complexity. Default: False.
+            show_closures (bool, optional): Whether to add closures to
+                complexity blocks. Default: False.
+            multi (bool, optional): Whether to count multiline strings as
+                comments in maintainability index. Default: True.
+
+        Returns:
+            list: Cyclomatic complexity, raw, maintainability index and
+                Halstead results.
+        '''
+        def attempt(func, *args, **kwargs):
+            try:
+                return func(*args, **kwargs), None
+            except Exception as error:
+                return None, {'error': str(error)}
+
+        code, error = attempt(fobj.read)
+        if error is not None:
+            return [dict(error) for _ in range(4)]
+
+        tree, tree_error = attempt(ast.parse, code)
+        raw, raw_error = attempt(analyze, code)
+        raw_result = raw_error or raw_to_dict(raw)
+        if tree_error is not None:
+            return [tree_error, raw_result, dict(tree_error), dict(tree_error)]
+
+        visitor, cc_error = attempt(
+            ComplexityVisitor.from_ast, tree, no_assert=no_assert
+        )
+        # MIHarvester always uses a default visitor
+        mi_visitor, mi_error = visitor, cc_error
+        if no_assert:
+            mi_visitor, mi_error = attempt(ComplexityVisitor.from_ast, tree)
+        hal, hal_error = attempt(h_visit_ast, tree)
+
+        cc_result = cc_error
+        if cc_error is None:
+            cc_result = visitor.blocks
+            if show_closures:
+                cc_result = add_inner_blocks(cc_result)
+
+        # errors are raised in the order of mi_parameters
+        mi_result = raw_error or hal_error or mi_error
+        if mi_result is None:
+            lines = raw.comments + (raw.multi if multi else 0)
+            comments = lines / float(raw.sloc) * 100 if raw.sloc != 0 else 0
+            mi_, mi_error = attempt(
+                mi_compute,
+                hal.total.volume,
+                mi_visitor.total_complexity,
+                raw.lloc,
+                comments,
+            )
+            mi_result = mi_error or {'mi': mi_, 'rank': mi_rank(mi_)}
+
+        return [cc_result, raw_result, mi_result, hal_error or hal]
+
     @staticmethod
     def _get_raw_metrics_dataframe(report):
         # type: (Dict) -> DataFrame
@@ -215,11 +501,6 @@ def _get_raw_metrics_dataframe(report):
         Returns:
             DataFrame: Raw metrics DataFrame.
         '''
-        raw = report['raw_metrics']
-        fullpaths = list(raw.keys())
-        path_lut = {k: f'<list_{i}>' for i, k in enumerate(fullpaths)}
-        fullpath_fields = {x: {'fullpath': x} for x in fullpaths}
-
         #   loc = Lines of Code (total lines) - sloc + blanks + multi + single_comments
         #   lloc = Logical Lines of Code
         #   comments = Comments lines
@@ -228,29 +509,21 @@ def _get_raw_metrics_dataframe(report):
         #   single_comments = Single-line comments or docstrings
         name_lut = dict(
             blank='blank',
+            loc='code',
             comments='comment',
             lloc='logical_code',
-            loc='code',
             multi='multiline_comment',
             single_comments='single_comment',
             sloc='source_code',
-            fullpath='fullpath',
         )
-        data = BlobETL(raw, '#')\
-            .update(fullpath_fields) \
-            .set_field(0, lambda x: path_lut[x])\
-            .set_field(1, lambda x: name_lut[x])\
-            .to_dict()  # type: Union[Dict, DataFrame]
-
-        data = DataFrame(data)
+        rows = [
+            [fullpath] + [val[k] for k in name_lut.keys()]
+            for fullpath, val in report['raw_metrics'].items()
+        ]
+        cols = ['fullpath'] + list(name_lut.values())
+        data = DataFrame(rows, columns=cols)
         data.sort_values('fullpath', inplace=True)
         data.reset_index(drop=True, inplace=True)
-        cols = [
-            'fullpath', 'blank', 'code', 'comment', 'logical_code',
-            'multiline_comment', 'single_comment', 'source_code',
-        ]
-        data = data[cols]
-
         return data
 
     @staticmethod
@@ -265,33 +538,16 @@ def _get_maintainability_index_dataframe(report):
         Returns:
             DataFrame: Maintainability DataFrame.
         '''
-        mi = report['maintainability_index']
-        fullpaths = list(mi.keys())
-        path_lut = {k: f'<list_{i}>' for i, k in enumerate(fullpaths)}
-        fullpath_fields = {x: {'fullpath': x} for x in fullpaths}
-        name_lut = dict(
-            mi='maintainability_index',
-            rank='maintainability_rank',
-            fullpath='fullpath',
-        )
-        data = None  # type: Any
-        data = BlobETL(mi, '#')\
-            .update(fullpath_fields) \
-            .set_field(0, lambda x: path_lut[x])\
-            .set_field(1, lambda x: name_lut[x])\
-            .to_dict()
-
-        data = DataFrame(data)
-        data.sort_values('fullpath', inplace=True)
-        data.reset_index(drop=True, inplace=True)
-        cols = ['fullpath', 'maintainability_index', 'maintainability_rank']
-        data = data[cols]
-
         # convert rank to integer
         rank_lut = {k: i for i, k in enumerate('ABCDEF')}
-        data['maintainability_rank'] = data['maintainability_rank']\
-            .apply(lambda x: rank_lut[x])
-
+        rows = [
+            [fullpath, val['mi'], rank_lut[val['rank']]]
+            for fullpath, val in report['maintainability_index'].items()
+        ]
+        cols = ['fullpath', 'maintainability_index', 'maintainability_rank']
+        data = DataFrame(rows, columns=cols)
+        data.sort_values('fullpath', inplace=True)
+        data.reset_index(drop=True, inplace=True)
         return data
 
     @staticmethod
@@ -300,34 +556,59 @@ def _get_cyclomatic_complexity_dataframe(report):
         '''
         Converts radon cyclomatic complexity report into a pandas DataFrame.
 
+        Rows are gathered in the following order: closures of methods,
+        closures of top level blocks, methods of classes and top level blocks.
+        Each is sorted by fullpath and then by list index as a string. Sibling
+        closures and methods are merged into a single row, in which the fields
+        of the last sibling win.
+
         Args:
             report (dict): Radon report blob.
 
         Returns:
             DataFrame: Cyclomatic complexity DataFrame.
         '''
-        filters = [
-            [4, 6, 'method_closure',
-                '^[^#]+#<list_[0-9]+>#methods#<list_[0-9]+>#closures#<list_[0-9]+>#[^#]+$'],
-            [3, 4, 'closure', '^[^#]+#<list_[0-9]+>#closures#<list_[0-9]+>#[^#]+$'],
-            [3, 4, 'method', '^[^#]+#<list_[0-9]+>#methods#<list_[0-9]+>#[^#]+$'],
-            [2, 2, None, '^[^#]+#<list_[0-9]+>#[^#]+$'],
-        ]  # type: Any
+        def merge(items):
+            # type: (List[Dict[str, Any]]) -> Dict[str, Any]
+            row = {}  # type: Dict[str, Any]
+            for item in items:
+                row.update({
+                    k: v for k, v in item.items()
+                    if not isinstance(v, list) or len(v) == 0
+                })
+            return row
+
+        groups = dict(
+            method_closure=[], closure=[], method=[], block=[],
+        )  # type: Dict[str, List[Any]]
+        for fullpath, val in report['cyclomatic_complexity'].items():
+            if 'error' in val:
+                continue
+            for i, block in enumerate(val):
+                key = (fullpath, f'<list_{i}>')
+                for j, method in enumerate(block.get('methods', [])):
+                    if len(method.get('closures', [])) > 0:
+                        row = merge(method['closures'])
+                        row['type'] = 'method_closure'
+                        groups['method_closure'].append(
+                            (key + (f'<list_{j}>',), fullpath, row)
+                        )
+                if len(block.get('closures', [])) > 0:
+                    row = merge(block['closures'])
+                    row['type'] = 'closure'
+                    groups['closure'].append((key, fullpath, row))
+                if len(block.get('methods', [])) > 0:
+                    row = merge(block['methods'])
+                    row['type'] = 'method'
+                    groups['method'].append((key, fullpath, row))
+                groups['block'].append((key, fullpath, merge([block])))
 
-        cc = report['cyclomatic_complexity']
         rows = []
-        for i, j, type_, regex in filters:
-            temp = BlobETL(cc, '#').query(regex)  # type: DataFrame
-            if len(temp.to_flat_dict().keys()) > 0:
-                temp = temp.to_dataframe(i)
-                item = temp\
-                    .apply(lambda x: dict(zip(x[j], x['value'])), axis=1)\
-                    .tolist()
-                item = DataFrame(item)
-                item['fullpath'] = temp[0]
-                if type_ is not None:
-                    item.type = type_
-                rows.append(item)
+        for items in groups.values():
+            items = sorted(items, key=lambda x: x[0])
+            rows.append(DataFrame([x[2] for x in items]))
+            rows[-1]['fullpath'] = [x[1] for x in items]
+        rows = [x for x in rows if len(x) > 0]
         data = pd.concat(rows, ignore_index=True, sort=False)
 
         cols = [
@@ -369,36 +650,36 @@ def _get_halstead_dataframe(report):
         Returns:
             DataFrame: Halstead DataFrame.
         '''
-        hal = report['halstead_metrics']
         keys = [
             'h1', 'h2', 'n1', 'n2', 'vocabulary', 'length', 'calculated_length',
             'volume', 'difficulty', 'effort', 'time', 'bugs',
         ]
-        data = BlobETL(hal, '#').query('function|closure').to_dataframe(3)
-        data['fullpath'] = data[0]
-        data['object_type'] = data[1].apply(lambda x: re.sub('s$', '', x))
-        data['name'] = data.value.apply(lambda x: x[0])
-
-        score = data.value.apply(lambda x: dict(zip(keys, x[1:]))).tolist()
-        score = DataFrame(score)
-        data = data.join(score)
-
-        total = BlobETL(hal, '#').query('total').to_dataframe()
-        total['fullpath'] = total[0]
-        total = total.groupby('fullpath', as_index=False)\
-            .agg(lambda x: dict(zip(keys, x)))
-        score = total.value.tolist()
-        score = DataFrame(score)
-        total = total.join(score)
-        total['object_type'] = 'module'
-        total['name'] = total.fullpath\
-            .apply(lambda x: os.path.splitext((Path(x).name))[0])
-        data = pd.concat([data, total], ignore_index=True, sort=False)
+        hal = [
+            (fullpath, val) for fullpath, val in report['halstead_metrics'].items()
+            if 'error' not in val
+        ]
+        hal = sorted(hal, key=lambda x: x[0])
 
+        # functions are sorted by list index as a string
+        items = [
+            ((fullpath, f'<list_{i}>'), name, metrics)
+            for fullpath, val in hal
+            for i, (name, metrics) in enumerate(val['functions'])
+        ]
+        items = sorted(items, key=lambda x: x[0])
+        rows = [
+            [key[0], name, 'function'] + list(metrics)
+            for key, name, metrics in items
+        ]
+        rows.extend(
+            [fullpath, os.path.splitext(Path(fullpath).name)[0], 'module']
+            + list(val['total'])
+            for fullpath, val in hal
+        )
         cols = ['fullpath', 'name', 'object_type']
         cols.extend(keys)
-        data = data[cols]
-
+        data = DataFrame(rows, columns=cols)
+        data[keys] = data[keys].astype(float)
         return data
 
     # EXPORT--------------------------------------------------------------------
@@ -1,13 +1,21 @@
+import json
 import os
 import re
+import shutil
 import unittest
+import unittest.mock as mock
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+from radon.cli import CCHarvester, HCHarvester, MIHarvester, RawHarvester
+from radon.cli import Config
 import lunchbox.tools as lbt
 import numpy as np
 from pandas import DataFrame
+import pandas as pd
+import radon.complexity
 
+from rolling_pin.blob_etl import BlobETL
 from rolling_pin.radon_etl import RadonETL
 # ------------------------------------------------------------------------------
 
@@ -49,6 +57,111 @@ def assert_equal(self, a, b, cols=['fullpath']):
                 b.loc[i, cols].tolist(),
             )
 
+    def get_report_reference(self, fullpath):
+        fullpath = [Path(fullpath).absolute().as_posix()]
+        harvesters = [
+            CCHarvester(fullpath, Config(
+                min='A', max='F', exclude=None, ignore=None,
+                show_complexity=False, average=False, total_average=False,
+                order=radon.complexity.SCORE, no_assert=False,
+                show_closures=False,
+            )),
+            RawHarvester(fullpath, Config(
+                exclude=None, ignore=None, summary=False
+            )),
+            MIHarvester(fullpath, Config(
+                min='A', max='C', exclude=None, ignore=None, multi=True,
+                show=False, sort=False,
+            )),
+            HCHarvester(fullpath, Config(
+                exclude=None, ignore=None, by_function=False
+            )),
+        ]
+        keys = [
+            'cyclomatic_complexity', 'raw_metrics', 'maintainability_index',
+            'halstead_metrics',
+        ]
+        return {k: json.loads(x.as_json()) for k, x in zip(keys, harvesters)}
+
+    def get_cyclomatic_complexity_reference(self, report):
+        filters = [
+            [4, 6, 'method_closure',
+                '^[^#]+#<list_[0-9]+>#methods#<list_[0-9]+>#closures#<list_[0-9]+>#[^#]+$'],
+            [3, 4, 'closure', '^[^#]+#<list_[0-9]+>#closures#<list_[0-9]+>#[^#]+$'],
+            [3, 4, 'method', '^[^#]+#<list_[0-9]+>#methods#<list_[0-9]+>#[^#]+$'],
+            [2, 2, None, '^[^#]+#<list_[0-9]+>#[^#]+$'],
+        ]
+        cc = report['cyclomatic_complexity']
+        rows = []
+        for i, j, type_, regex in filters:
+            temp = BlobETL(cc, '#').query(regex)
+            if len(temp.to_flat_dict().keys()) > 0:
+                temp = temp.to_dataframe(i)
+                item = temp\
+                    .apply(lambda x: dict(zip(x[j], x['value'])), axis=1)\
+                    .tolist()
+                item = DataFrame(item)
+                item['fullpath'] = temp[0]
+                if type_ is not None:
+                    item.type = type_
+                rows.append(item)
+        data = pd.concat(rows, ignore_index=True, sort=False)
+
+        cols = [
+            'fullpath', 'name', 'classname', 'type', 'complexity', 'rank',
+            'lineno', 'endline', 'col_offset'
+        ]
+        data = data[cols]
+        lut = {
+            'fullpath': 'fullpath',
+            'name': 'name',
+            'classname': 'class_name',
+            'type': 'object_type',
+            'complexity': 'cyclomatic_complexity',
+            'rank': 'cyclomatic_rank',
+            'lineno': 'start_line',
+            'endline': 'stop_line',
+            'col_offset': 'column_offset',
+        }
+        data.drop_duplicates(inplace=True)
+        data.rename(mapper=lambda x: lut[x], axis=1, inplace=True)
+        data.reset_index(drop=True, inplace=True)
+        rank_lut = {k: i for i, k in enumerate('ABCDEF')}
+        data['cyclomatic_rank'] = data['cyclomatic_rank']\
+            .apply(lambda x: rank_lut[x])
+        return data
+
+    def get_halstead_reference(self, report):
+        hal = report['halstead_metrics']
+        keys = [
+            'h1', 'h2', 'n1', 'n2', 'vocabulary', 'length', 'calculated_length',
+            'volume', 'difficulty', 'effort', 'time', 'bugs',
+        ]
+        data = BlobETL(hal, '#').query('function|closure').to_dataframe(3)
+        data['fullpath'] = data[0]
+        data['object_type'] = data[1].apply(lambda x: re.sub('s$', '', x))
+        data['name'] = data.value.apply(lambda x: x[0])
+
+        score = data.value.apply(lambda x: dict(zip(keys, x[1:]))).tolist()
+        score = DataFrame(score)
+        data = data.join(score)
+
+        total = BlobETL(hal, '#').query('total').to_dataframe()
+        total['fullpath'] = total[0]
+        total = total.groupby('fullpath', as_index=False)\
+            .agg(lambda x: dict(zip(keys, x)))
+        score = total.value.tolist()
+        score = DataFrame(score)
+        total = total.join(score)
+        total['object_type'] = 'module'
+        total['name'] = total.fullpath\
+            .apply(lambda x: os.path.splitext((Path(x).name))[0])
+        data = pd.concat([data, total], ignore_index=True, sort=False)
+
+        cols = ['fullpath', 'name', 'object_type']
+        cols.extend(keys)
+        return data[cols]
+
     def test_init(self):
         repo = self.get_fake_repo()
         result = RadonETL(repo)._report
@@ -67,6 +180,128 @@ def test_report(self):
             for fullpath in val.keys():
                 self.assertIn(fullpath, expected)
 
+    def test_get_radon_report(self):
+        with TemporaryDirectory() as root:
+            for name, text in [
+                ('good.py', 'def foo(x):\n    # comment\n    return x + 1\n'),
+                ('bad.py', 'def foo(:\n'),
+                ('empty.py', ''),
+            ]:
+                with open(Path(root, name), 'w') as f:
+                    f.write(text)
+
+            for fullpath in [root, self.get_fake_repo(), Path(__file__).parent]:
+                result = RadonETL._get_radon_report(fullpath)
+                expected = self.get_report_reference(fullpath)
+                self.assertEqual(result, expected)
+
+            result = RadonETL._get_radon_report(root)
+            bad = Path(root, 'bad.py').as_posix()
+            for key in [
+                'cyclomatic_complexity', 'maintainability_index',
+                'halstead_metrics',
+            ]:
+                self.assertIn('error', result[key][bad])
+
+    def test_get_radon_report_workers(self):
+        root = Path(__file__).parent
+        expected = RadonETL._get_radon_report(root)
+        result = RadonETL._get_radon_report(root, workers=2)
+        self.assertEqual(result, expected)
+        for key, val in expected.items():
+            self.assertEqual(list(result[key].keys()), list(val.keys()))
+
+        result = RadonETL(self.get_fake_repo(), workers=2).data
+        self.assert_equal(result, self.get_fake_repo_data())
+
+    def test_harvest_files(self):
+        repo = self.get_fake_repo()
+        files = [
+            Path(repo, x).absolute().as_posix()
+            for x in ['foo.py', 'bar/baz.py', 'bar/__init__.py']
+        ]
+        with self.assertLogs('rolling_pin.tools', level='INFO') as log:
+            result = RadonETL._harvest_files(files, workers=2)
+        self.assertEqual(len(result), 3)
+        for item in result:
+            self.assertEqual(len(item), 4)
+
+        expected = [r'Analyzed 1/3 files: .*foo.py \(\d+\.\d{3}s\)']
+        expected.append(r'Analyzed 2/3 files: .*baz.py')
+        expected.append(r'Analyzed 3/3 files: .*__init__.py')
+        expected.append(r'Analyzed 3 files in \d+\.\d{3}s')
+        self.assertEqual(len(log.output), 4)
+        for line, pattern in zip(log.output, expected):
+            self.assertRegex(line, pattern)
+
+        self.assertEqual(RadonETL._harvest_files([]), [])
+
+    def test_get_radon_report_cache(self):
+        with TemporaryDirectory() as root:
+            repo = Path(root, 'repo').as_posix()
+            shutil.copytree(self.get_fake_repo(), repo)
+            with open(Path(repo, 'bad.py'), 'w') as f:
+                f.write('def foo(:\n')
+            cache = Path(root, 'cache.db')
+            foo = Path(repo, 'foo.py').as_posix()
+            expected = RadonETL._get_radon_report(repo)
+
+            func = RadonETL._harvest_files
+            with mock.patch.object(
+                RadonETL, '_harvest_files', side_effect=func
+            ) as harvest:
+                result = RadonETL._get_radon_report(repo, cache=cache)
+                self.assertEqual(result, expected)
+                self.assertEqual(len(harvest.call_args[0][0]), 4)
+
+                # unchanged content is not analyzed, even if touched
+                os.utime(foo)
+                with mock.patch.object(RawHarvester, 'gobble') as gobble:
+                    result = RadonETL._get_radon_report(repo, cache=cache)
+                    gobble.assert_not_called()
+                self.assertEqual(result, expected)
+                self.assertEqual(harvest.call_args[0][0], [])
+                for key, val in expected.items():
+                    self.assertEqual(list(result[key].keys()), list(val.keys()))
+
+                with open(foo, 'a') as f:
+                    f.write('\ndef bar():\n    return 1\n')
+                expected = RadonETL._get_radon_report(repo)
+                result = RadonETL._get_radon_report(repo, cache=cache)
+                self.assertEqual(result, expected)
+                self.assertEqual(harvest.call_args[0][0], [foo])
+
+            result = RadonETL(repo, cache=cache).report
+            self.assertEqual(result, expected)
+
+    def test_get_radon_report_cache_size(self):
+        repo = self.get_fake_repo()
+        with TemporaryDirectory() as root:
+            cache = Path(root, 'cache.db')
+            expected = RadonETL._get_radon_report(repo)
+
+            func = RadonETL._harvest_files
+            with mock.patch.object(
+                RadonETL, '_harvest_files', side_effect=func
+            ) as harvest:
+                result = RadonETL._get_radon_report(
+                    repo, cache=cache, cache_size=1
+                )
+                self.assertEqual(result, expected)
+                self.assertEqual(len(harvest.call_args[0][0]), 3)
+
+                # only the most recently used file is kept
+                RadonETL(repo, cache=cache, cache_size=1)
+                self.assertEqual(len(harvest.call_args[0][0]), 2)
+
+                # no files are evicted from an unbounded cache
+                RadonETL(repo, cache=cache, cache_size=None)
+                RadonETL(repo, cache=cache, cache_size=None)
+                self.assertEqual(harvest.call_args[0][0], [])
+
+            with self.assertRaises(ValueError):
+                RadonETL(repo, cache=cache, cache_size=0)
+
     def test_data(self):
         repo = self.get_fake_repo()
         result = RadonETL(repo).data
@@ -107,6 +342,32 @@ def test_cyclomatic_complexity_metrics(self):
         cols = ['fullpath', 'name', 'class_name']
         self.assert_equal(result, expected, cols)
 
+    def test_dataframes_reference(self):
+        closures = ''.join(
+            f'    def closure_{i}():\n        pass\n' for i in range(12)
+        )
+        text = ''.join(f'def func_{i}():\n{closures}\n' for i in range(12))
+        text += 'class Taco:\n'
+        text += ''.join(
+            f'    def method_{i}(self):\n{closures}'.replace('\n    ', '\n        ')
+            for i in range(12)
+        )
+        with TemporaryDirectory() as root:
+            for i in range(12):
+                with open(Path(root, f'foo_{i}.py'), 'w') as f:
+                    f.write(text)
+            repos = [root, self.get_fake_repo(), Path(__file__).parent]
+
+            for repo in repos:
+                report = RadonETL._get_radon_report(repo)
+                result = RadonETL._get_cyclomatic_complexity_dataframe(report)
+                expected = self.get_cyclomatic_complexity_reference(report)
+                self.assertTrue(result.equals(expected))
+
+                result = RadonETL._get_halstead_dataframe(report)
+                expected = self.get_halstead_reference(report)
+                self.assertTrue(result.equals(expected))
+
     def test_halstead_metrics(self):
         repo = self.get_fake_repo()
         result = RadonETL(repo).halstead_metrics
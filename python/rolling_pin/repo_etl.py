@@ -1,10 +1,19 @@
-from typing import Any, Dict, Iterator, List, Optional, Union  # noqa: F401
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union  # noqa: F401
 from IPython.display import HTML, Image  # noqa: F401
 
-from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from itertools import chain, repeat
 from pathlib import Path
+import ast
+import html
+import importlib.util
 import os
 import re
+import subprocess
+import sys
+import time
+import tokenize
 
 from pandas import DataFrame, Series
 import lunchbox.tools as lbt
@@ -12,6 +21,7 @@
 import numpy as np
 import pandas as pd
 
+from rolling_pin.file_cache import FileCache
 import rolling_pin.tools as rpt
 # ------------------------------------------------------------------------------
 
@@ -27,15 +37,21 @@ class RepoETL:
     given repository. This information is stored internally as a DataFrame and
     can be rendered as networkx, pydot or SVG graphs.
     '''
+    _CACHE_NAMESPACE = 'repo_etl.imports.2'
+
     def __init__(
         self,
         root,
         include_regex=r'.*\.py$',
         exclude_regex=r'(__init__|test_|_test|mock_)\.py$',
+        workers=1,
+        cache=None,
+        layout='anneal',
     ):
-        # type: (Union[str, Path], str, str) -> None
+        # type: (Union[str, Path], str, str, int, Optional[Union[str, Path]], Union[str, bool]) -> None
         r'''
-        Construct RepoETL instance.
+        Construct RepoETL instance. Node coordinates are not computed until
+        they are first needed, by rendering or exporting the graph.
 
         Args:
             root (str or Path): Full path to repository root directory.
@@ -43,18 +59,151 @@ def __init__(
                 directy search. Default: '.*\.py$'.
             exclude_regex (str, optional): Files to be excluded in recursive
                 directy search. Default: '(__init__|test_|_test|mock_)\.py$'.
+            workers (int, optional): Number of processes used to extract
+                imports. Default: 1.
+            cache (str or Path, optional): Path to sqlite file in which
+                extracted imports are cached between runs. Only modules which
+                have changed are parsed again. Default: None.
+            layout (str or bool, optional): Engine used to compute node
+                coordinates. Options include: anneal, layered, False. If
+                False, layout is skipped entirely and graphs cannot be
+                rendered. Default: anneal.
 
         Raises:
             ValueError: If include or exclude regex does not end in '\.py$'.
+            ValueError: If layout is invalid.
         '''
         self._root = root  # type: Union[str, Path]
-        self._data = self._get_data(root, include_regex, exclude_regex)  # type: DataFrame
+        self._include_regex = include_regex  # type: str
+        self._exclude_regex = exclude_regex  # type: str
+        self._workers = workers  # type: int
+        self._cache = cache  # type: Optional[Union[str, Path]]
+        self._layout = layout  # type: Union[str, bool]
+
+        # file stats are taken before parsing, so edits made while parsing
+        # are picked up by the next update
+        files = self._list_files(root, include_regex, exclude_regex)
+        self._stats = self._get_file_stats(files)  # type: Dict[str, Tuple[int, int]]
+        self._data = self._get_data(
+            root,
+            include_regex,
+            exclude_regex,
+            workers=workers,
+            cache=cache,
+            layout=layout,
+            lazy=True,
+            files=files,
+        )  # type: DataFrame
+        self._previous = None  # type: Optional[DataFrame]
+        self._graphs = {}  # type: Dict[bool, networkx.DiGraph]
+        self._index = None  # type: Any
+        self._aggregates = None  # type: Optional[Dict[str, Any]]
+        self._sizes = None  # type: Optional[Dict[str, Tuple[int, int]]]
+        self._closures = None  # type: Optional[Dict[str, Tuple[int, int]]]
+        self._view = None  # type: Optional[Tuple[int, Tuple[Tuple[str, ...], ...]]]
+        self._derived = None  # type: Optional[str]
+        self._base = None  # type: Optional[RepoETL]
+    # --------------------------------------------------------------------------
+
+    @property
+    def layout_report(self):
+        # type: () -> Dict[str, Any]
+        '''
+        dict: Layout engine, node count, edge count, edge crossing count and
+        layout time in seconds. Computes layout if it has not been computed.
+        Empty if layout is False.
+        '''
+        data = self._get_layout_data()
+        return dict(data.attrs.get('layout_report', {}))
+    # --------------------------------------------------------------------------
+
+    @staticmethod
+    def _get_file_stats(files):
+        # type: (List[str]) -> Dict[str, Tuple[int, int]]
+        '''
+        Gets modification time and size of given files. Files which no longer
+        exist are omitted.
+
+        Args:
+            files (list[str]): Filepaths.
+
+        Returns:
+            dict: Dictionary of filepath keys and (mtime in nanoseconds, size)
+                values.
+        '''
+        output = {}
+        for file_ in files:
+            try:
+                stat = os.stat(file_)
+            except FileNotFoundError:
+                continue
+            output[file_] = (stat.st_mtime_ns, stat.st_size)
+        return output
+
+    @staticmethod
+    def _get_imports(fullpath, module=None, first_party=()):
+        # type: (Union[str, Path], Optional[str], Iterable[str]) -> List[str]
+        '''
+        Get's import statements from a given python module. Module is parsed
+        into an abstract syntax tree, so that multi-line imports and imports
+        within functions are found. Relative imports are resolved to absolute
+        module names. If module cannot be parsed, the failure is logged and
+        imports are found by scanning lines instead. Imports of standard
+        modules are dropped, unless shadowed by a first-party module.
+
+        Args:
+            fullpath (str or Path): Path to python module.
+            module (str, optional): Module name used to resolve relative
+                imports, ie 'foo.bar.baz'. Default: None.
+            first_party (list[str], optional): Top level names of first-party
+                modules. Default: ().
+
+        Returns:
+            list(str): List of imported modules.
+        '''
+        try:
+            with tokenize.open(fullpath) as f:
+                tree = ast.parse(f.read(), filename=str(fullpath))
+        except (SyntaxError, ValueError) as error:
+            msg = f'Unable to parse {fullpath}: {error}. Falling back to line scan.'
+            rpt.LOGGER.warning(msg)
+            data = RepoETL._scan_imports(fullpath)  # type: Any
+            return [x for x in data if not rpt.is_standard_module(x, first_party)]
+
+        nodes = filter(
+            lambda x: isinstance(x, (ast.Import, ast.ImportFrom)), ast.walk(tree)
+        )  # type: Any
+        nodes = sorted(nodes, key=lambda x: (x.lineno, x.col_offset))
+
+        package = None  # type: Optional[List[str]]
+        if module is not None:
+            package = module.split('.')[:-1]
+
+        data = []
+        for node in nodes:
+            if isinstance(node, ast.Import):
+                data.extend([x.name for x in node.names])
+            elif node.level == 0:
+                data.append(node.module)
+            elif package is None or node.level - 1 > len(package):
+                msg = f'Unable to resolve relative import in {fullpath} '
+                msg += f'on line {node.lineno}.'
+                rpt.LOGGER.warning(msg)
+            else:
+                fields = package[:len(package) - node.level + 1]
+                if node.module is not None:
+                    fields += node.module.split('.')
+                if fields != []:
+                    data.append('.'.join(fields))
+
+        return [x for x in data if not rpt.is_standard_module(x, first_party)]
 
     @staticmethod
-    def _get_imports(fullpath):
+    def _scan_imports(fullpath):
         # type: (Union[str, Path]) -> List[str]
         '''
-        Get's import statements from a given python module.
+        Get's import statements from a given python module by scanning for
+        lines that begin with import or from.
 
         Args:
             fullpath (str or Path): Path to python module.
@@ -62,7 +211,7 @@ def _get_imports(fullpath):
         Returns:
             list(str): List of imported modules.
         '''
-        with open(fullpath) as f:
+        with open(fullpath, errors='replace') as f:
             data = f.readlines()  # type: Union[List, Iterator]
         data = map(lambda x: x.strip('\n'), data)
         data = filter(lambda x: re.search('^import|^from', x), data)
@@ -70,16 +219,80 @@ def _get_imports(fullpath):
         data = map(lambda x: re.sub(' as .*', '', x), data)
         data = map(lambda x: re.sub(' *#.*', '', x), data)
         data = map(lambda x: re.sub('import ', '', x), data)
-        data = filter(lambda x: not lbt.is_standard_module(x), data)
         return list(data)
 
+    @staticmethod
+    def _get_all_imports(
+        fullpaths, modules, workers=1, cache=None, first_party=()
+    ):
+        # type: (List[str], List[str], int, Optional[Union[str, Path]], Iterable[str]) -> List[List[str]]
+        '''
+        Get's imports of given python modules. Modules are parsed in a process
+        pool if workers is greater than 1. If a cache is given, only modules
+        which are not found in it are parsed.
+
+        Args:
+            fullpaths (list[str]): Paths to python modules.
+            modules (list[str]): Module names used to resolve relative imports.
+            workers (int, optional): Number of processes. Default: 1.
+            cache (str or Path, optional): Path to sqlite cache file.
+                Default: None.
+            first_party (list[str], optional): Top level names of first-party
+                modules, which shadow standard modules. Default: ().
+
+        Returns:
+            list(list(str)): List of imported modules per python module.
+        '''
+        hits = {}  # type: Dict[str, Any]
+        file_cache = None
+        if cache is not None:
+            file_cache = FileCache(cache, namespace=RepoETL._CACHE_NAMESPACE)
+            hits = file_cache.get(fullpaths)
+
+        # cached imports are only valid for the same module name and
+        # first-party names
+        first_party = sorted(set(first_party))
+        misses = [
+            (path, module) for path, module in zip(fullpaths, modules)
+            if hits.get(path, {}).get('module') != module
+            or hits[path].get('first_party') != first_party
+        ]
+        paths = [x[0] for x in misses]
+        names = [x[1] for x in misses]
+        parties = repeat(first_party)
+
+        if workers <= 1 or len(misses) < 2:
+            imports = list(map(RepoETL._get_imports, paths, names, parties))
+        else:
+            chunksize = max(1, len(misses) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                imports = list(pool.map(
+                    RepoETL._get_imports, paths, names, parties,
+                    chunksize=chunksize,
+                ))
+
+        items = {
+            path: dict(module=module, imports=imps, first_party=first_party)
+            for path, module, imps in zip(paths, names, imports)
+        }
+        if file_cache is not None and len(items) > 0:
+            file_cache.set(items)
+
+        hits.update(items)
+        return [hits[x]['imports'] for x in fullpaths]
+
     @staticmethod
     def _get_data(
         root,
         include_regex=r'.*\.py$',
         exclude_regex=r'(__init__|_test)\.py$',
+        workers=1,
+        cache=None,
+        layout='anneal',
+        lazy=False,
+        files=None,
     ):
-        # type: (Union[str, Path], str, str) -> DataFrame
+        # type: (Union[str, Path], str, str, int, Optional[Union[str, Path]], Union[str, bool], bool, Optional[List[str]]) -> DataFrame
         r'''
         Recursively aggregates and filters all the files found with a given
         directory into a DataFrame. Data is used to create directed graphs.
@@ -88,11 +301,12 @@ def _get_data(
 
             * node_name    - name of node
             * node_type    - type of node, can be [module, subpackage, library]
-            * x            - node's x coordinate
-            * y            - node's y coordinate
+            * x            - node's x coordinate, if layout is computed
+            * y            - node's y coordinate, if layout is computed
             * dependencies - parent nodes
             * subpackages  - parent nodes of type subpackage
             * fullpath     - fullpath to the module a node represents
+            * distribution - installed distribution which provides a library
 
         Args:
             root (str or Path): Root directory to be searched.
@@ -100,13 +314,66 @@ def _get_data(
                 directy search. Default: '.*\.py$'.
             exclude_regex (str, optional): Files to be excluded in recursive
                 directy search. Default: '(__init__|_test)\.py$'.
+            workers (int, optional): Number of processes used to extract
+                imports. Default: 1.
+            cache (str or Path, optional): Path to sqlite file in which
+                extracted imports are cached. Default: None.
+            layout (str or bool, optional): Engine used to compute node
+                coordinates. Options include: anneal, layered, False.
+                Default: anneal.
+            lazy (bool, optional): Validate layout, but do not compute it.
+                Rows are left in the order layout expects. Default: False.
+            files (list[str], optional): Files already listed with
+                _list_files. Root is listed if None. Default: None.
 
         Raises:
             ValueError: If include or exclude regex does not end in '\.py$'.
+            ValueError: If layout is invalid.
             FileNotFoundError: If no files are found after filtering.
 
         Returns:
-            DataFrame: DataFrame of file information.
+            DataFrame: DataFrame of file information. Its layout report is
+                stored in attrs['layout_report'].
+        '''
+        layouts = ['anneal', 'layered', False]
+        if layout is not False and layout not in layouts[:-1]:
+            msg = f"Invalid layout: '{layout}'. Options include: {layouts}."
+            raise ValueError(msg)
+
+        if files is None:
+            files = RepoETL._list_files(root, include_regex, exclude_regex)
+        data = RepoETL._get_module_data(root, files, workers=workers, cache=cache)
+        data = RepoETL._add_package_nodes(data)
+        if layout is False:
+            return RepoETL._sort_data(data)
+        if lazy:
+            return data
+        return RepoETL._layout_data(data, str(layout))
+
+    @staticmethod
+    def _list_files(
+        root,
+        include_regex=r'.*\.py$',
+        exclude_regex=r'(__init__|_test)\.py$',
+    ):
+        # type: (Union[str, Path], str, str) -> List[str]
+        r'''
+        Recursively lists and filters all the files found within a given
+        directory.
+
+        Args:
+            root (str or Path): Root directory to be searched.
+            include_regex (str, optional): Files to be included in recursive
+                directy search. Default: '.*\.py$'.
+            exclude_regex (str, optional): Files to be excluded in recursive
+                directy search. Default: '(__init__|_test)\.py$'.
+
+        Raises:
+            ValueError: If include or exclude regex does not end in '\.py$'.
+            FileNotFoundError: If no files are found after filtering.
+
+        Returns:
+            list[str]: Absolute filepaths.
         '''
         root = Path(root).as_posix()
         files = rpt.list_all_files(root)  # type: Union[Iterator, List]
@@ -126,36 +393,94 @@ def _get_data(
                 files
             )
 
-        files = list(files)
+        files = [x.absolute().as_posix() for x in files]
         if len(files) == 0:
             msg = f'No files found after filters in directory: {root}.'
             raise FileNotFoundError(msg)
+        return files
 
-        # buid DataFrame of nodes and imported dependencies
-        data = DataFrame()
-        data['fullpath'] = files
-        data.fullpath = data.fullpath.apply(lambda x: x.absolute().as_posix())
+    @staticmethod
+    def _get_module_names(root, files):
+        # type: (Union[str, Path], List[str]) -> List[str]
+        '''
+        Gets module names of given files, relative to given root.
 
-        data['node_name'] = data.fullpath\
+        Args:
+            root (str or Path): Repository root directory.
+            files (list[str]): Absolute filepaths of modules.
+
+        Returns:
+            list[str]: Module names, ie foo.bar.baz.
+        '''
+        root = Path(root).as_posix()
+        output = Series(list(files), dtype=object)\
             .apply(lambda x: re.sub(root, '', x))\
             .apply(lambda x: re.sub(r'\.py$', '', x))\
             .apply(lambda x: re.sub('^/', '', x))\
             .apply(lambda x: re.sub('/', '.', x))
+        return output.tolist()
+
+    @staticmethod
+    def _get_module_data(root, files, workers=1, cache=None, first_party=None):
+        # type: (Union[str, Path], List[str], int, Optional[Union[str, Path]], Optional[Iterable[str]]) -> DataFrame
+        '''
+        Creates a DataFrame of module nodes and their imported dependencies
+        from given files.
+
+        Args:
+            root (str or Path): Repository root directory.
+            files (list[str]): Absolute filepaths of modules.
+            workers (int, optional): Number of processes used to extract
+                imports. Default: 1.
+            cache (str or Path, optional): Path to sqlite file in which
+                extracted imports are cached. Default: None.
+            first_party (list[str], optional): Top level names of first-party
+                modules, which shadow standard modules. Taken from given
+                files if None. Default: None.
+
+        Returns:
+            DataFrame: DataFrame with fullpath, node_name, subpackages,
+                dependencies and node_type columns.
+        '''
+        data = DataFrame()
+        data['fullpath'] = list(files)
+        data['node_name'] = RepoETL._get_module_names(root, files)
+        if first_party is None:
+            first_party = {x.split('.')[0] for x in data.node_name}
 
         data['subpackages'] = data.node_name\
             .apply(lambda x: rpt.get_parent_fields(x, '.')).apply(lbt.get_ordered_unique)
         data.subpackages = data.subpackages\
             .apply(lambda x: list(filter(lambda y: y != '', x)))
 
-        data['dependencies'] = data.fullpath\
-            .apply(RepoETL._get_imports).apply(lbt.get_ordered_unique)
+        data['dependencies'] = RepoETL._get_all_imports(
+            data.fullpath.tolist(),
+            data.node_name.tolist(),
+            workers=workers,
+            cache=cache,
+            first_party=first_party,
+        )
+        data.dependencies = data.dependencies.apply(lbt.get_ordered_unique)
         data.dependencies += data.node_name\
             .apply(lambda x: ['.'.join(x.split('.')[:-1])])
         data.dependencies = data.dependencies\
             .apply(lambda x: list(filter(lambda y: y != '', x)))
 
         data['node_type'] = 'module'
+        return data
 
+    @staticmethod
+    def _add_package_nodes(data):
+        # type: (DataFrame) -> DataFrame
+        '''
+        Adds subpackage and library nodes to given DataFrame of module nodes.
+
+        Args:
+            data (DataFrame): DataFrame of module nodes.
+
+        Returns:
+            DataFrame: DataFrame of all nodes, with a distribution column.
+        '''
         # add subpackages as nodes
         pkgs = set(chain(*data.subpackages.tolist()))  # type: Any
         pkgs = pkgs.difference(data.node_name.tolist())
@@ -188,17 +513,86 @@ def _get_data(
 
         data.drop_duplicates('node_name', inplace=True)
         data.reset_index(drop=True, inplace=True)
+        data['distribution'] = RepoETL._get_distributions(data)
+        return data
+
+    @staticmethod
+    def _get_distributions(data):
+        # type: (DataFrame) -> List[Optional[str]]
+        '''
+        Gets names of installed distributions which provide library nodes, so
+        that libraries can be grouped by package. Other nodes, and libraries
+        which are not installed, have no distribution.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            list[str or None]: Distribution name of each node.
+        '''
+        return [
+            rpt.get_distribution(name) if type_ == 'library' else None
+            for name, type_ in zip(data.node_name, data.node_type)
+        ]
+
+    @staticmethod
+    def _layout_data(data, layout='anneal', previous=None):
+        # type: (DataFrame, str, Optional[DataFrame]) -> DataFrame
+        '''
+        Computes node coordinates of given DataFrame, sorts it and stores a
+        layout report in its attrs['layout_report'].
 
+        Args:
+            data (DataFrame): DataFrame of all nodes.
+            layout (str, optional): Layout engine. Options include: anneal,
+                layered. Default: anneal.
+            previous (DataFrame, optional): Previous layout of nodes. If given,
+                the layout is warm started from its coordinates.
+                Default: None.
+
+        Returns:
+            DataFrame: DataFrame of nodes with coordinates.
+        '''
         # define node coordinates
-        data['x'] = 0
-        data['y'] = 0
-        data = RepoETL._calculate_coordinates(data)
-        data = RepoETL._anneal_coordinate(data, 'x', 'y')
+        start = time.perf_counter()
+        if layout == 'layered':
+            if previous is not None:
+                data = RepoETL._warm_start_coordinates(data, previous)
+            data = RepoETL._calculate_layered_coordinates(data)
+        else:
+            data['x'] = 0
+            data['y'] = 0
+            data = RepoETL._calculate_coordinates(data)
+            if previous is not None:
+                data = RepoETL._warm_start_coordinates(data, previous)
+            data = RepoETL._anneal_coordinate(data, 'x', 'y')
         data = RepoETL._center_coordinate(data, 'x', 'y')
+        seconds = time.perf_counter() - start
+
+        data = RepoETL._sort_data(data)
+        data.attrs['layout_report'] = dict(
+            engine=layout,
+            nodes=len(data),
+            edges=int(data.dependencies.apply(len).sum()),
+            crossings=RepoETL._count_crossings(data),
+            seconds=seconds,
+        )
+        return data
 
-        data.sort_values('fullpath', inplace=True)
-        data.reset_index(drop=True, inplace=True)
+    @staticmethod
+    def _sort_data(data):
+        # type: (DataFrame) -> DataFrame
+        '''
+        Sorts given DataFrame of nodes by fullpath and then node name, so that
+        nodes without a fullpath have a fixed order, and orders its columns.
 
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            DataFrame: Sorted DataFrame of nodes.
+        '''
+        data = data.sort_values(['fullpath', 'node_name']).reset_index(drop=True)
         cols = [
             'node_name',
             'node_type',
@@ -207,8 +601,85 @@ def _get_data(
             'dependencies',
             'subpackages',
             'fullpath',
+            'distribution',
         ]
-        data = data[cols]
+        cols = [x for x in cols if x in data.columns]
+        cols += [x for x in data.columns if x not in cols]
+        return data[cols]
+
+    def _get_node_data(self):
+        # type: () -> DataFrame
+        '''
+        Gets internal data with closure metrics, without computing layout.
+        Node coordinates are only included if layout has already been
+        computed. Rows and columns are sorted with _sort_data either way.
+
+        Returns:
+            DataFrame: DataFrame of nodes.
+        '''
+        closures = self._get_closures()
+        data = self._sort_data(self._data).copy()
+        data['closure_modules'] = [closures[x][0] for x in data.node_name]
+        data['closure_bytes'] = [closures[x][1] for x in data.node_name]
+        return data
+
+    def _get_layout_data(self):
+        # type: () -> DataFrame
+        '''
+        Gets internal data with node coordinates and closure metrics. Layout
+        is computed on first call, warm started from the previous layout if
+        there is one, and memoized. Layout is skipped if it is False. Only
+        used for rendering.
+
+        Returns:
+            DataFrame: DataFrame of nodes.
+        '''
+        if self._layout is not False and 'x' not in self._data.columns:
+            self._data = self._layout_data(
+                self._data.copy(), str(self._layout), previous=self._previous
+            )
+            self._previous = None
+            self._graphs = {}
+        return self._get_node_data()
+
+    def _check_layout(self):
+        # type: () -> None
+        '''
+        Raises:
+            ValueError: If layout is False.
+        '''
+        if self._layout is False:
+            msg = 'Layout is disabled. '
+            msg += 'Construct RepoETL with a layout engine to render graphs.'
+            raise ValueError(msg)
+
+    @staticmethod
+    def _warm_start_coordinates(data, previous):
+        # type: (DataFrame, DataFrame) -> DataFrame
+        '''
+        Orders nodes by their coordinates within a previous layout. Nodes
+        with a y coordinate are ranked within their level, with new nodes
+        placed after existing ones. Otherwise nodes are reordered by their
+        previous x coordinate.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+            previous (DataFrame): Previous layout of nodes.
+
+        Returns:
+            DataFrame: DataFrame of reordered nodes.
+        '''
+        lut = dict(zip(previous.node_name, previous.x))
+        prev = data.node_name.apply(lambda x: lut.get(x, np.inf)).to_numpy(float)
+        if 'y' not in data.columns:
+            order = np.argsort(prev, kind='stable')
+            return data.iloc[order].reset_index(drop=True)
+
+        ys = data.y.to_numpy()
+        order = np.lexsort((np.arange(len(data)), prev, ys))
+        x = np.empty(len(data), dtype=float)
+        x[order] = RepoETL._get_group_ranks(ys[order])
+        data['x'] = x
         return data
 
     @staticmethod
@@ -228,6 +699,8 @@ def _calculate_coordinates(data):
         data['y'] = 0
         for item in ['module', 'subpackage', 'library']:
             mask = data.node_type == item
+            if item == 'module':
+                mask |= data.node_type == 'cycle'
             n = data[mask].shape[0]
 
             index = data[mask].index
@@ -241,7 +714,8 @@ def _calculate_coordinates(data):
 
         # move all module nodes beneath supackage nodes on the y axis
         max_ = data[data.node_type == 'subpackage'].y.max()
-        index = data[data.node_type == 'module'].index
+        max_ = 0 if pd.isna(max_) else max_
+        index = data[data.node_type.isin(['module', 'cycle'])].index
         data.loc[index, 'y'] += max_
         data.loc[index, 'y'] += data.loc[index, 'subpackages'].apply(len)
 
@@ -259,7 +733,8 @@ def _anneal_coordinate(data, anneal_axis='x', pin_axis='y', iterations=10):
         position of their connected nodes. Node anneal coordinates are rectified
         at the end of each iteration according to a pin axis, so that they do
         not overlap. This mean that they are sorted at each level of the pin
-        axis.
+        axis. Reachable nodes are computed once, and nodes are updated in
+        row order, as arrays of coordinates.
 
         Args:
             data (DataFrame): DataFrame with x column.
@@ -277,35 +752,312 @@ def _anneal_coordinate(data, anneal_axis='x', pin_axis='y', iterations=10):
         y = pin_axis
         data[x] = data[x].astype(float)
         data[y] = data[y].astype(float)
-        for iteration in range(iterations):
-            # create directed graph from data
-            graph = RepoETL._to_networkx_graph(data)
 
+        # reachable nodes per node, forward and reversed
+        forward, reverse = RepoETL._get_reachability(data)
+        xs = data[x].to_numpy(dtype=float, copy=True)
+        ys = data[y].to_numpy()
+
+        # order is the current row order of nodes
+        order = np.arange(len(xs))
+        for iteration in range(iterations):
             # reverse connectivity every other iteration
-            if iteration % 2 == 0:
-                graph = graph.reverse()
-
-            # get mean coordinate of each node in directed graph
-            for name in graph.nodes:
-                tree = networkx.bfs_tree(graph, name)
-                mu = np.mean([graph.nodes[n][x] for n in tree])
-                graph.nodes[name][x] = mu
-
-            # update data coordinate column
-            for node in graph.nodes:
-                mask = data[data.node_name == node].index
-                data.loc[mask, x] = graph.nodes[node][x]
-
-            # rectify data coordinate column, so that no two nodes overlap
-            data.sort_values(x, inplace=True)
-            for yi in data[y].unique():
-                mask = data[data[y] == yi].index
-                values = data.loc[mask, x].tolist()
-                values = list(range(len(values)))
-                data.loc[mask, x] = values
+            indptr, indices = reverse if iteration % 2 == 0 else forward
+
+            # get mean coordinate of each node's reachable nodes, in row order
+            for i in order:
+                xs[i] = xs[indices[indptr[i]:indptr[i + 1]]].mean()
+
+            # rectify coordinates, so that no two nodes overlap
+            order = order[np.argsort(xs[order], kind='quicksort')]
+            xs[order] = RepoETL._get_group_ranks(ys[order])
 
+        data = data.iloc[order].copy()
+        data[x] = xs[order]
         return data
 
+    @staticmethod
+    def _get_reachability(data):
+        # type: (DataFrame) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+        '''
+        Computes the nodes reachable from each node of given DataFrame, by
+        following dependency edges forward and in reverse. Each result is a
+        compressed sparse row pair of arrays, such that the reachable nodes of
+        row i are indices[indptr[i]:indptr[i + 1]].
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            tuple: Forward and reverse (indptr, indices) array pairs.
+        '''
+        size = len(data)
+        output = []
+        for bitsets in RepoETL._get_reachability_bitsets(data):
+            reach = [rpt.bitset_to_indices(x, size) for x in bitsets]
+            indptr = np.zeros(size + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(x) for x in reach])
+            indices = np.concatenate(reach) if size > 0 else np.array([], int)
+            output.append((indptr, indices))
+        return output[0], output[1]
+
+    @staticmethod
+    def _get_reachability_bitsets(data):
+        # type: (DataFrame) -> Tuple[List[int], List[int]]
+        '''
+        Computes the nodes reachable from each node of given DataFrame, by
+        following dependency edges forward (dependents) and in reverse
+        (dependencies). Bit i of a bitset refers to row i of data.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            tuple[list[int]]: Forward and reverse bitsets, one per node.
+        '''
+        lut = {k: i for i, k in enumerate(data.node_name.tolist())}
+        size = len(data)
+        children = [[] for _ in range(size)]  # type: List[List[int]]
+        parents = [[] for _ in range(size)]  # type: List[List[int]]
+        for i, deps in enumerate(data.dependencies.tolist()):
+            for dep in deps:
+                j = lut[dep]
+                children[j].append(i)
+                parents[i].append(j)
+        return rpt.get_reachability(children), rpt.get_reachability(parents)
+
+    @staticmethod
+    def _get_group_ranks(groups):
+        # type: (np.ndarray) -> np.ndarray
+        '''
+        Ranks each item within its group, according to the order of items.
+
+        Args:
+            groups (numpy.ndarray): Group of each item.
+
+        Returns:
+            numpy.ndarray: Rank of each item within its group.
+        '''
+        index = np.argsort(groups, kind='stable')
+        sorted_ = groups[index]
+        start = np.ones(len(groups), dtype=bool)
+        start[1:] = sorted_[1:] != sorted_[:-1]
+        position = np.arange(len(groups))
+        offset = np.maximum.accumulate(np.where(start, position, 0))
+        output = np.empty(len(groups), dtype=float)
+        output[index] = position - offset
+        return output
+
+    @staticmethod
+    def _get_edges(data):
+        # type: (DataFrame) -> Tuple[np.ndarray, np.ndarray]
+        '''
+        Gets dependency edges of given DataFrame as arrays of row positions.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            tuple: Source (dependency) and target (dependent) arrays.
+        '''
+        lut = {k: i for i, k in enumerate(data.node_name.tolist())}
+        deps = data.dependencies.tolist()
+        source = np.array([lut[x] for x in chain(*deps)], dtype=np.int64)
+        target = np.repeat(np.arange(len(deps)), [len(x) for x in deps])
+        return source, target
+
+    @staticmethod
+    def _calculate_layered_coordinates(data, iterations=10):
+        # type: (DataFrame, int) -> DataFrame
+        '''
+        Calculate x, y coordinates for each node in given DataFrame, with a
+        Sugiyama style layered layout.
+
+        Nodes are assigned layers by their longest dependency path, with each
+        dependency cycle sharing a single layer. Edges which span several
+        layers are split by dummy nodes. Nodes are then ordered within layers
+        by alternating downward and upward barycenter sweeps, and the order
+        with the fewest edge crossings is kept. Lastly, dummy nodes are
+        removed and each layer is compacted.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+            iterations (int, optional): Number of sweep pairs. Default: 10.
+
+        Returns:
+            DataFrame: DataFrame with x and y coordinate columns.
+        '''
+        size = len(data)
+        source, target = RepoETL._get_edges(data)
+
+        # collapse dependency cycles into components
+        children = [[] for _ in range(size)]  # type: List[List[int]]
+        for s, t in zip(source.tolist(), target.tolist()):
+            children[s].append(t)
+        comps = rpt.get_strongly_connected_components(children)
+        comp = np.empty(size, dtype=np.int64)
+        for i, members in enumerate(comps):
+            comp[members] = i
+
+        # longest path layering
+        mask = comp[source] != comp[target]
+        source, target = source[mask], target[mask]
+        csource, ctarget = comp[source], comp[target]
+        rank = np.zeros(len(comps), dtype=np.int64)
+        for _ in range(len(comps)):
+            new = rank.copy()
+            np.maximum.at(new, ctarget, rank[csource] + 1)
+            if np.array_equal(new, rank):
+                break
+            rank = new
+        rank = rank[comp]
+
+        # split long edges with dummy nodes
+        span = rank[target] - rank[source]
+        count = span - 1
+        total = size + int(count.sum())
+        layer = np.concatenate([
+            rank,
+            np.repeat(rank[source] + 1, count)
+            + np.arange(total - size)
+            - np.repeat(np.cumsum(count) - count, count)
+        ])
+        chain_ = np.empty(int((span + 1).sum()), dtype=np.int64)
+        start = np.cumsum(span + 1) - (span + 1)
+        chain_[start] = source
+        chain_[start + span] = target
+        inner = np.ones(len(chain_), dtype=bool)
+        inner[start] = False
+        inner[start + span] = False
+        chain_[inner] = np.arange(size, total)
+        last = np.zeros(len(chain_), dtype=bool)
+        last[start + span] = True
+        top = chain_[:-1][~last[:-1]]
+        bottom = chain_[1:][~last[:-1]]
+
+        # initial position within layer follows row order
+        order = np.lexsort((np.arange(total), layer))
+        position = np.empty(total, dtype=float)
+        position[order] = RepoETL._get_group_ranks(layer[order])
+
+        # group nodes and segments by layer for each sweep direction
+        layers = int(layer.max()) + 1
+        sweeps = []
+        for node, other in [(bottom, top), (top, bottom)]:
+            items = []
+            for i in range(layers):
+                nodes = np.flatnonzero(layer == i)
+                mask = layer[node] == i
+                local = np.searchsorted(nodes, node[mask])
+                items.append((nodes, local, other[mask]))
+            sweeps.append(items)
+        down = sweeps[0][1:]
+        up = sweeps[1][:-1][::-1]
+
+        best = position.copy()
+        best_crossings = RepoETL._count_layer_crossings(
+            layer[top], position[top], position[bottom]
+        )
+        for _ in range(iterations):
+            for items in [down, up]:
+                for nodes, local, other in items:
+                    # barycenter of each node's neighbors in adjacent layer
+                    size_ = len(nodes)
+                    weight = np.bincount(
+                        local, weights=position[other], minlength=size_
+                    )
+                    degree = np.bincount(local, minlength=size_)
+                    bary = position[nodes]
+                    mask = degree > 0
+                    bary[mask] = weight[mask] / degree[mask]
+                    index = np.lexsort((position[nodes], bary))
+                    position[nodes[index]] = np.arange(size_)
+
+                crossings = RepoETL._count_layer_crossings(
+                    layer[top], position[top], position[bottom]
+                )
+                if crossings < best_crossings:
+                    best = position.copy()
+                    best_crossings = crossings
+
+        # drop dummy nodes and compact layers
+        layer = layer[:size]
+        order = np.lexsort((best[:size], layer))
+        x = np.empty(size, dtype=float)
+        x[order] = RepoETL._get_group_ranks(layer[order])
+
+        data['x'] = x
+        data['y'] = (layer.max() - layer).astype(float)
+        return data
+
+    @staticmethod
+    def _count_layer_crossings(band, top, bottom):
+        # type: (np.ndarray, np.ndarray, np.ndarray) -> int
+        '''
+        Counts edge crossings between adjacent layers. Edge segments which
+        share an endpoint are not considered to cross.
+
+        Args:
+            band (numpy.ndarray): Band index of each segment.
+            top (numpy.ndarray): Position of each segment at top of its band.
+            bottom (numpy.ndarray): Position of each segment at bottom of its
+                band.
+
+        Returns:
+            int: Number of crossings.
+        '''
+        if len(band) < 2:
+            return 0
+        order = np.lexsort((bottom, top, band))
+        _, ranks = np.unique(bottom, return_inverse=True)
+        values = band[order] * (ranks.max() + 1) + ranks[order]
+        return rpt.count_inversions(values)
+
+    @staticmethod
+    def _count_crossings(data):
+        # type: (DataFrame) -> int
+        '''
+        Counts edge crossings of given DataFrame's layout. Edges are drawn as
+        straight lines, and divided into segments between each pair of
+        adjacent y coordinates.
+
+        Args:
+            data (DataFrame): DataFrame of nodes with x and y columns.
+
+        Returns:
+            int: Number of crossings.
+        '''
+        source, target = RepoETL._get_edges(data)
+        x = data.x.to_numpy(dtype=float)
+        y = data.y.to_numpy(dtype=float)
+
+        # orient edges from low to high y
+        flip = y[source] > y[target]
+        lo = np.where(flip, target, source)
+        hi = np.where(flip, source, target)
+        mask = y[lo] != y[hi]
+        lo, hi = lo[mask], hi[mask]
+
+        levels = np.unique(y)
+        start = np.searchsorted(levels, y[lo])
+        stop = np.searchsorted(levels, y[hi])
+        count = stop - start
+        edge = np.repeat(np.arange(len(lo)), count)
+        band = np.repeat(start, count) + np.arange(len(edge)) \
+            - np.repeat(np.cumsum(count) - count, count)
+
+        # interpolate x coordinate of each edge at band boundaries
+        def interpolate(level):
+            y0, y1 = y[lo][edge], y[hi][edge]
+            x0, x1 = x[lo][edge], x[hi][edge]
+            output = x0 + (x1 - x0) * (level - y0) / (y1 - y0)
+            output = np.where(level == y0, x0, output)
+            return np.where(level == y1, x1, output)
+
+        top = interpolate(levels[band])
+        bottom = interpolate(levels[np.minimum(band + 1, len(levels) - 1)])
+        return RepoETL._count_layer_crossings(band, top, bottom)
+
     @staticmethod
     def _center_coordinate(data, center_axis='x', pin_axis='y'):
         # (DataFrame, str, str) -> DataFrame
@@ -358,20 +1110,623 @@ def _to_networkx_graph(data, escape_chars=False):
                 .apply(lambda x: [re.sub(r'\.', '\\.', y) for y in x])
 
         graph = networkx.DiGraph()
-        data.apply(
-            lambda x: graph.add_node(
-                x.node_name,
-                **{k: getattr(x, k) for k in x.index}
-            ),
-            axis=1
-        )
+        records = data.to_dict('records')
+        graph.add_nodes_from((x['node_name'], x) for x in records)
+
+        if 'weights' in data.columns:
+            edges = data[['node_name', 'dependencies', 'weights']]\
+                .explode(['dependencies', 'weights'])
+            edges = edges[edges.dependencies.notna()]
+            graph.add_edges_from(
+                (s, t, dict(weight=int(w))) for s, t, w
+                in zip(edges.dependencies, edges.node_name, edges.weights)
+            )
+            return graph
 
-        data.apply(
-            lambda x: [graph.add_edge(p, x.node_name) for p in x.dependencies],
-            axis=1
-        )
+        edges = data[['node_name', 'dependencies']].explode('dependencies')
+        edges = edges[edges.dependencies.notna()]
+        graph.add_edges_from(zip(edges.dependencies, edges.node_name))
         return graph
 
+    @staticmethod
+    def _escape_graph(graph):
+        # (networkx.DiGraph) -> networkx.DiGraph
+        '''
+        Copies given graph, with periods escaped in node names and node_name
+        and dependencies attributes. Used to avoid dot file errors.
+
+        Args:
+            graph (networkx.DiGraph): Graph of nodes.
+
+        Returns:
+            networkx.DiGraph: Escaped graph of nodes.
+        '''
+        def escape(item):
+            return re.sub(r'\.', '\\.', item)
+
+        lut = {x: escape(x) for x in graph.nodes}
+        output = networkx.relabel_nodes(graph, lut, copy=True)
+        for node, attrs in output.nodes(data=True):
+            if 'node_name' in attrs:
+                attrs['node_name'] = node
+            if 'dependencies' in attrs:
+                attrs['dependencies'] = [escape(x) for x in attrs['dependencies']]
+        return output
+
+    def _get_networkx_graph(self, escape_chars=False):
+        # (bool) -> networkx.DiGraph
+        '''
+        Gets graph of internal data. Graphs are built once and cached.
+
+        Args:
+            escape_chars (bool, optional): Escape special characters.
+                Default: False.
+
+        Returns:
+            networkx.DiGraph: Cached graph of nodes. Do not mutate.
+        '''
+        if escape_chars not in self._graphs:
+            if escape_chars:
+                graph = self._escape_graph(self._get_networkx_graph())
+            else:
+                graph = self._to_networkx_graph(self._get_node_data())
+            self._graphs[escape_chars] = graph
+        return self._graphs[escape_chars]
+
+    def _get_index(self):
+        # type: () -> Tuple[List[str], Dict[str, int], List[int], List[int]]
+        '''
+        Gets reachability index of internal data. Index is built once and
+        cached.
+
+        Returns:
+            tuple: Node names, lookup table of node name to bit index, and
+                forward (dependents) and reverse (dependencies) bitsets.
+        '''
+        if self._index is None:
+            names = self._data.node_name.tolist()
+            lut = {k: i for i, k in enumerate(names)}
+            forward, backward = self._get_reachability_bitsets(self._data)
+            self._index = (names, lut, forward, backward)
+        return self._index
+
+    def _get_node_sizes(self):
+        # type: () -> Dict[str, Tuple[int, int]]
+        '''
+        Gets the number of modules of each node and their total source size
+        in bytes. Module nodes count themselves, and other nodes of an
+        uncollapsed instance count nothing. Nodes of views sum the sizes of
+        the nodes they group. Sizes are computed once and cached.
+
+        Returns:
+            dict: Node name to module count and byte count.
+        '''
+        if self._sizes is None:
+            data = self._data
+            self._sizes = {
+                name: (1, self._stats.get(path, (0, 0))[1])
+                if type_ == 'module' else (0, 0)
+                for name, type_, path
+                in zip(data.node_name, data.node_type, data.fullpath)
+            }
+        return self._sizes
+
+    def _get_closures(self):
+        # type: () -> Dict[str, Tuple[int, int]]
+        '''
+        Gets the transitive import closure of each node, as the number of
+        modules it imports, directly or indirectly, and their total source
+        size in bytes. Closures include the node itself, and are read from
+        the reachability index of internal data, so views use their own
+        graph. Totals are summed once per strongly connected component,
+        by counting the bits each closure shares with each bit plane of node
+        sizes, without unpacking closures. Closures are computed once and
+        cached.
+
+        Returns:
+            dict: Node name to closure module count and byte count.
+        '''
+        if self._closures is None:
+            names, _, _, backward = self._get_index()
+            sizes = self._get_node_sizes()
+            size = len(names)
+            totals = np.array(
+                [sizes[x] for x in names], dtype=np.int64
+            ).reshape(-1, 2)
+
+            # bitset of nodes with bit b of their count or bytes set
+            planes = []
+            for column in totals.T:
+                planes.append([
+                    rpt.indices_to_bitset(np.flatnonzero((column >> b) & 1), size)
+                    for b in range(int(column.max(initial=0)).bit_length())
+                ])
+            modules, bytes_ = planes
+
+            # members of a strongly connected component share a closure
+            lut = {}  # type: Dict[int, Tuple[int, int]]
+            closures = {}
+            for name, bits in zip(names, backward):
+                if bits not in lut:
+                    lut[bits] = (
+                        sum((bits & x).bit_count() << b for b, x in enumerate(modules)),
+                        sum((bits & x).bit_count() << b for b, x in enumerate(bytes_)),
+                    )
+                closures[name] = lut[bits]
+            self._closures = closures
+        return self._closures
+
+    def _get_reachable(self, modules, reverse=False):
+        # type: (Union[str, Iterable[str]], bool) -> List[str]
+        '''
+        Gets nodes reachable from given nodes, from a reachability index which
+        is built once and cached.
+
+        Args:
+            modules (str or list[str]): Node names.
+            reverse (bool, optional): Follow edges in reverse. Default: False.
+
+        Raises:
+            ValueError: If a given node is not found.
+
+        Returns:
+            list[str]: Sorted node names, excluding given nodes.
+        '''
+        names, lut, forward, backward = self._get_index()
+
+        if isinstance(modules, str):
+            modules = [modules]
+        modules = list(modules)
+        missing = [x for x in modules if x not in lut]
+        if len(missing) > 0:
+            msg = f'Nodes not found: {missing}.'
+            raise ValueError(msg)
+
+        bitsets = backward if reverse else forward
+        bits = 0
+        for module in modules:
+            i = lut[module]
+            bits |= bitsets[i] & ~(1 << i)
+        output = rpt.bitset_to_indices(bits, len(names))
+        return sorted(names[i] for i in output.tolist())
+
+    def ancestors(self, modules):
+        # type: (Union[str, Iterable[str]]) -> List[str]
+        '''
+        Gets all nodes which given nodes transitively depend upon.
+
+        Args:
+            modules (str or list[str]): Node names.
+
+        Raises:
+            ValueError: If a given node is not found.
+
+        Returns:
+            list[str]: Sorted node names.
+        '''
+        return self._get_reachable(modules, reverse=True)
+
+    def descendants(self, modules):
+        # type: (Union[str, Iterable[str]]) -> List[str]
+        '''
+        Gets all nodes which transitively depend upon given nodes.
+
+        Args:
+            modules (str or list[str]): Node names.
+
+        Raises:
+            ValueError: If a given node is not found.
+
+        Returns:
+            list[str]: Sorted node names.
+        '''
+        return self._get_reachable(modules)
+
+    def impacted_by(self, paths):
+        # type: (Iterable[Union[str, Path]]) -> List[str]
+        '''
+        Gets modules impacted by changes to given files. Useful for selecting
+        tests to run. Files which are not modules of the repository are
+        ignored.
+
+        Args:
+            paths (list[str or Path]): Changed files. Relative paths are
+                resolved against the current working directory.
+
+        Returns:
+            list[str]: Sorted names of changed modules and all nodes which
+                transitively depend upon them.
+        '''
+        paths = {Path(os.path.abspath(x)).as_posix() for x in paths}
+        mask = self._data.fullpath.isin(paths)
+        modules = self._data.loc[mask, 'node_name'].tolist()
+        if len(modules) == 0:
+            return []
+        return sorted(set(modules).union(self.descendants(modules)))
+
+    def _get_aggregates(self):
+        # type: () -> Dict[str, Any]
+        '''
+        Gets node fields, node types and edges of internal data, which are
+        used to build views. Aggregates are computed once per instance, from
+        its own data, and cache the views built from it.
+
+        Returns:
+            dict: Aggregates.
+        '''
+        if self._aggregates is None:
+            data = self._data
+            source, target = self._get_edges(data)
+
+            # views of views carry the weights of edges merged before
+            weights = np.ones(len(source), dtype=np.int64)
+            if 'weights' in data.columns:
+                weights = np.array(list(chain(*data.weights)), dtype=np.int64)
+
+            self._aggregates = dict(
+                names=data.node_name.tolist(),
+                fields=[x.split('.') for x in data.node_name.tolist()],
+                types=dict(zip(data.node_name, data.node_type)),
+                fullpaths=dict(zip(data.node_name, data.fullpath)),
+                source=source,
+                target=target,
+                weights=weights,
+                views={},
+            )
+        return self._aggregates
+
+    @staticmethod
+    def _get_group_name(fields, depth, expanded):
+        # type: (List[str], int, Tuple[Tuple[str, ...], ...]) -> str
+        '''
+        Gets name of group which a node is collapsed into. Nodes within an
+        expanded subpackage are collapsed one level beneath it.
+
+        Args:
+            fields (list[str]): Fields of node name.
+            depth (int): Collapse depth.
+            expanded (tuple[tuple[str]]): Fields of expanded subpackages.
+
+        Returns:
+            str: Group name.
+        '''
+        level = depth
+        for prefix in expanded:
+            size = len(prefix)
+            if size >= level and tuple(fields[:size]) == prefix:
+                level = size + 1
+        return '.'.join(fields[:level])
+
+    def _get_view(self, depth, expanded):
+        # type: (int, Tuple[Tuple[str, ...], ...]) -> RepoETL
+        '''
+        Gets a RepoETL view collapsed to given depth, with given subpackages
+        expanded. Collapsed views are always built from the data of the
+        uncollapsed instance they stem from, so that they can be collapsed
+        and expanded further. Views are cached.
+
+        Args:
+            depth (int): Collapse depth.
+            expanded (tuple[tuple[str]]): Fields of expanded subpackages.
+
+        Returns:
+            RepoETL: Collapsed view.
+        '''
+        base = self._base or self
+        agg = base._get_aggregates()
+        key = (depth, expanded)
+        if key not in agg['views']:
+            names = [
+                self._get_group_name(x, depth, expanded) for x in agg['fields']
+            ]
+            view = base._build_view(names)
+            view._view = key
+            view._base = base
+            agg['views'][key] = view
+        return agg['views'][key]
+
+    def _build_view(self, names, types=None):
+        # type: (List[str], Optional[Dict[str, str]]) -> RepoETL
+        '''
+        Builds a RepoETL view of internal data, in which nodes are grouped
+        under given names. Edges between groups are merged and weighted by
+        the number of edges merged, or the sum of their weights if internal
+        data is itself a view.
+
+        Args:
+            names (list[str]): Group name of each node.
+            types (dict, optional): Node types of groups. Groups not listed
+                take the type of the node of the same name, or that of their
+                most important member. Default: None.
+
+        Returns:
+            RepoETL: View.
+        '''
+        agg = self._get_aggregates()
+        groups = sorted(set(names))
+
+        # group type is type of node of same name, or most important member
+        priority = ['module', 'subpackage', 'library']
+        types_ = {}  # type: Dict[str, str]
+        for name, fields in zip(names, agg['fields']):
+            type_ = agg['types']['.'.join(fields)]
+            if name not in types_ \
+                    or priority.index(type_) < priority.index(types_[name]):
+                types_[name] = type_
+        types_.update({k: v for k, v in agg['types'].items() if k in types_})
+        types_.update(types or {})
+
+        # count edges between groups
+        index = {k: i for i, k in enumerate(groups)}
+        lut = np.array([index[x] for x in names], dtype=np.int64)
+        edges = DataFrame(dict(
+            source=lut[agg['source']],
+            target=lut[agg['target']],
+            weight=agg['weights'],
+        ))
+        edges = edges[edges.source != edges.target]
+        edges = edges.groupby(['target', 'source']).weight.sum().reset_index()
+        deps = {}  # type: Dict[int, Any]
+        for target, items in edges.groupby('target'):
+            deps[target] = (
+                [groups[x] for x in items.source], items.weight.tolist()
+            )
+
+        data = DataFrame(dict(
+            node_name=groups,
+            node_type=[types_[x] for x in groups],
+            dependencies=[deps.get(i, ([], []))[0] for i in range(len(groups))],
+            weights=[deps.get(i, ([], []))[1] for i in range(len(groups))],
+            fullpath=[agg['fullpaths'].get(x, np.nan) for x in groups],
+        ))
+        data['subpackages'] = data.node_name\
+            .apply(lambda x: rpt.get_parent_fields(x, '.'))
+        mask = data.node_type.isin(['library', 'cycle'])
+        data.loc[mask, 'subpackages'] = data.loc[mask, 'subpackages']\
+            .apply(lambda x: [])
+        data['distribution'] = self._get_distributions(data)
+        if self._layout is False:
+            data = self._sort_data(data)
+
+        # group sizes sum those of their members
+        sizes = self._get_node_sizes()
+        totals = {}  # type: Dict[str, Tuple[int, int]]
+        for group, name in zip(names, agg['names']):
+            count, bytes_ = totals.get(group, (0, 0))
+            totals[group] = (count + sizes[name][0], bytes_ + sizes[name][1])
+
+        view = copy(self)
+        view._data = data
+        view._previous = None
+        view._graphs = {}
+        view._index = None
+        view._aggregates = None
+        view._sizes = totals
+        view._closures = None
+        view._view = None
+        view._derived = 'view'
+        view._base = None
+        return view
+
+    @property
+    def cycles(self):
+        # type: () -> DataFrame
+        '''
+        DataFrame: Import cycles, found as strongly connected components of
+        more than one node, or nodes which import themselves. Has cycle,
+        node_count and nodes columns, and is sorted by descending node count.
+        Cycles of a view are found among its own nodes.
+        '''
+        agg = self._get_aggregates()
+        if 'cycles' not in agg:
+            size = len(agg['fields'])
+            children = [[] for _ in range(size)]  # type: List[List[int]]
+            for s, t in zip(agg['source'].tolist(), agg['target'].tolist()):
+                children[s].append(t)
+            loops = set(agg['source'][agg['source'] == agg['target']].tolist())
+            names = agg['names']
+
+            items = []
+            for comp in rpt.get_strongly_connected_components(children):
+                if len(comp) > 1 or comp[0] in loops:
+                    items.append(sorted(names[x] for x in comp))
+            items = sorted(items, key=lambda x: (-len(x), x))
+            agg['cycles'] = DataFrame(
+                dict(
+                    cycle=list(range(len(items))),
+                    node_count=[len(x) for x in items],
+                    nodes=items,
+                ),
+                columns=['cycle', 'node_count', 'nodes'],
+            )
+        return agg['cycles'].copy()
+    # --------------------------------------------------------------------------
+
+    def condense(self):
+        # type: () -> RepoETL
+        '''
+        Condenses each import cycle into a single node of type cycle, named
+        cycle_<cycle id>, so that the graph becomes a directed acyclic graph.
+        Cycle members are listed in the cycles DataFrame. Edges are merged
+        and weighted by the number of edges merged. Views are condensed from
+        their own nodes, and condensed views are collapsed from theirs.
+
+        Returns:
+            RepoETL: Condensed view.
+        '''
+        agg = self._get_aggregates()
+        key = 'condensed'
+        if key not in agg['views']:
+            lut = {}
+            for i, nodes in zip(self.cycles.cycle, self.cycles.nodes):
+                lut.update({x: f'cycle_{i}' for x in nodes})
+            names = [lut.get(x, x) for x in agg['names']]
+            types = {x: 'cycle' for x in lut.values()}
+            agg['views'][key] = self._build_view(names, types)
+        return agg['views'][key]
+
+    def collapse(self, depth):
+        # type: (int) -> RepoETL
+        '''
+        Collapses nodes into their subpackage (or library) at given depth.
+        Edges between collapsed nodes are merged, and weighted by the number
+        of edges merged. Collapsed views are built from aggregates computed
+        once, so switching between depths does not rescan the repository.
+
+        Args:
+            depth (int): Number of name fields kept. For example, a depth of
+                1 collapses module a.b.c into a.
+
+        Raises:
+            ValueError: If depth is less than 1.
+
+        Returns:
+            RepoETL: Collapsed view with a weights column of edge counts,
+                parallel to dependencies.
+        '''
+        if not isinstance(depth, int) or depth < 1:
+            msg = f'Depth must be an integer greater than 0. Given value: {depth}.'
+            raise ValueError(msg)
+        return self._get_view(depth, ())
+
+    def expand(self, subpackage):
+        # type: (str) -> RepoETL
+        '''
+        Expands a subpackage of a collapsed view by one level, leaving all
+        other nodes collapsed. If called on an uncollapsed instance, the view
+        is first collapsed to the depth of the subpackage.
+
+        Args:
+            subpackage (str): Subpackage name.
+
+        Raises:
+            ValueError: If subpackage is not found.
+
+        Returns:
+            RepoETL: Collapsed view.
+        '''
+        agg = (self._base or self)._get_aggregates()
+        if agg['types'].get(subpackage) != 'subpackage':
+            msg = f'Subpackage not found: {subpackage}.'
+            raise ValueError(msg)
+
+        fields = tuple(subpackage.split('.'))
+        depth, expanded = self._view or (len(fields), ())
+        expanded = tuple(sorted(set(expanded).union([fields])))
+        return self._get_view(depth, expanded)
+
+    @staticmethod
+    def _parse_import_times(text):
+        # type: (str) -> DataFrame
+        '''
+        Parses output of python -X importtime.
+
+        Args:
+            text (str): Standard error of python -X importtime.
+
+        Returns:
+            DataFrame: Table with node_name, import_time_us and
+                cumulative_import_time_us columns.
+        '''
+        regex = r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)\s*$'
+        rows = []
+        for line in text.splitlines():
+            found = re.search(regex, line)
+            if found is not None:
+                self_, cumulative, name = found.groups()
+                rows.append((name, int(self_), int(cumulative)))
+        cols = ['node_name', 'import_time_us', 'cumulative_import_time_us']
+        data = DataFrame(rows, columns=cols)
+
+        # modules are only imported once, but keep costliest just in case
+        data = data.sort_values('cumulative_import_time_us', ascending=False)
+        data = data.drop_duplicates('node_name').reset_index(drop=True)
+        return data
+
+    def profile_imports(self, module, python=None):
+        # type: (str, Optional[str]) -> RepoETL
+        '''
+        Measures runtime import cost of nodes by importing given entry module
+        in a subprocess with python -X importtime. Self and cumulative times
+        in microseconds are joined onto internal data as import_time_us and
+        cumulative_import_time_us columns. Nodes not imported by module are
+        given zero cost. Columns are discarded by update, as they go stale.
+
+        Args:
+            module (str): Entry module to be imported, relative to repo root.
+            python (str, optional): Python executable. Default: sys.executable.
+
+        Raises:
+            ValueError: If module is not a dotted module name.
+            ValueError: If module import fails.
+
+        Returns:
+            RepoETL: Self.
+        '''
+        # module is interpolated into code run by the subprocess
+        if not all(x.isidentifier() for x in module.split('.')):
+            msg = f"Invalid module name: '{module}'."
+            raise ValueError(msg)
+
+        if python is None:
+            python = sys.executable
+
+        root = Path(self._root).absolute().as_posix()
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [x for x in [env.get('PYTHONPATH')] if x]
+        )
+        result = subprocess.run(
+            [python, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().split('\n')[-1]
+            msg = f'Unable to import module: {module}. {error}'
+            raise ValueError(msg)
+
+        times = self._parse_import_times(result.stderr)
+        cols = ['import_time_us', 'cumulative_import_time_us']
+        data = self._data.drop(columns=cols, errors='ignore')
+        attrs = dict(data.attrs)
+        data = data.merge(times, on='node_name', how='left')
+        data[cols] = data[cols].fillna(0).astype(int)
+        data.attrs = attrs
+        self._data = data
+        self._graphs = {}
+        return self
+
+    @staticmethod
+    def _get_scales(data, size_by):
+        # type: (DataFrame, str) -> np.ndarray
+        '''
+        Gets node scale factors between 1 and 2, proportional to the square
+        root of given column, so that node area tracks its value.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+            size_by (str): Numeric column, such as import_time_us.
+
+        Raises:
+            ValueError: If size_by column is not found.
+
+        Returns:
+            numpy.ndarray: Scale factor of each node.
+        '''
+        if size_by not in data.columns:
+            msg = f'Column not found: {size_by}. '
+            msg += 'Call profile_imports before sizing nodes by import time.'
+            raise ValueError(msg)
+        values = data[size_by].fillna(0).to_numpy(dtype=float).clip(0)
+        values = np.sqrt(values)
+        max_ = values.max() if len(values) > 0 else 0
+        if max_ == 0:
+            return np.ones(len(values))
+        return 1 + values / max_
+
     def to_networkx_graph(self):
         # () -> networkx.DiGraph
         '''
@@ -380,10 +1735,16 @@ def to_networkx_graph(self):
         Returns:
             networkx.DiGraph: Graph of nodes.
         '''
-        return RepoETL._to_networkx_graph(self._data)
+        return self._get_networkx_graph().copy()
 
-    def to_dot_graph(self, orient='tb', orthogonal_edges=False, color_scheme=None):
-        # (str, bool, Optional[Dict[str, str]]) -> pydot.Dot
+    def to_dot_graph(
+        self,
+        orient='tb',
+        orthogonal_edges=False,
+        color_scheme=None,
+        size_by=None,
+    ):
+        # (str, bool, Optional[Dict[str, str]], Optional[str]) -> pydot.Dot
         '''
         Converts internal data into pydot graph.
 
@@ -399,13 +1760,18 @@ def to_dot_graph(self, orient='tb', orthogonal_edges=False, color_scheme=None):
                 non-right angles. Default: False.
             color_scheme: (dict, optional): Color scheme to be applied to graph.
                 Default: rolling_pin.tools.COLOR_SCHEME
+            size_by (str, optional): Numeric column by which node font sizes
+                are scaled, such as import_time_us. Default: None.
 
         Raises:
+            ValueError: If layout is False.
             ValueError: If orient is invalid.
+            ValueError: If size_by column is not found.
 
         Returns:
             pydot.Dot: Dot graph of nodes.
         '''
+        self._check_layout()
         orient = orient.lower()
         orientations = ['tb', 'bt', 'lr', 'rl']
         if orient not in orientations:
@@ -416,8 +1782,16 @@ def to_dot_graph(self, orient='tb', orthogonal_edges=False, color_scheme=None):
         if color_scheme is None:
             color_scheme = rpt.COLOR_SCHEME
 
+        # font size of each node, 14 is the graphviz default
+        data = self._get_layout_data()
+        sizes = {}  # type: Dict[str, float]
+        if size_by is not None:
+            scales = self._get_scales(data, size_by)
+            names = data.node_name.str.replace('.', '\\.', regex=False)
+            sizes = dict(zip(names, (14 * scales).round(1)))
+
         # create dot graph
-        graph = self._to_networkx_graph(self._data, escape_chars=True)
+        graph = self._get_networkx_graph(escape_chars=True)
         dot = networkx.drawing.nx_pydot.to_pydot(graph)
 
         # set layout orientation
@@ -451,12 +1825,13 @@ def to_dot_graph(self, orient='tb', orthogonal_edges=False, color_scheme=None):
             node.set_pos(f"{nx_node['x']},{nx_node['y']}!")
 
             # vary node font color by noe type
-            if nx_node['node_type'] == 'library':
-                node.set_fontcolor(color_scheme['node_library_font'])
-            elif nx_node['node_type'] == 'subpackage':
-                node.set_fontcolor(color_scheme['node_subpackage_font'])
-            else:
-                node.set_fontcolor(color_scheme['node_module_font'])
+            font, _ = self._get_colors(nx_node['node_type'], color_scheme)
+            node.set_fontcolor(font)
+
+            # scale node by cost
+            name = re.sub('"', '', node.get_name())
+            if name in sizes:
+                node.set_fontsize(sizes[name])
 
         # set draw parameters for each edge in graph
         for edge in dot.get_edges():
@@ -472,45 +1847,209 @@ def to_dot_graph(self, orient='tb', orthogonal_edges=False, color_scheme=None):
                 continue  # pragma: no cover
 
             # vary edge color by its source node type
-            if nx_node['node_type'] == 'library':
-                edge.set_color(color_scheme['edge_library'])
-            elif nx_node['node_type'] == 'subpackage':
-                edge.set_color(color_scheme['edge_subpackage'])
-            else:
-                # this line is actually covered by pytest doesn't think so
-                edge.set_color(color_scheme['edge_module'])  # pragma: no cover
+            _, color = self._get_colors(nx_node['node_type'], color_scheme)
+            edge.set_color(color)
+
+            # label weighted edges of collapsed graphs with their edge count
+            weight = edge.get_attributes().get('weight')
+            if weight is not None:
+                edge.set_label(str(weight))
+                edge.set_fontcolor(edge.get_color())
+                edge.set_fontname('Courier')
 
         return dot
 
+    @staticmethod
+    def _get_colors(node_type, color_scheme):
+        # type: (str, Dict[str, str]) -> Tuple[str, str]
+        '''
+        Gets font color of nodes and color of outgoing edges for given node
+        type. Cycle colors fall back to module colors.
+
+        Args:
+            node_type (str): Node type.
+            color_scheme (dict): Color scheme.
+
+        Returns:
+            tuple[str]: Font color and edge color.
+        '''
+        if node_type == 'library':
+            return color_scheme['node_library_font'], color_scheme['edge_library']
+        if node_type == 'subpackage':
+            return (
+                color_scheme['node_subpackage_font'],
+                color_scheme['edge_subpackage'],
+            )
+        font = color_scheme['node_module_font']
+        edge = color_scheme['edge_module']
+        if node_type == 'cycle':
+            font = color_scheme.get('node_cycle_font', font)
+            edge = color_scheme.get('edge_cycle', edge)
+        return font, edge
+
+    @staticmethod
+    def _iter_svg(data, orient='tb', color_scheme=None, size_by=None):
+        # type: (DataFrame, str, Optional[Dict[str, str]], Optional[str]) -> Iterator[str]
+        '''
+        Renders given DataFrame of nodes as SVG directly from their x and y
+        coordinates, without Graphviz. Nodes are drawn as labeled boxes and
+        edges as straight arrows, colored by node type.
+
+        Args:
+            data (DataFrame): DataFrame of nodes with x and y columns.
+            orient (str, optional): Graph layout orientation. Default: tb.
+                Options include: tb, bt, lr, rl.
+            color_scheme: (dict, optional): Color scheme to be applied to graph.
+                Default: rolling_pin.tools.COLOR_SCHEME
+            size_by (str, optional): Numeric column by which nodes are scaled,
+                such as import_time_us. Default: None.
+
+        Raises:
+            ValueError: If orient is invalid.
+            ValueError: If size_by column is not found.
+
+        Yields:
+            str: Chunk of SVG text.
+        '''
+        orient = orient.lower()
+        orientations = ['tb', 'bt', 'lr', 'rl']
+        if orient not in orientations:
+            msg = f'Invalid orient value. {orient} not in {orientations}.'
+            raise ValueError(msg)
+
+        if color_scheme is None:
+            color_scheme = rpt.COLOR_SCHEME
+
+        # node geometry in pixels, Courier glyphs are 0.6em wide
+        char, height, margin = 7.2, 24.0, 20.0
+        names = data.node_name.tolist()
+        scales = np.ones(len(data))
+        if size_by is not None:
+            scales = RepoETL._get_scales(data, size_by)
+        width = np.array([len(x) * char for x in names], dtype=float)
+        width = width * scales + 16
+        heights = height * scales
+        x = data.x.to_numpy(dtype=float)
+        y = data.y.to_numpy(dtype=float)
+        level = y.max() - y if orient in ['tb', 'lr'] else y - y.min()
+        span = width.max() if len(width) > 0 else 0
+        if orient in ['tb', 'bt']:
+            px = x * (span + 16) + span / 2 + margin
+            py = level * (height * 3) + height / 2 + margin
+        else:
+            px = level * (span + 48) + span / 2 + margin
+            py = x * (height + 16) + height / 2 + margin
+        total_w = (px + width / 2).max() + margin if len(px) > 0 else margin
+        total_h = (py + heights / 2).max() + margin if len(py) > 0 else margin
+
+        # edge endpoints are clipped to node boxes
+        source, target = RepoETL._get_edges(data)
+        weights = None
+        if 'weights' in data.columns:
+            weights = list(chain(*data.weights.tolist()))
+        dx = px[target] - px[source]
+        dy = py[target] - py[source]
+
+        def clip(index, sign):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sx = np.where(dx != 0, width[index] / 2 / np.abs(dx), np.inf)
+                sy = np.where(dy != 0, heights[index] / 2 / np.abs(dy), np.inf)
+            scale = np.minimum(sx, sy)
+            scale = np.where(np.isinf(scale), 0, scale)
+            return px[index] + sign * dx * scale, py[index] + sign * dy * scale
+
+        x0, y0 = clip(source, 1)
+        x1, y1 = clip(target, -1)
+
+        types = data.node_type.tolist()
+        colors = [RepoETL._get_colors(x, color_scheme) for x in types]
+        edge_colors = sorted(set(x[1] for x in colors))
+        markers = {k: f'arrow{i}' for i, k in enumerate(edge_colors)}
+
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<svg xmlns="http://www.w3.org/2000/svg" '
+        yield f'width="{total_w:.1f}" height="{total_h:.1f}" '
+        yield f'viewBox="0 0 {total_w:.1f} {total_h:.1f}">\n'
+        yield '<defs>\n'
+        for color, id_ in markers.items():
+            yield f'<marker id="{id_}" viewBox="0 0 10 10" refX="10" refY="5" '
+            yield 'markerWidth="8" markerHeight="8" orient="auto">'
+            yield f'<path d="M0,0 L10,5 L0,10 z" fill="{color}"/></marker>\n'
+        yield '</defs>\n'
+        yield f'<rect width="100%" height="100%" fill="{color_scheme["background"]}"/>\n'
+
+        # edges
+        yield '<g font-family="Courier" font-size="10" text-anchor="middle">\n'
+        for i in range(len(source)):
+            color = colors[source[i]][1]
+            yield f'<line x1="{x0[i]:.1f}" y1="{y0[i]:.1f}" '
+            yield f'x2="{x1[i]:.1f}" y2="{y1[i]:.1f}" stroke="{color}" '
+            yield f'marker-end="url(#{markers[color]})"/>\n'
+            if weights is not None:
+                mx = (x0[i] + x1[i]) / 2
+                my = (y0[i] + y1[i]) / 2
+                yield f'<text x="{mx:.1f}" y="{my:.1f}" fill="{color}">'
+                yield f'{weights[i]}</text>\n'
+        yield '</g>\n'
+
+        # nodes
+        yield '<g font-family="Courier" font-size="12" text-anchor="middle" '
+        yield 'dominant-baseline="central">\n'
+        fill = color_scheme['node']
+        for i, name in enumerate(names):
+            name = html.escape(name)
+            left = px[i] - width[i] / 2
+            top = py[i] - heights[i] / 2
+            yield f'<g><title>{name}</title>'
+            yield f'<rect x="{left:.1f}" y="{top:.1f}" width="{width[i]:.1f}" '
+            yield f'height="{heights[i]:.1f}" fill="{fill}" stroke="{fill}"/>'
+            yield f'<text x="{px[i]:.1f}" y="{py[i]:.1f}" '
+            if scales[i] != 1:
+                yield f'font-size="{12 * scales[i]:.1f}" '
+            yield f'fill="{colors[i][0]}">{name}</text></g>\n'
+        yield '</g>\n'
+        yield '</svg>\n'
+
     def to_dataframe(self):
         # type: () -> DataFrame
         '''
+        Does not compute layout. Node coordinates are only included if layout
+        has already been computed.
+
         Retruns:
             DataFrame: DataFrame of nodes representing repo modules.
         '''
-        return self._data.copy()
+        return self._get_node_data()
 
     def to_html(
         self,
         layout='dot',
         orthogonal_edges=False,
         color_scheme=None,
-        as_png=False
+        as_png=False,
+        size_by=None,
     ):
-        # type: (str, bool, Optional[Dict[str, str]], bool) -> Union[HTML, Image]
+        # type: (str, bool, Optional[Dict[str, str]], bool, Optional[str]) -> Union[HTML, Image]
         '''
         For use in inline rendering of graph data in Jupyter Lab.
 
         Args:
             layout (str, optional): Graph layout style.
-                Options include: circo, dot, fdp, neato, sfdp, twopi.
-                Default: dot.
+                Options include: circo, dot, fdp, neato, sfdp, twopi, native.
+                Native renders SVG from internal coordinates without
+                Graphviz. Default: dot.
             orthogonal_edges (bool, optional): Whether graph edges should have
                 non-right angles. Default: False.
             color_scheme: (dict, optional): Color scheme to be applied to graph.
                 Default: rolling_pin.tools.COLOR_SCHEME
             as_png (bool, optional): Display graph as a PNG image instead of
                 SVG. Useful for display on Github. Default: False.
+            size_by (str, optional): Numeric column by which nodes are scaled,
+                such as import_time_us. Default: None.
+
+        Raises:
+            ValueError: If layout is False.
+            ValueError: If as_png is True and layout is native.
 
         Returns:
             IPython.display.HTML: HTML object for inline display.
@@ -518,9 +2057,21 @@ def to_html(
         if color_scheme is None:
             color_scheme = rpt.COLOR_SCHEME
 
+        if layout == 'native':
+            self._check_layout()
+            if as_png:
+                raise ValueError('Native layout does not support PNG.')
+            svg = self._iter_svg(
+                self._get_layout_data(),
+                color_scheme=color_scheme,
+                size_by=size_by,
+            )
+            return HTML(''.join(svg))
+
         dot = self.to_dot_graph(
             orthogonal_edges=orthogonal_edges,
             color_scheme=color_scheme,
+            size_by=size_by,
         )
         return rpt.dot_to_html(dot, layout=layout, as_png=as_png)
 
@@ -530,9 +2081,10 @@ def write(
         layout='dot',
         orient='tb',
         orthogonal_edges=False,
-        color_scheme=None
+        color_scheme=None,
+        size_by=None,
     ):
-        # type: (Union[str, Path], str, str, bool, Optional[Dict[str, str]]) -> RepoETL
+        # type: (Union[str, Path], str, str, bool, Optional[Dict[str, str]], Optional[str]) -> RepoETL
         '''
         Writes internal data to a given filepath.
         Formats supported: svg, dot, png, json.
@@ -540,7 +2092,9 @@ def write(
         Args:
             fulllpath (str or Path): File to be written to.
             layout (str, optional): Graph layout style.
-                Options include: circo, dot, fdp, neato, sfdp, twopi. Default: dot.
+                Options include: circo, dot, fdp, neato, sfdp, twopi, native.
+                Native streams SVG rendered from internal coordinates, without
+                Graphviz. Default: dot.
             orient (str, optional): Graph layout orientation. Default: tb.
                 Options include:
 
@@ -552,9 +2106,13 @@ def write(
                 non-right angles. Default: False.
             color_scheme: (dict, optional): Color scheme to be applied to graph.
                 Default: rolling_pin.tools.COLOR_SCHEME
+            size_by (str, optional): Numeric column by which nodes are scaled,
+                such as import_time_us. Default: None.
 
         Raises:
             ValueError: If invalid file extension given.
+            ValueError: If layout is native and extension is not svg.
+            ValueError: If a graph is rendered and layout is False.
 
         Returns:
             RepoETL: Self.
@@ -565,16 +2123,32 @@ def write(
         _, ext = os.path.splitext(fullpath)
         ext = re.sub(r'^\.', '', ext)
         if re.search('^json$', ext, re.I):
-            self._data.to_json(fullpath, orient='records')
+            self._get_node_data().to_json(fullpath, orient='records')
             return self
 
         if color_scheme is None:
             color_scheme = rpt.COLOR_SCHEME
 
+        if layout == 'native':
+            if not re.search('^svg$', ext, re.I):
+                msg = f'Invalid extension found: {ext}. '
+                msg += 'Valid extensions for native layout include: svg, json.'
+                raise ValueError(msg)
+            self._check_layout()
+            with open(fullpath, 'w') as f:
+                f.writelines(self._iter_svg(
+                    self._get_layout_data(),
+                    orient=orient,
+                    color_scheme=color_scheme,
+                    size_by=size_by,
+                ))
+            return self
+
         graph = self.to_dot_graph(
             orient=orient,
             orthogonal_edges=orthogonal_edges,
             color_scheme=color_scheme,
+            size_by=size_by,
         )
         try:
             rpt.write_dot_graph(graph, fullpath, layout=layout,)
@@ -583,3 +2157,304 @@ def write(
             msg += 'Valid extensions include: svg, dot, png, json.'
             raise ValueError(msg)
         return self
+
+    @staticmethod
+    def _get_tables(data):
+        # type: (DataFrame) -> Tuple[DataFrame, DataFrame]
+        '''
+        Normalizes given DataFrame of nodes into a nodes table of scalar
+        columns and an edges table with one row per dependency. Node names,
+        types and distributions are categorical.
+
+        Args:
+            data (DataFrame): DataFrame of nodes.
+
+        Returns:
+            tuple[DataFrame]: Nodes table and edges table. Edges have source
+                (dependency), target (dependent), source_id, target_id and,
+                for collapsed views, weight columns.
+        '''
+        names = data.node_name.tolist()
+        lists = ['dependencies', 'subpackages', 'weights']
+        nodes = data.drop(columns=[x for x in lists if x in data.columns])
+        nodes.insert(0, 'node_id', np.arange(len(nodes), dtype=np.int32))
+        nodes['node_name'] = pd.Categorical(names, categories=names)
+        for col in ['node_type', 'distribution']:
+            if col in nodes.columns:
+                nodes[col] = nodes[col].astype('category')
+        nodes.attrs = {}
+
+        source, target = RepoETL._get_edges(data)
+        edges = DataFrame(dict(
+            source=pd.Categorical.from_codes(source, categories=names),
+            target=pd.Categorical.from_codes(target, categories=names),
+            source_id=source.astype(np.int32),
+            target_id=target.astype(np.int32),
+        ))
+        if 'weights' in data.columns:
+            weights = list(chain(*data.weights.tolist()))
+            edges['weight'] = np.array(weights, dtype=np.int32)
+        return nodes, edges
+
+    def write_tables(self, directory, format='csv'):
+        # type: (Union[str, Path], str) -> RepoETL
+        '''
+        Writes internal data as a normalized nodes table and an exploded
+        edges table, named nodes.<format> and edges.<format>, to a given
+        directory. List columns are replaced by the edges table. Parquet
+        files keep categorical dtypes, and require pyarrow or fastparquet.
+
+        Args:
+            directory (str or Path): Directory to be written to. Created if
+                it does not exist.
+            format (str, optional): File format. Options include: parquet,
+                csv. Default: csv.
+
+        Raises:
+            ValueError: If format is invalid.
+            ImportError: If format is parquet and neither pyarrow nor
+                fastparquet is installed.
+
+        Returns:
+            RepoETL: Self.
+        '''
+        formats = ['parquet', 'csv']
+        if format not in formats:
+            msg = f"Invalid format: '{format}'. Options include: {formats}."
+            raise ValueError(msg)
+
+        engines = ['pyarrow', 'fastparquet']
+        if format == 'parquet' \
+                and all(importlib.util.find_spec(x) is None for x in engines):
+            msg = 'Parquet format requires pyarrow or fastparquet. '
+            msg += "Install pyarrow or use format='csv'."
+            raise ImportError(msg)
+
+        nodes, edges = self._get_tables(self._get_node_data())
+        os.makedirs(directory, exist_ok=True)
+        for name, table in [('nodes', nodes), ('edges', edges)]:
+            fullpath = Path(directory, f'{name}.{format}')
+            if format == 'parquet':
+                table.to_parquet(fullpath, index=False)
+            else:
+                table.to_csv(fullpath, index=False)
+        return self
+
+    @staticmethod
+    def _batch_item(root, kwargs):
+        # type: (Union[str, Path], Dict[str, Any]) -> RepoETL
+        '''
+        Builds a RepoETL instance of given repository and computes its layout.
+        Used by batch.
+
+        Args:
+            root (str or Path): Repository root directory.
+            kwargs (dict): Keyword arguments passed to RepoETL.
+
+        Returns:
+            RepoETL: RepoETL instance.
+        '''
+        repo = RepoETL(root, **kwargs)
+        repo._get_layout_data()
+        repo._graphs = {}
+        return repo
+
+    @staticmethod
+    def batch(roots, workers=1, **kwargs):
+        # type: (Iterable[Union[str, Path]], int, Any) -> List[RepoETL]
+        '''
+        Builds RepoETL instances of many repositories, running import
+        extraction and layout of each repository in a process pool if workers
+        is greater than 1. Each repository is extracted serially within its
+        process.
+
+        Args:
+            roots (list[str or Path]): Repository root directories.
+            workers (int, optional): Number of processes. Default: 1.
+            **kwargs: Keyword arguments passed to RepoETL, such as
+                include_regex, exclude_regex, cache and layout.
+
+        Returns:
+            list[RepoETL]: RepoETL instances, in order of given roots.
+        '''
+        roots = list(roots)
+        if workers <= 1 or len(roots) < 2:
+            return [RepoETL._batch_item(x, kwargs) for x in roots]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                RepoETL._batch_item, roots, [kwargs] * len(roots)
+            ))
+
+    @staticmethod
+    def union(repos):
+        # type: (Iterable[RepoETL]) -> RepoETL
+        '''
+        Merges given RepoETL instances into a single cross-repository graph.
+        Library nodes of one repository which are module or subpackage nodes
+        of another are replaced by them, so that repositories are linked
+        through shared first-party packages. If several repositories define
+        the same module, the first is kept. A repo column records the root
+        directory of each module and subpackage node. Like collapsed views,
+        the union graph cannot be updated or watched.
+
+        Args:
+            repos (list[RepoETL]): RepoETL instances.
+
+        Raises:
+            ValueError: If no RepoETL instances are given.
+
+        Returns:
+            RepoETL: Union graph.
+        '''
+        repos = list(repos)
+        if len(repos) == 0:
+            raise ValueError('No repositories given.')
+
+        derived = ['x', 'y']
+        frames = []
+        stats = {}  # type: Dict[str, Tuple[int, int]]
+        for repo in repos:
+            data = repo._data.drop(columns=derived, errors='ignore')
+            root = Path(repo._root).as_posix()
+            data['repo'] = [
+                None if x == 'library' else root for x in data.node_type
+            ]
+            data.attrs = {}
+            frames.append(data)
+            stats.update(repo._stats)
+
+        # first-party nodes take precedence over libraries of the same name
+        priority = dict(module=0, subpackage=1, library=2)
+        data = pd.concat(frames, ignore_index=True)
+        order = np.argsort(data.node_type.map(priority).to_numpy(), kind='stable')
+        data = data.iloc[order].drop_duplicates('node_name')
+        data = data.reset_index(drop=True)
+        if repos[0]._layout is False:
+            data = RepoETL._sort_data(data)
+
+        output = copy(repos[0])
+        output._data = data
+        output._stats = stats
+        output._previous = None
+        output._graphs = {}
+        output._index = None
+        output._aggregates = None
+        output._sizes = None
+        output._closures = None
+        output._view = None
+        output._derived = 'union'
+        output._base = None
+        return output
+
+    def _check_updatable(self):
+        # type: () -> None
+        '''
+        Ensures instance was built from a repository, rather than derived from
+        another instance.
+
+        Raises:
+            ValueError: If instance is a view or union.
+        '''
+        if self._derived is not None:
+            msg = f'RepoETL {self._derived} cannot be updated. Update the '
+            msg += 'RepoETL instance it was built from instead.'
+            raise ValueError(msg)
+
+    def update(self):
+        # type: () -> List[str]
+        '''
+        Incrementally updates internal data from files which have been added,
+        modified or deleted since the last update. Only those files are parsed
+        again, and layout is warm started from the current coordinates when
+        it is next needed.
+
+        Raises:
+            ValueError: If instance is a view or union.
+            FileNotFoundError: If no files are found after filtering.
+
+        Returns:
+            list[str]: Sorted filepaths of changed files.
+        '''
+        self._check_updatable()
+        files = self._list_files(
+            self._root, self._include_regex, self._exclude_regex
+        )
+        stats = self._get_file_stats(files)
+        changed = [k for k, v in stats.items() if self._stats.get(k) != v]
+        deleted = set(self._stats).difference(stats)
+        if len(changed) == 0 and len(deleted) == 0:
+            return []
+
+        # all files are parsed again if first-party names change, as they
+        # decide which imports are standard
+        parsed = changed
+        first_party = {
+            x.split('.')[0] for x in self._get_module_names(self._root, files)
+        }
+        mask = self._data.node_type == 'module'
+        if first_party != {x.split('.')[0] for x in self._data[mask].node_name}:
+            parsed = list(stats)
+
+        # keep module rows of unchanged files
+        cols = ['fullpath', 'node_name', 'subpackages', 'dependencies', 'node_type']
+        mask = self._data.node_type == 'module'
+        mask &= ~self._data.fullpath.isin(set(parsed).union(deleted))
+        old = self._data.loc[mask, cols]
+
+        new = self._get_module_data(
+            self._root,
+            sorted(parsed),
+            workers=self._workers,
+            cache=self._cache,
+            first_party=first_party,
+        )
+        data = pd.concat([old, new], ignore_index=True)
+        data = self._add_package_nodes(data)
+
+        # layout is warm started from the last computed layout, when needed
+        if 'x' in self._data.columns:
+            self._previous = self._data
+        if self._layout is False:
+            data = self._sort_data(data)
+        self._data = data
+        self._stats = stats
+        self._graphs = {}
+        self._index = None
+        self._aggregates = None
+        self._sizes = None
+        self._closures = None
+        return sorted(deleted.union(changed))
+
+    def watch(self, fullpath, interval=1.0, iterations=None, **kwargs):
+        # type: (Union[str, Path], float, Optional[int], Any) -> RepoETL
+        '''
+        Writes graph to given filepath, then polls repository files for
+        changes and rewrites it after each update.
+
+        Args:
+            fullpath (str or Path): File to be written to.
+            interval (float, optional): Seconds between polls. Default: 1.
+            iterations (int, optional): Number of polls. Polls forever if None.
+                Default: None.
+            **kwargs: Keyword arguments passed to write.
+
+        Raises:
+            ValueError: If instance is a view or union.
+
+        Returns:
+            RepoETL: Self.
+        '''
+        self._check_updatable()
+        self.write(fullpath, **kwargs)
+        i = 0
+        while iterations is None or i < iterations:
+            time.sleep(interval)
+            changed = self.update()
+            if len(changed) > 0:
+                rpt.LOGGER.info(
+                    f'{len(changed)} files changed. Rewriting {fullpath}.'
+                )
+                self.write(fullpath, **kwargs)
+            i += 1
+        return self
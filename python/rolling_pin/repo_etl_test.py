@@ -1,14 +1,22 @@
+from itertools import chain
 from pathlib import Path
 from tempfile import TemporaryDirectory
+import importlib.util
 import os
+import re
 import unittest
+import unittest.mock as mock
+import xml.etree.ElementTree as ET
 
 from pandas import DataFrame
 import IPython
+import networkx
 import numpy as np
+import pandas as pd
 import pytest
 
 import rolling_pin.repo_etl as rpo
+import rolling_pin.tools as rpt
 # ------------------------------------------------------------------------------
 
 
@@ -86,6 +94,16 @@ def test_init(self):
             self.create_repo(root)
             rpo.RepoETL(root)
 
+    def test_init_lists_files_once(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            func = rpt.list_all_files
+            with mock.patch.object(
+                rpt, 'list_all_files', side_effect=func
+            ) as list_all_files:
+                rpo.RepoETL(root)
+                self.assertEqual(list_all_files.call_count, 1)
+
     def test_get_imports(self):
         with TemporaryDirectory() as root:
             self.create_repo(root)
@@ -98,6 +116,90 @@ def test_get_imports(self):
             result = rpo.RepoETL._get_imports(module)
             self.assertEqual(result, ['m0', 'm2', 'm3'])
 
+    def test_get_imports_ast(self):
+        with TemporaryDirectory() as root:
+            module = Path(root, 'foo.py')
+            with open(module, 'w') as f:
+                f.write('\n'.join([
+                    'import os, numpy as np',
+                    'from pandas import (',
+                    '    DataFrame,',
+                    '    Series,',
+                    ')',
+                    'from . import bar',
+                    'from ..baz import qux',
+                    'from .bar.taco import pizza  # comment',
+                    '',
+                    'def func():',
+                    '    import lunchbox.tools as lbt',
+                    '    from collections import Counter',
+                ]))
+
+            result = rpo.RepoETL._get_imports(module, 'a.b.foo')
+            expected = [
+                'numpy', 'pandas', 'a.b', 'a.baz', 'a.b.bar.taco',
+                'lunchbox.tools'
+            ]
+            self.assertEqual(result, expected)
+
+            # unresolvable relative imports are skipped
+            result = rpo.RepoETL._get_imports(module, 'foo')
+            expected = ['numpy', 'pandas', 'bar.taco', 'lunchbox.tools']
+            self.assertEqual(result, expected)
+
+            result = rpo.RepoETL._get_imports(module)
+            self.assertEqual(result, ['numpy', 'pandas', 'lunchbox.tools'])
+
+    def test_get_imports_parse_failure(self):
+        with TemporaryDirectory() as root:
+            module = Path(root, 'foo.py')
+            with open(module, 'w') as f:
+                f.write('\n'.join([
+                    'import pandas',
+                    'from numpy import (',
+                    'some python code',
+                ]))
+
+            with self.assertLogs(level='WARNING') as log:
+                result = rpo.RepoETL._get_imports(module, 'foo')
+            self.assertEqual(result, ['pandas', 'numpy'])
+            self.assertRegex(log.output[0], 'Unable to parse .*foo.py')
+
+    def test_get_data_workers(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            expected = rpo.RepoETL._get_data(root)
+            result = rpo.RepoETL._get_data(root, workers=2)
+            self.assertTrue(result.equals(expected))
+
+    def test_get_data_cache(self):
+        with TemporaryDirectory() as root, TemporaryDirectory() as temp:
+            self.create_repo(root)
+            cache = Path(temp, 'cache.db')
+            expected = rpo.RepoETL._get_data(root)
+            result = rpo.RepoETL._get_data(root, cache=cache)
+            self.assertTrue(result.equals(expected))
+            self.assertTrue(cache.is_file())
+
+            # cached imports are used for unchanged files
+            with mock.patch.object(rpo.RepoETL, '_get_imports') as func:
+                result = rpo.RepoETL._get_data(root, cache=cache)
+                func.assert_not_called()
+            self.assertTrue(result.equals(expected))
+
+            # changed files are parsed again
+            with open(Path(root, 'a1/b1/m3.py'), 'w') as f:
+                f.write('import root.a0.m0\nimport json\n')
+            with mock.patch.object(
+                rpo.RepoETL, '_get_imports', wraps=rpo.RepoETL._get_imports
+            ) as func:
+                result = rpo.RepoETL._get_data(root, cache=cache)
+                self.assertEqual(func.call_count, 1)
+            expected = rpo.RepoETL._get_data(root)
+            self.assertTrue(result.equals(expected))
+            row = result[result.node_name == 'a1.b1.m3']
+            self.assertIn('root.a0.m0', row.dependencies.tolist()[0])
+
     def test_get_data(self):
         with TemporaryDirectory() as root:
             self.create_repo(root)
@@ -152,6 +254,352 @@ def test_anneal_coordinate(self):
             result = data[data.y == y].x.tolist()
             self.assertCountEqual(result, set(result))
 
+    def test_anneal_coordinate_reference(self):
+        # fixture repo
+        data = self.get_repo_data('/tmp/foo')
+        data = rpo.RepoETL._calculate_coordinates(data)
+        expected = self.anneal_reference(data.copy())
+        result = rpo.RepoETL._anneal_coordinate(data.copy())
+        self.assertEqual(result.index.tolist(), expected.index.tolist())
+        self.assertEqual(result.x.tolist(), expected.x.tolist())
+
+        # synthetic repos
+        for size, seed in [(100, 1), (200, 3)]:
+            data = self.get_synthetic_data(size, seed)
+            expected = self.anneal_reference(data.copy())
+            result = rpo.RepoETL._anneal_coordinate(data.copy())
+            self.assertEqual(result.index.tolist(), expected.index.tolist())
+            self.assertEqual(result.x.tolist(), expected.x.tolist())
+
+    def test_get_reachability(self):
+        data = self.get_repo_data('/tmp/foo')
+        names = data.node_name.tolist()
+        forward, reverse = rpo.RepoETL._get_reachability(data)
+        graph = rpo.RepoETL._to_networkx_graph(data)
+        for (indptr, indices), graph_ in [(forward, graph), (reverse, graph.reverse())]:
+            for i, name in enumerate(names):
+                result = [names[j] for j in indices[indptr[i]:indptr[i + 1]]]
+                expected = networkx.descendants(graph_, name) | {name}
+                self.assertEqual(set(result), expected)
+
+    def test_get_group_ranks(self):
+        groups = np.array([2, 0, 2, 1, 0, 2])
+        result = rpo.RepoETL._get_group_ranks(groups).tolist()
+        self.assertEqual(result, [0, 0, 1, 0, 1, 2])
+
+        result = rpo.RepoETL._get_group_ranks(np.array([])).tolist()
+        self.assertEqual(result, [])
+
+    def test_calculate_layered_coordinates(self):
+        data = self.get_repo_data('/tmp/foo')
+        result = rpo.RepoETL._calculate_layered_coordinates(data.copy())
+        lut = dict(zip(result.node_name, result.y))
+
+        # dependencies are always above their dependents
+        for _, row in result.iterrows():
+            for dep in row.dependencies:
+                self.assertGreater(lut[dep], row.y)
+
+        # no two nodes overlap
+        for y in result.y.unique():
+            xs = result[result.y == y].x.tolist()
+            self.assertEqual(sorted(xs), list(range(len(xs))))
+
+        # dependency cycles share a layer
+        data = DataFrame(dict(
+            node_name=['a', 'b', 'c', 'd'],
+            dependencies=[['c'], ['a'], ['b'], ['a']],
+        ))
+        result = rpo.RepoETL._calculate_layered_coordinates(data)
+        self.assertEqual(result.y.tolist(), [1, 1, 1, 0])
+
+    def test_calculate_layered_coordinates_crossings(self):
+        # shuffled ternary tree
+        size = 200
+        deps = [[]] + [[f'n{(i - 1) // 3}'] for i in range(1, size)]
+        perm = np.random.default_rng(0).permutation(size)
+        data = DataFrame(dict(
+            node_name=[f'n{i}' for i in perm],
+            dependencies=[deps[i] for i in perm],
+        ))
+        result = rpo.RepoETL._calculate_layered_coordinates(
+            data.copy(), iterations=0
+        )
+        self.assertGreater(rpo.RepoETL._count_crossings(result), 0)
+        result = rpo.RepoETL._calculate_layered_coordinates(data.copy())
+        self.assertEqual(rpo.RepoETL._count_crossings(result), 0)
+
+    def test_count_crossings(self):
+        # b -> c and a -> d cross, a -> e spans two levels
+        data = DataFrame(dict(
+            node_name=['a', 'b', 'c', 'd', 'e'],
+            dependencies=[[], [], ['b'], ['a'], ['a', 'c']],
+            x=[0, 1, 0, 1, 0],
+            y=[2, 2, 1, 1, 0],
+        ))
+        self.assertEqual(rpo.RepoETL._count_crossings(data), 1)
+
+        # a -> e also crosses b -> c
+        data.x = [0, 1, 0, 1, 1]
+        self.assertEqual(rpo.RepoETL._count_crossings(data), 2)
+
+        # edges which share an endpoint do not cross
+        data.x = [0, 1, 1, 0, 0]
+        self.assertEqual(rpo.RepoETL._count_crossings(data), 0)
+
+    def test_layout_report(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            for layout in ['anneal', 'layered']:
+                repo = rpo.RepoETL(root, layout=layout)
+                result = repo.layout_report
+                edges = repo._data.dependencies.apply(len).sum()
+                self.assertEqual(result['engine'], layout)
+                self.assertEqual(result['nodes'], len(repo._data))
+                self.assertEqual(result['edges'], edges)
+                self.assertGreaterEqual(result['crossings'], 0)
+                self.assertGreaterEqual(result['seconds'], 0)
+
+            expected = "Invalid layout: 'foo'. Options include: "
+            expected += r"\['anneal', 'layered', False\]."
+            with self.assertRaisesRegex(ValueError, expected):
+                rpo.RepoETL(root, layout='foo')
+
+    def test_get_imports_standard_modules(self):
+        with TemporaryDirectory() as root:
+            path = Path(root, 'foo.py')
+            with open(path, 'w') as f:
+                f.write('\n'.join([
+                    'import os.path',
+                    'import importlib.metadata',
+                    'from concurrent.futures import ProcessPoolExecutor',
+                    'import numpy',
+                    'import yaml.loader',
+                ]))
+            result = rpo.RepoETL._get_imports(path)
+            self.assertEqual(result, ['numpy', 'yaml.loader'])
+
+    def test_get_imports_first_party_standard_names(self):
+        with TemporaryDirectory() as root:
+            with open(Path(root, 'types.py'), 'w') as f:
+                f.write('import os\n')
+            with open(Path(root, 'a.py'), 'w') as f:
+                f.write('import types\nimport code\nimport os\n')
+
+            # first-party types shadows the standard module
+            repo = rpo.RepoETL(root, layout=False)
+            data = repo.to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['a', 'dependencies'], ['types'])
+            self.assertEqual(data.loc['types', 'node_type'], 'module')
+            self.assertEqual(data.loc['types', 'dependencies'], [])
+
+            # a new first-party module is picked up by unchanged importers
+            with open(Path(root, 'code.py'), 'w') as f:
+                f.write('')
+            repo.update()
+            data = repo.to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['a', 'dependencies'], ['types', 'code'])
+
+    def test_distribution(self):
+        with TemporaryDirectory() as root:
+            os.makedirs(Path(root, 'pkg'))
+            with open(Path(root, 'pkg/a.py'), 'w') as f:
+                f.write('import yaml.loader\nimport numpy\nimport foobarbaz\n')
+            with open(Path(root, 'pkg/b.py'), 'w') as f:
+                f.write('import pkg.a\nimport yaml\n')
+
+            repo = rpo.RepoETL(root, layout=False)
+            data = repo.to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['yaml.loader', 'distribution'], 'PyYAML')
+            self.assertEqual(data.loc['yaml', 'distribution'], 'PyYAML')
+            self.assertEqual(data.loc['numpy', 'distribution'], 'numpy')
+            for name in ['foobarbaz', 'pkg', 'pkg.a', 'pkg.b']:
+                self.assertTrue(pd.isna(data.loc[name, 'distribution']))
+
+            # collapsed libraries keep their distribution
+            data = repo.collapse(1).to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['yaml', 'distribution'], 'PyYAML')
+            self.assertTrue(pd.isna(data.loc['pkg', 'distribution']))
+
+            # column is kept by layout
+            data = rpo.RepoETL(root).to_dataframe()
+            self.assertIn('distribution', data.columns)
+
+    def test_closures(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            data = repo.to_dataframe()
+            self.assertEqual(
+                data.columns.tolist()[-2:], ['closure_modules', 'closure_bytes']
+            )
+
+            # compare with a search per node
+            graph = repo.to_networkx_graph()
+            sizes = {}
+            for name, path in zip(data.node_name, data.fullpath):
+                if name.startswith('pkg.'):
+                    sizes[name] = os.path.getsize(path)
+            for _, row in data.iterrows():
+                nodes = networkx.ancestors(graph, row.node_name)
+                nodes = [x for x in nodes.union([row.node_name]) if x in sizes]
+                self.assertEqual(row.closure_modules, len(nodes))
+                self.assertEqual(row.closure_bytes, sum(sizes[x] for x in nodes))
+
+            data = data.set_index('node_name')
+            self.assertEqual(data.loc['pkg.c', 'closure_modules'], 3)
+            self.assertEqual(data.loc['pkg.a', 'closure_modules'], 1)
+            self.assertEqual(data.loc['pkg', 'closure_modules'], 0)
+
+            # cycle members share a closure
+            self.assertEqual(data.loc['pkg.e', 'closure_modules'], 2)
+            self.assertEqual(
+                data.loc['pkg.e', 'closure_bytes'],
+                data.loc['pkg.f', 'closure_bytes'],
+            )
+
+            # closures can size nodes
+            dot = repo.to_dot_graph(size_by='closure_bytes')
+            sizes = [x.get_fontsize() for x in dot.get_nodes()]
+            self.assertGreater(len(set(sizes)), 1)
+
+    def test_closures_view(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            with mock.patch.object(
+                rpo.RepoETL, '_layout_data', wraps=rpo.RepoETL._layout_data
+            ) as func:
+                repo = rpo.RepoETL(root)
+                data = repo.to_dataframe()
+                mask = data.node_type == 'module'
+                expected = data[mask].fullpath.apply(os.path.getsize).sum()
+
+                # groups count the modules of their members
+                view = repo.collapse(1).to_dataframe().set_index('node_name')
+                self.assertEqual(view.loc['pkg', 'closure_modules'], mask.sum())
+                self.assertEqual(view.loc['pkg', 'closure_bytes'], expected)
+
+                # closures do not need coordinates
+                self.assertEqual(func.call_count, 0)
+
+            # closures are computed once
+            self.assertIs(repo._get_closures(), repo._get_closures())
+
+    def test_closures_update(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root, layout=False)
+            data = repo.to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['pkg.d', 'closure_modules'], 2)
+
+            with open(Path(root, 'pkg/d.py'), 'w') as f:
+                f.write('import pkg.c\n')
+            repo.update()
+            data = repo.to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['pkg.d', 'closure_modules'], 4)
+
+    def test_lazy_layout(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            with mock.patch.object(
+                rpo.RepoETL, '_layout_data', wraps=rpo.RepoETL._layout_data
+            ) as func:
+                repo = rpo.RepoETL(root)
+                self.assertNotIn('x', repo._data.columns)
+
+                # queries and views do not need coordinates
+                repo.descendants('pkg.a')
+                repo.impacted_by([Path(root, 'pkg/a.py').as_posix()])
+                repo.cycles
+                view = repo.collapse(1)
+                repo.condense()
+                self.assertEqual(func.call_count, 0)
+
+                # exports do not need coordinates
+                self.assertNotIn('x', repo.to_dataframe().columns)
+                repo.to_networkx_graph()
+                repo.write(Path(root, 'repo.json'))
+                repo.write_tables(Path(root, 'tables'), format='csv')
+                self.assertEqual(func.call_count, 0)
+
+                # layout is computed once when rendering
+                repo.to_dot_graph()
+                repo.to_dot_graph()
+                self.assertEqual(func.call_count, 1)
+
+                # coordinates are exported once computed
+                data = repo.to_dataframe()
+                self.assertIn('x', data.columns)
+                graph = repo.to_networkx_graph()
+                self.assertIn('x', graph.nodes['pkg.a'])
+
+                # views lay out independently
+                view.to_dot_graph()
+                self.assertEqual(func.call_count, 2)
+
+            expected = rpo.RepoETL._get_data(root)
+            data = data.drop(columns=['closure_modules', 'closure_bytes'])
+            self.assertTrue(data.equals(expected))
+
+    def test_lazy_layout_export_order(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            repo = rpo.RepoETL(root)
+            tables = Path(root, 'tables')
+
+            expected = repo.to_dataframe()
+            repo.write_tables(tables, format='csv')
+            expected_nodes = pd.read_csv(Path(tables, 'nodes.csv'))
+            self.assertGreater(expected.fullpath.isnull().sum(), 1)
+
+            # exported rows and columns do not change once layout is computed
+            repo.to_dot_graph()
+            result = repo.to_dataframe().drop(columns=['x', 'y'])
+            self.assertTrue(result.equals(expected))
+
+            repo.write_tables(tables, format='csv')
+            result = pd.read_csv(Path(tables, 'nodes.csv'))
+            result = result.drop(columns=['x', 'y'])
+            self.assertTrue(result.equals(expected_nodes))
+
+    def test_no_layout(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            with mock.patch.object(rpo.RepoETL, '_layout_data') as func:
+                repo = rpo.RepoETL(root, layout=False)
+                data = repo.to_dataframe()
+                graph = repo.to_networkx_graph()
+                self.assertEqual(repo.layout_report, {})
+                view = repo.collapse(1)
+                view.to_dataframe()
+                repo.write(Path(root, 'foo.json'))
+                func.assert_not_called()
+
+            self.assertNotIn('x', data.columns)
+            self.assertNotIn('y', data.columns)
+            self.assertNotIn('x', graph.nodes['pkg.a'])
+            self.assertEqual(repo.descendants('pkg.a'), ['pkg.b', 'pkg.c', 'pkg.d'])
+            self.assertEqual(view._data.node_name.tolist(), ['pkg'])
+
+            # lazy data matches eager data without coordinates
+            expected = rpo.RepoETL._get_data(root, layout=False)
+            data = data.drop(columns=['closure_modules', 'closure_bytes'])
+            self.assertTrue(data.equals(expected))
+            laid = rpo.RepoETL._get_data(root).drop(columns=['x', 'y'])
+            laid.attrs = {}
+            self.assert_same_nodes(data, laid)
+
+            expected = 'Layout is disabled. Construct RepoETL with a layout '
+            expected += 'engine to render graphs.'
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.to_dot_graph()
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.write(Path(root, 'foo.svg'), layout='native')
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.write(Path(root, 'foo.svg'))
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.to_html(layout='native')
+
     def test_center_coordinate(self):
         data = [
             [0, 0], [1, 0], [2, 0],
@@ -169,6 +617,403 @@ def test_center_coordinate(self):
         self.assertEqual(result.x.tolist(), expected.x.tolist())
         self.assertEqual(result.y.tolist(), expected.y.tolist())
 
+    def test_escape_graph(self):
+        data = self.get_repo_data('/tmp/foo')
+        graph = rpo.RepoETL._to_networkx_graph(data)
+        expected = rpo.RepoETL._to_networkx_graph(data, escape_chars=True)
+        result = rpo.RepoETL._escape_graph(graph)
+
+        self.assertEqual(list(result.nodes), list(expected.nodes))
+        self.assertEqual(list(result.edges), list(expected.edges))
+        for node in expected.nodes:
+            exp = expected.nodes[node]
+            res = result.nodes[node]
+            self.assertEqual(res['node_name'], exp['node_name'])
+            self.assertEqual(res['dependencies'], exp['dependencies'])
+
+        # source graph is unchanged
+        self.assertIn('a1.b1.m3', graph.nodes)
+        self.assertEqual(graph.nodes['a1.b1.m3']['dependencies'], ['a1.b1'])
+
+    def test_get_networkx_graph(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            repo = rpo.RepoETL(root)
+            graph = repo._get_networkx_graph()
+            self.assertIs(repo._get_networkx_graph(), graph)
+
+            escaped = repo._get_networkx_graph(escape_chars=True)
+            self.assertIs(repo._get_networkx_graph(escape_chars=True), escaped)
+            self.assertIn('a1\\.m1', escaped.nodes)
+
+            # public graph is a copy
+            result = repo.to_networkx_graph()
+            self.assertIsNot(result, graph)
+            result.remove_node('a1.m1')
+            self.assertIn('a1.m1', repo.to_networkx_graph().nodes)
+
+    def create_dependency_repo(self, root):
+        # a <- b <- c, a <- d, e <-> f
+        imports = dict(
+            a=['os'],
+            b=['pkg.a'],
+            c=['pkg.b'],
+            d=['pkg.a', 're'],
+            e=['pkg.f'],
+            f=['pkg.e'],
+        )
+        os.makedirs(Path(root, 'pkg'))
+        for name, items in imports.items():
+            with open(Path(root, 'pkg', f'{name}.py'), 'w') as f:
+                f.write('\n'.join(f'import {x}' for x in items))
+
+    def test_ancestors_descendants(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            graph = repo.to_networkx_graph()
+            for node in graph.nodes:
+                expected = sorted(networkx.ancestors(graph, node))
+                self.assertEqual(repo.ancestors(node), expected)
+
+                expected = sorted(networkx.descendants(graph, node))
+                self.assertEqual(repo.descendants(node), expected)
+
+            self.assertEqual(repo.descendants('pkg.a'), ['pkg.b', 'pkg.c', 'pkg.d'])
+            self.assertEqual(repo.ancestors('pkg.c'), ['pkg', 'pkg.a', 'pkg.b'])
+            self.assertEqual(repo.descendants('pkg.e'), ['pkg.f'])
+
+            # multiple nodes
+            result = repo.descendants(['pkg.b', 'pkg.e'])
+            self.assertEqual(result, ['pkg.c', 'pkg.f'])
+            result = repo.descendants(['pkg.a', 'pkg.b'])
+            self.assertEqual(result, ['pkg.b', 'pkg.c', 'pkg.d'])
+
+            expected = r"Nodes not found: \['foo'\]."
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.ancestors(['pkg.a', 'foo'])
+
+    def test_impacted_by(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+
+            result = repo.impacted_by([Path(root, 'pkg/a.py')])
+            self.assertEqual(result, ['pkg.a', 'pkg.b', 'pkg.c', 'pkg.d'])
+
+            result = repo.impacted_by([
+                Path(root, 'pkg/c.py').as_posix(),
+                Path(root, 'pkg/e.py').as_posix(),
+                Path(root, 'README.md').as_posix(),
+            ])
+            self.assertEqual(result, ['pkg.c', 'pkg.e', 'pkg.f'])
+
+            # relative paths
+            cwd = os.getcwd()
+            try:
+                os.chdir(root)
+                result = repo.impacted_by(['pkg/b.py'])
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(result, ['pkg.b', 'pkg.c'])
+
+            self.assertEqual(repo.impacted_by([]), [])
+
+    def assert_same_nodes(self, result, expected):
+        cols = ['node_name', 'node_type', 'dependencies', 'subpackages', 'fullpath']
+        result = result[cols].sort_values('node_name').reset_index(drop=True)
+        expected = expected[cols].sort_values('node_name').reset_index(drop=True)
+        self.assertTrue(result.equals(expected))
+
+    def test_update(self):
+        for layout in ['anneal', 'layered']:
+            with TemporaryDirectory() as root:
+                self.create_dependency_repo(root)
+                repo = rpo.RepoETL(root, layout=layout)
+                self.assertEqual(repo.update(), [])
+                repo.descendants('pkg.a')
+                repo._get_networkx_graph()
+
+                # modify, add and delete files
+                a = Path(root, 'pkg/a.py').as_posix()
+                c = Path(root, 'pkg/c.py').as_posix()
+                g = Path(root, 'pkg/sub/g.py').as_posix()
+                with open(a, 'w') as f:
+                    f.write('import pkg.d\nimport json\n')
+                os.remove(c)
+                os.makedirs(Path(root, 'pkg/sub'))
+                with open(g, 'w') as f:
+                    f.write('import pkg.a\n')
+
+                with mock.patch.object(
+                    rpo.RepoETL, '_get_imports', wraps=rpo.RepoETL._get_imports
+                ) as func:
+                    result = repo.update()
+                    self.assertEqual(func.call_count, 2)
+                self.assertEqual(result, sorted([a, c, g]))
+
+                expected = rpo.RepoETL(root, layout=layout)._data
+                self.assert_same_nodes(repo._data, expected)
+                self.assertEqual(repo.layout_report['engine'], layout)
+
+                # caches are reset
+                self.assertEqual(
+                    repo.descendants('pkg.a'), ['pkg.b', 'pkg.d', 'pkg.sub.g']
+                )
+                self.assertIn('pkg.sub.g', repo.to_networkx_graph().nodes)
+
+                # no two nodes overlap
+                data = repo._data
+                for y in data.y.unique():
+                    xs = data[data.y == y].x.tolist()
+                    self.assertEqual(len(xs), len(set(xs)))
+
+                self.assertEqual(repo.update(), [])
+
+    def test_warm_start_coordinates(self):
+        previous = DataFrame(dict(node_name=['a', 'b', 'c'], x=[2, 0, 1]))
+
+        # nodes with y coordinates are ranked within their level
+        data = DataFrame(dict(
+            node_name=['a', 'b', 'c', 'd'], x=[0, 1, 2, 0], y=[0, 0, 1, 0]
+        ))
+        result = rpo.RepoETL._warm_start_coordinates(data, previous)
+        self.assertEqual(result.x.tolist(), [1, 0, 0, 2])
+
+        # otherwise rows are reordered
+        data = DataFrame(dict(node_name=['d', 'a', 'b', 'c']))
+        result = rpo.RepoETL._warm_start_coordinates(data, previous)
+        self.assertEqual(result.node_name.tolist(), ['b', 'c', 'a', 'd'])
+
+    def test_watch(self):
+        with TemporaryDirectory() as root, TemporaryDirectory() as temp:
+            self.create_dependency_repo(root)
+            target = Path(temp, 'graph.json')
+            repo = rpo.RepoETL(root)
+
+            def update():
+                with open(Path(root, 'pkg/b.py'), 'w') as f:
+                    f.write('import pkg.a\nimport taco\n')
+                return rpo.RepoETL.update(repo)
+
+            with mock.patch.object(repo, 'update', side_effect=update):
+                repo.watch(target, interval=0, iterations=2)
+                self.assertEqual(repo.update.call_count, 2)
+
+            with open(target) as f:
+                result = f.read()
+            self.assertIn('taco', result)
+
+    def test_update_view(self):
+        with TemporaryDirectory() as root, TemporaryDirectory() as temp:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            views = [repo.collapse(1), repo.condense(), repo.expand('pkg')]
+            expected = 'RepoETL view cannot be updated. Update the RepoETL '
+            expected += 'instance it was built from instead.'
+            for view in views:
+                with self.assertRaisesRegex(ValueError, expected):
+                    view.update()
+                with self.assertRaisesRegex(ValueError, expected):
+                    view.watch(Path(temp, 'graph.json'), iterations=1)
+            self.assertFalse(Path(temp, 'graph.json').exists())
+            self.assertEqual(repo.update(), [])
+
+    def create_nested_repo(self, root):
+        # pkg.a.x <- pkg.b.y, pkg.a.x <- pkg.b.z, pkg.b.y <- pkg.c
+        imports = {
+            'pkg/a/x.py': ['os'],
+            'pkg/b/y.py': ['pkg.a.x', 'numpy.linalg'],
+            'pkg/b/z.py': ['pkg.a.x', 'numpy.fft'],
+            'pkg/c.py': ['pkg.b.y'],
+            'other/w.py': ['pkg.c'],
+        }
+        for path, items in imports.items():
+            fullpath = Path(root, path)
+            os.makedirs(fullpath.parent, exist_ok=True)
+            with open(fullpath, 'w') as f:
+                f.write('\n'.join(f'import {x}' for x in items))
+
+    def test_collapse(self):
+        with TemporaryDirectory() as root:
+            self.create_nested_repo(root)
+            repo = rpo.RepoETL(root)
+
+            result = repo.collapse(1)
+            data = result.to_dataframe().set_index('node_name')
+            self.assertEqual(
+                sorted(data.index.tolist()), ['numpy', 'other', 'pkg']
+            )
+            self.assertEqual(data.loc['pkg', 'node_type'], 'subpackage')
+            self.assertEqual(data.loc['numpy', 'node_type'], 'library')
+            self.assertEqual(data.loc['pkg', 'dependencies'], ['numpy'])
+            self.assertEqual(data.loc['pkg', 'weights'], [2])
+            self.assertEqual(data.loc['other', 'dependencies'], ['pkg'])
+            self.assertEqual(data.loc['other', 'weights'], [1])
+            self.assertEqual(result.layout_report['nodes'], 3)
+
+            result = repo.collapse(2).to_dataframe().set_index('node_name')
+            expected = ['numpy.fft', 'numpy.linalg', 'pkg', 'pkg.a']
+            self.assertEqual(result.loc['pkg.b', 'dependencies'], expected)
+            self.assertEqual(result.loc['pkg.b', 'weights'], [1, 1, 1, 2])
+            self.assertEqual(result.loc['pkg.c', 'node_type'], 'module')
+            self.assertEqual(
+                result.loc['pkg.c', 'fullpath'], Path(root, 'pkg/c.py').as_posix()
+            )
+
+            # views are cached and built from aggregates
+            with mock.patch.object(rpo.RepoETL, '_get_all_imports') as func:
+                self.assertIs(repo.collapse(1), repo.collapse(1))
+                self.assertIs(repo.collapse(1).collapse(2), repo.collapse(2))
+                func.assert_not_called()
+
+            # weighted edges
+            graph = repo.collapse(1).to_networkx_graph()
+            self.assertEqual(graph.edges['numpy', 'pkg']['weight'], 2)
+
+            expected = 'Depth must be an integer greater than 0. Given value: 0.'
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.collapse(0)
+
+    def test_expand(self):
+        with TemporaryDirectory() as root:
+            self.create_nested_repo(root)
+            repo = rpo.RepoETL(root)
+
+            result = repo.collapse(1).expand('pkg').to_dataframe()
+            expected = ['numpy', 'other', 'pkg', 'pkg.a', 'pkg.b', 'pkg.c']
+            self.assertEqual(sorted(result.node_name.tolist()), expected)
+
+            result = repo.collapse(1).expand('pkg').expand('pkg.b')
+            result = result.to_dataframe().set_index('node_name')
+            self.assertIn('pkg.b.y', result.index)
+            self.assertIn('pkg.b.z', result.index)
+            self.assertNotIn('pkg.a.x', result.index)
+            expected = ['numpy', 'pkg.a', 'pkg.b']
+            self.assertEqual(result.loc['pkg.b.y', 'dependencies'], expected)
+            self.assertEqual(result.loc['pkg.b.y', 'weights'], [1, 1, 1])
+
+            # uncollapsed instance expands from depth of subpackage
+            result = repo.expand('pkg')
+            self.assertIs(result, repo.collapse(1).expand('pkg'))
+
+            expected = 'Subpackage not found: pkg.c.'
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.expand('pkg.c')
+
+    def test_cycles(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            with open(Path(root, 'pkg/b.py'), 'a') as f:
+                f.write('\nimport pkg.c\n')
+            with open(Path(root, 'pkg/d.py'), 'a') as f:
+                f.write('\nimport pkg.d\n')
+            repo = rpo.RepoETL(root)
+
+            result = repo.cycles
+            self.assertEqual(result.columns.tolist(), ['cycle', 'node_count', 'nodes'])
+            self.assertEqual(result.cycle.tolist(), [0, 1, 2])
+            self.assertEqual(result.node_count.tolist(), [2, 2, 1])
+            expected = [['pkg.b', 'pkg.c'], ['pkg.e', 'pkg.f'], ['pkg.d']]
+            self.assertEqual(result.nodes.tolist(), expected)
+
+            # compare to networkx
+            graph = repo.to_networkx_graph()
+            expected = [
+                sorted(x) for x in networkx.strongly_connected_components(graph)
+                if len(x) > 1
+            ]
+            result = result[result.node_count > 1].nodes.tolist()
+            self.assertEqual(sorted(result), sorted(expected))
+
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            result = rpo.RepoETL(root).cycles
+            self.assertEqual(len(result), 0)
+            self.assertEqual(result.columns.tolist(), ['cycle', 'node_count', 'nodes'])
+
+    def test_condense(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            with open(Path(root, 'pkg/b.py'), 'a') as f:
+                f.write('\nimport pkg.c\n')
+            repo = rpo.RepoETL(root)
+            result = repo.condense()
+            self.assertIs(repo.condense(), result)
+
+            data = result._get_layout_data().set_index('node_name')
+            self.assertEqual(data.loc['cycle_0', 'node_type'], 'cycle')
+            self.assertEqual(data.loc['cycle_1', 'node_type'], 'cycle')
+            self.assertNotIn('pkg.b', data.index)
+            self.assertEqual(data.loc['cycle_0', 'dependencies'], ['pkg', 'pkg.a'])
+            self.assertEqual(data.loc['cycle_0', 'weights'], [2, 1])
+            self.assertTrue(networkx.is_directed_acyclic_graph(
+                result.to_networkx_graph()
+            ))
+
+            # no two nodes overlap
+            for y in data.y.unique():
+                xs = data[data.y == y].x.tolist()
+                self.assertEqual(len(xs), len(set(xs)))
+
+            # cycle colors fall back to module colors
+            scheme = {
+                k: v for k, v in rpt.COLOR_SCHEME.items() if 'cycle' not in k
+            }
+            dot = result.to_dot_graph(color_scheme=scheme)
+            node = dot.get_node('cycle_0')[0]
+            self.assertEqual(
+                node.get_fontcolor(), scheme['node_module_font']
+            )
+            dot = result.to_dot_graph()
+            node = dot.get_node('cycle_0')[0]
+            self.assertEqual(
+                node.get_fontcolor(), rpt.COLOR_SCHEME['node_cycle_font']
+            )
+
+    def test_chained_views(self):
+        with TemporaryDirectory() as root:
+            self.create_nested_repo(root)
+            with open(Path(root, 'pkg/a/w.py'), 'w') as f:
+                f.write('import pkg.b.z\n')
+            repo = rpo.RepoETL(root)
+            self.assertEqual(len(repo.cycles), 0)
+
+            # pkg.a and pkg.b only form a cycle once collapsed
+            view = repo.collapse(2)
+            self.assertEqual(view.cycles.nodes.tolist(), [['pkg.a', 'pkg.b']])
+            self.assertIsNot(view.condense(), repo.condense())
+
+            data = view.condense().to_dataframe().set_index('node_name')
+            self.assertEqual(data.loc['cycle_0', 'node_type'], 'cycle')
+            self.assertNotIn('pkg.a', data.index)
+            self.assertEqual(
+                data.loc['cycle_0', 'dependencies'], ['numpy.fft', 'numpy.linalg', 'pkg']
+            )
+            self.assertEqual(data.loc['cycle_0', 'weights'], [1, 1, 2])
+            self.assertEqual(data.loc['pkg.c', 'dependencies'], ['cycle_0', 'pkg'])
+            self.assertTrue(networkx.is_directed_acyclic_graph(
+                view.condense().to_networkx_graph()
+            ))
+
+            # condensed views are collapsed from their own nodes
+            view = view.condense().collapse(1)
+            data = view.to_dataframe().set_index('node_name')
+            self.assertEqual(sorted(data.index), ['cycle_0', 'numpy', 'other', 'pkg'])
+            self.assertEqual(data.loc['cycle_0', 'dependencies'], ['numpy', 'pkg'])
+            self.assertEqual(data.loc['cycle_0', 'weights'], [2, 2])
+            self.assertIs(view, repo.collapse(2).condense().collapse(1))
+
+    def test_calculate_coordinates_flat(self):
+        with TemporaryDirectory() as root:
+            with open(Path(root, 'a.py'), 'w') as f:
+                f.write('import b')
+            with open(Path(root, 'b.py'), 'w') as f:
+                f.write('import os')
+            data = rpo.RepoETL(root)._get_layout_data()
+            self.assertFalse(data.y.isna().any())
+            self.assertEqual(sorted(data.x.tolist()), [0, 1])
+
     def test_to_networkx_graph(self):
         with TemporaryDirectory() as root:
             self.create_repo(root)
@@ -276,6 +1121,121 @@ def test_to_dataframe(self):
             result = repo.to_dataframe()
             self.assertIsNot(result, repo._data)
 
+    def test_parse_import_times(self):
+        text = '''
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     pkg.a
+import time:        30 |        150 |   pkg.b
+some other line
+import time:         5 |        155 | pkg.c
+'''
+        result = rpo.RepoETL._parse_import_times(text)
+        result = result.sort_values('node_name').reset_index(drop=True)
+        self.assertEqual(result.node_name.tolist(), ['pkg.a', 'pkg.b', 'pkg.c'])
+        self.assertEqual(result.import_time_us.tolist(), [120, 30, 5])
+        self.assertEqual(
+            result.cumulative_import_time_us.tolist(), [120, 150, 155]
+        )
+
+        result = rpo.RepoETL._parse_import_times('')
+        self.assertEqual(len(result), 0)
+        self.assertEqual(
+            result.columns.tolist(),
+            ['node_name', 'import_time_us', 'cumulative_import_time_us'],
+        )
+
+    def test_profile_imports(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            before = repo.to_dot_graph()
+            report = repo.layout_report
+            result = repo.profile_imports('pkg.c')
+            self.assertIs(result, repo)
+
+            data = repo._data.set_index('node_name')
+            for name in ['pkg.a', 'pkg.b', 'pkg.c']:
+                self.assertGreater(data.loc[name, 'import_time_us'], 0)
+            for name in ['pkg.d', 'pkg.e', 'pkg.f']:
+                self.assertEqual(data.loc[name, 'import_time_us'], 0)
+                self.assertEqual(data.loc[name, 'cumulative_import_time_us'], 0)
+            self.assertGreaterEqual(
+                data.loc['pkg.c', 'cumulative_import_time_us'],
+                data.loc['pkg.b', 'cumulative_import_time_us'],
+            )
+            self.assertEqual(repo.layout_report, report)
+
+            # graph cache is reset
+            graph = repo.to_networkx_graph()
+            self.assertIn('import_time_us', graph.nodes['pkg.a'])
+            self.assertIsNot(repo.to_dot_graph(), before)
+
+            # profiling again replaces columns
+            repo.profile_imports('pkg.e')
+            data = repo._data.set_index('node_name')
+            self.assertEqual(data.loc['pkg.c', 'import_time_us'], 0)
+            self.assertGreater(data.loc['pkg.e', 'import_time_us'], 0)
+            self.assertEqual(len(repo._data.columns), len(set(repo._data.columns)))
+
+            expected = 'Unable to import module: pkg.foo. ModuleNotFoundError'
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.profile_imports('pkg.foo')
+
+            for module in ['os; open("x", "w")', 'pkg..a', '', 'pkg.a ']:
+                expected = re.escape(f"Invalid module name: '{module}'.")
+                with mock.patch.object(rpo.subprocess, 'run') as run:
+                    with self.assertRaisesRegex(ValueError, expected):
+                        repo.profile_imports(module)
+                    run.assert_not_called()
+
+    def test_to_dot_graph_size_by(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+
+            expected = 'Column not found: import_time_us. Call profile_imports'
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.to_dot_graph(size_by='import_time_us')
+
+            repo._data['import_time_us'] = 0
+            repo._data.loc[repo._data.node_name == 'pkg.b', 'import_time_us'] = 400
+            repo._data.loc[repo._data.node_name == 'pkg.c', 'import_time_us'] = 100
+            repo._graphs = {}
+            dot = repo.to_dot_graph(size_by='import_time_us')
+            sizes = {
+                re.sub(r'"|\\', '', x.get_name()): float(x.get_fontsize())
+                for x in dot.get_nodes() if x.get_fontsize() is not None
+            }
+            self.assertEqual(sizes['pkg.b'], 28)
+            self.assertEqual(sizes['pkg.c'], 21)
+            self.assertEqual(sizes['pkg.a'], 14)
+
+            # no cost leaves nodes unscaled
+            repo._data['import_time_us'] = 0
+            repo._graphs = {}
+            dot = repo.to_dot_graph(size_by='import_time_us')
+            sizes = [float(x.get_fontsize()) for x in dot.get_nodes()
+                     if x.get_fontsize() is not None]
+            self.assertEqual(set(sizes), {14.0})
+
+    def test_write_native_size_by(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            repo._data['import_time_us'] = 0
+            repo._data.loc[repo._data.node_name == 'pkg.b', 'import_time_us'] = 400
+
+            result = Path(root, 'foo.svg')
+            repo.write(result, layout='native', size_by='import_time_us')
+            svg = ET.parse(result).getroot()
+            ns = '{http://www.w3.org/2000/svg}'
+            texts = {
+                x.text: x.get('font-size')
+                for x in svg.findall(f'.//{ns}g/{ns}g/{ns}text')
+            }
+            self.assertEqual(texts['pkg.b'], '24.0')
+            self.assertIsNone(texts['pkg.a'])
+
     def test_to_html(self):
         with TemporaryDirectory() as root:
             self.create_repo(root)
@@ -310,6 +1270,253 @@ def test_write(self):
             expected += 'include: svg, dot, png, json.'
             self.assertEqual(str(e.value), expected)
 
+    def test_write_native(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            repo = rpo.RepoETL(root)
+            data = repo._get_layout_data()
+            edges = data.dependencies.apply(len).sum()
+
+            with mock.patch.object(rpt, 'write_dot_graph') as write_dot:
+                for orient in ['tb', 'bt', 'lr', 'rl']:
+                    result = Path(root, f'foo_{orient}.svg')
+                    repo.write(result, layout='native', orient=orient)
+                    svg = ET.parse(result).getroot()
+                    ns = '{http://www.w3.org/2000/svg}'
+
+                    # background plus one box per node
+                    rects = svg.findall(f'.//{ns}rect')
+                    self.assertEqual(len(rects), len(data) + 1)
+                    self.assertEqual(len(svg.findall(f'.//{ns}line')), edges)
+
+                    titles = [x.text for x in svg.findall(f'.//{ns}title')]
+                    self.assertEqual(titles, data.node_name.tolist())
+                write_dot.assert_not_called()
+
+            with pytest.raises(ValueError) as e:
+                repo.write(Path(root, 'foo.png'), layout='native')
+            expected = 'Invalid extension found: png. Valid extensions for '
+            expected += 'native layout include: svg, json.'
+            self.assertEqual(str(e.value), expected)
+
+            with pytest.raises(ValueError) as e:
+                repo.write(Path(root, 'foo.svg'), layout='native', orient='x')
+            self.assertIn('Invalid orient value', str(e.value))
+
+    def test_write_native_weights(self):
+        with TemporaryDirectory() as root:
+            self.create_nested_repo(root)
+            view = rpo.RepoETL(root).collapse(1)
+            result = Path(root, 'foo.svg')
+            view.write(result, layout='native')
+            svg = ET.parse(result).getroot()
+            ns = '{http://www.w3.org/2000/svg}'
+            labels = [
+                x.text for x in svg.findall(f'./{ns}g/{ns}text')
+            ]
+            expected = [str(x) for x in chain(*view._data.weights.tolist())]
+            self.assertEqual(labels, expected)
+
+    def test_to_html_native(self):
+        with TemporaryDirectory() as root:
+            self.create_repo(root)
+            repo = rpo.RepoETL(root)
+            result = repo.to_html(layout='native')
+            self.assertIsInstance(result, IPython.display.HTML)
+            self.assertIn('<svg', result.data)
+
+            with pytest.raises(ValueError) as e:
+                repo.to_html(layout='native', as_png=True)
+            self.assertEqual(str(e.value), 'Native layout does not support PNG.')
+
+    def test_get_tables(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            data = repo.to_dataframe()
+            nodes, edges = rpo.RepoETL._get_tables(data)
+
+            self.assertEqual(nodes.node_id.tolist(), list(range(len(data))))
+            self.assertEqual(nodes.node_name.tolist(), data.node_name.tolist())
+            for col in ['dependencies', 'subpackages']:
+                self.assertNotIn(col, nodes.columns)
+            for col in ['node_name', 'node_type', 'distribution']:
+                self.assertEqual(nodes[col].dtype, 'category')
+            self.assertEqual(nodes.attrs, {})
+
+            expected = data[['node_name', 'dependencies']]\
+                .explode('dependencies').dropna()
+            expected = sorted(zip(expected.dependencies, expected.node_name))
+            result = sorted(zip(edges.source, edges.target))
+            self.assertEqual(result, expected)
+            self.assertEqual(edges.source.dtype, 'category')
+            self.assertEqual(edges.target.dtype, 'category')
+            names = nodes.node_name.tolist()
+            self.assertEqual([names[x] for x in edges.source_id], edges.source.tolist())
+            self.assertEqual([names[x] for x in edges.target_id], edges.target.tolist())
+            self.assertNotIn('weight', edges.columns)
+
+            # collapsed views have weighted edges
+            nodes, edges = rpo.RepoETL._get_tables(repo.collapse(1).to_dataframe())
+            self.assertIn('weight', edges.columns)
+            self.assertNotIn('weights', nodes.columns)
+
+    def test_write_tables(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root, layout=False)
+            target = Path(root, 'tables', 'csv')
+            result = repo.write_tables(target)
+            self.assertIs(result, repo)
+
+            nodes, edges = rpo.RepoETL._get_tables(repo.to_dataframe())
+            result = pd.read_csv(Path(target, 'nodes.csv'))
+            self.assertEqual(result.columns.tolist(), nodes.columns.tolist())
+            self.assertEqual(result.node_name.tolist(), nodes.node_name.tolist())
+            result = pd.read_csv(Path(target, 'edges.csv'))
+            self.assertEqual(result.columns.tolist(), edges.columns.tolist())
+            self.assertEqual(result.source.tolist(), edges.source.tolist())
+
+            expected = "Invalid format: 'json'. Options include: "
+            expected += r"\['parquet', 'csv'\]."
+            with self.assertRaisesRegex(ValueError, expected):
+                repo.write_tables(target, format='json')
+
+            # parquet requires an engine
+            expected = 'Parquet format requires pyarrow or fastparquet.'
+            with mock.patch.object(importlib.util, 'find_spec', return_value=None):
+                with self.assertRaisesRegex(ImportError, expected):
+                    repo.write_tables(Path(root, 'parquet'), format='parquet')
+            self.assertFalse(Path(root, 'parquet').exists())
+
+    @unittest.skipIf(
+        importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed'
+    )
+    def test_write_tables_parquet(self):
+        with TemporaryDirectory() as root:
+            self.create_dependency_repo(root)
+            repo = rpo.RepoETL(root)
+            repo.write_tables(root, format='parquet')
+            nodes, edges = rpo.RepoETL._get_tables(repo.to_dataframe())
+            result = pd.read_parquet(Path(root, 'nodes.parquet'))
+            self.assertTrue(result.equals(nodes))
+            result = pd.read_parquet(Path(root, 'edges.parquet'))
+            self.assertTrue(result.equals(edges))
+
+    def create_batch_repos(self, root):
+        # foo imports bar.b, which is first-party in repo bar
+        files = {
+            'foo/foo/a.py': 'import bar.b\nimport numpy\n',
+            'bar/bar/b.py': 'import bar.c\n',
+            'bar/bar/c.py': 'import numpy\n',
+            'baz/bar/b.py': 'import yaml\n',
+        }
+        for path, text in files.items():
+            path = Path(root, path)
+            os.makedirs(path.parent, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+        return [Path(root, x).as_posix() for x in ['foo', 'bar', 'baz']]
+
+    def test_batch(self):
+        with TemporaryDirectory() as root:
+            roots = self.create_batch_repos(root)
+            result = rpo.RepoETL.batch(roots, layout='layered')
+            self.assertEqual(len(result), 3)
+            for repo, path in zip(result, roots):
+                self.assertIsInstance(repo, rpo.RepoETL)
+                self.assertEqual(repo._root, path)
+                self.assertIn('x', repo._data.columns)
+                expected = rpo.RepoETL(path, layout='layered')
+                expected._get_layout_data()
+                self.assertTrue(repo.to_dataframe().equals(expected.to_dataframe()))
+
+            # process pool gives the same result
+            pooled = rpo.RepoETL.batch(roots, workers=2, layout='layered')
+            for repo, expected in zip(pooled, result):
+                self.assertTrue(repo.to_dataframe().equals(expected.to_dataframe()))
+
+            self.assertEqual(rpo.RepoETL.batch([]), [])
+
+    def test_union(self):
+        with TemporaryDirectory() as root:
+            roots = self.create_batch_repos(root)
+            repos = rpo.RepoETL.batch(roots)
+            result = rpo.RepoETL.union(repos)
+            self.assertIsNot(result, repos[0])
+            data = result.to_dataframe().set_index('node_name')
+
+            # library bar.b of foo is replaced by module bar.b of bar
+            self.assertEqual(data.loc['bar.b', 'node_type'], 'module')
+            self.assertEqual(data.loc['bar.b', 'repo'], roots[1])
+            self.assertEqual(data.loc['foo.a', 'repo'], roots[0])
+            self.assertEqual(data.loc['bar.b', 'dependencies'], ['bar.c', 'bar'])
+            self.assertTrue(pd.isna(data.loc['numpy', 'repo']))
+            self.assertEqual(data.index.tolist().count('numpy'), 1)
+            self.assertIn('yaml', data.index)
+            self.assertNotIn('yaml', repos[1].to_dataframe().node_name.tolist())
+            self.assertEqual(result.descendants('bar.c'), ['bar.b', 'foo.a'])
+
+            # closures span repositories
+            self.assertEqual(data.loc['foo.a', 'closure_modules'], 3)
+
+            # inputs are left untouched
+            self.assertNotIn('repo', repos[0].to_dataframe().columns)
+            self.assertEqual(len(result.layout_report), 5)
+
+            # union cannot be updated
+            expected = 'RepoETL union cannot be updated. Update the RepoETL '
+            expected += 'instance it was built from instead.'
+            with self.assertRaisesRegex(ValueError, expected):
+                result.update()
+            with self.assertRaisesRegex(ValueError, expected):
+                result.watch(Path(root, 'graph.json'), iterations=1)
+            self.assertEqual(repos[0].update(), [])
+
+            with self.assertRaisesRegex(ValueError, 'No repositories given.'):
+                rpo.RepoETL.union([])
+
+    def anneal_reference(self, data, iterations=10):
+        # original networkx implementation of RepoETL._anneal_coordinate
+        data.x = data.x.astype(float)
+        data.y = data.y.astype(float)
+        for iteration in range(iterations):
+            graph = rpo.RepoETL._to_networkx_graph(data)
+            if iteration % 2 == 0:
+                graph = graph.reverse()
+
+            for name in graph.nodes:
+                tree = networkx.bfs_tree(graph, name)
+                mu = np.mean([graph.nodes[n]['x'] for n in tree])
+                graph.nodes[name]['x'] = mu
+
+            for node in graph.nodes:
+                mask = data[data.node_name == node].index
+                data.loc[mask, 'x'] = graph.nodes[node]['x']
+
+            data.sort_values('x', inplace=True)
+            for yi in data.y.unique():
+                mask = data[data.y == yi].index
+                data.loc[mask, 'x'] = list(range(len(mask)))
+        return data
+
+    def get_synthetic_data(self, size, seed=42, levels=8, degree=3):
+        # each node depends upon random nodes in lower levels
+        rng = np.random.default_rng(seed)
+        y = rng.integers(0, levels, size)
+        deps = []
+        for i in range(size):
+            items = np.flatnonzero(y > y[i])
+            items = rng.choice(items, min(len(items), degree), replace=False)
+            deps.append([f'n{x}' for x in items])
+        data = DataFrame(dict(
+            node_name=[f'n{x}' for x in range(size)],
+            y=y,
+            dependencies=deps,
+        ))
+        data['x'] = data.groupby('y').cumcount()
+        return data
+
     def get_repo_data(self, root):
         cols = [
             'node_name',
@@ -1,14 +1,19 @@
-from typing import Any, Dict, Generator, Iterable, List, Optional, Union  # noqa: F401
+from typing import Any, Dict, FrozenSet, Generator, Iterable, Iterator, List, Optional, Tuple, Union  # noqa: F401
 import pydot  # noqa: F401
 
 from collections import OrderedDict
 from pathlib import Path
+import functools
+import importlib.metadata
+import json
 import logging
 import os
 import re
 import shutil
+import sys
 
 from IPython.display import HTML, Image
+import numpy as np
 import pandas as pd
 
 Filepath = Union[str, Path]
@@ -36,6 +41,8 @@
     edge_library='#DE958E',
     edge_subpackage='#A0D17B',
     edge_module='#B6ECF3',
+    node_cycle_font='#E8EA7E',
+    edge_cycle='#E8EA7E',
 )  # type: Dict[str, str]
 
 
@@ -183,28 +190,47 @@ def flatten(item, separator='/', embed_types=True):
     Returns:
         dict: Dictionary representation of given object.
     '''
-    output = {}  # type: Dict[str, Any]
+    return dict(
+        iter_flatten(item, separator=separator, embed_types=embed_types)
+    )
+
+
+def iter_flatten(item, separator='/', embed_types=True):
+    # type: (Iterable, str, bool) -> Generator[Tuple[str, Any], None, None]
+    '''
+    Flattens a iterable object into flat key and value pairs, one at a time,
+    so that they can be consumed without building a flat dictionary.
 
-    def recurse(item, cursor):
-        # type (Iterable, Any) -> None
+    Args:
+        item (object): Iterable object.
+        separator (str, optional): Field separator in keys. Default: '/'.
+
+    Yields:
+        tuple[str, object]: Flat key and value.
+    '''
+    def get_items(item):
+        # type: (Any) -> Iterator[Tuple[Any, Any]]
         if is_listlike(item):
             if embed_types:
                 name = item.__class__.__name__
-                item = [(f'<{name}_{i}>', val) for i, val in enumerate(item)]
-                item = dict(item)
-            else:
-                item = dict(enumerate(item))
+                return ((f'<{name}_{i}>', val) for i, val in enumerate(item))
+            return enumerate(item)
         if is_dictlike(item):
-            for key, val in item.items():
-                new_key = f'{cursor}{separator}{str(key)}'
-                if is_iterable(val) and len(val) > 0:
-                    recurse(val, new_key)
-                else:
-                    final_key = re.sub('^' + separator, '', new_key)
-                    output[final_key] = val
-
-    recurse(item, '')
-    return output
+            return iter(item.items())
+        return iter([])
+
+    # stack holds the key prefix and items iterator of each open level
+    stack = [('', get_items(item))]
+    while len(stack) > 0:
+        prefix, items = stack[-1]
+        for key, val in items:
+            new_key = prefix + str(key)
+            if is_iterable(val) and len(val) > 0:
+                stack.append((new_key + separator, get_items(val)))
+                break
+            yield new_key, val
+        else:
+            stack.pop()
 
 
 def nest(flat_dict, separator='/'):
@@ -279,6 +305,542 @@ def unembed(item):
     return item
 
 
+def sort_flat_keys(flat_dict, separator='/'):
+    # type: (Dict[str, Any], str) -> List[str]
+    '''
+    Sorts the keys of a flat dictionary by field, such that every subtree is
+    contiguous. Embedded type fields are sorted by index and come before all
+    other fields. Keys are sorted by a single encoded string each, in which
+    separators sort before all other characters, so that no list of fields is
+    kept per key.
+
+    Args:
+        flat_dict (dict): Flat dictionary.
+        separator (str, optional): Field separator within given dictionary's
+            keys. Default: '/'.
+
+    Returns:
+        list[str]: Sorted keys.
+    '''
+    sep = re.escape(separator)
+    embed_re = re.compile(f'(?:^|(?<={sep}))<[a-z]+_(\\d+)>(?={sep}|$)')
+
+    # embedded fields sort first, by index prefixed with its digit count
+    def embed(match):
+        # type: (re.Match) -> str
+        index = str(int(match.group(1)))
+        return '\x01' + chr(0x30 + len(index)) + index
+
+    def sort_key(key):
+        # type: (str) -> str
+        if '<' in key:
+            key = embed_re.sub(embed, key)
+        return '\x00'.join(filter(None, key.split(separator)))
+
+    return sorted(flat_dict.keys(), key=sort_key)
+
+
+def iter_nested_json(flat_dict, separator='/'):
+    # type: (Dict[str, Any], str) -> Generator[str, None, None]
+    '''
+    Encodes a flat dictionary with embedded types as nested JSON, without ever
+    constructing the nested object. Keys are walked one at a time in sorted
+    field order, and braces and brackets are emitted as key prefixes change.
+    One chunk is yielded per key.
+
+    Args:
+        flat_dict (dict): Flat dictionary with embedded types.
+        separator (str, optional): Field separator within given dictionary's
+            keys. Default: '/'.
+
+    Raises:
+        KeyError: If a key is both a value and a parent of other keys.
+
+    Yields:
+        str: JSON text chunk.
+    '''
+    embed_re = re.compile(r'^<[a-z]+_\d+>$')
+    keys = sort_flat_keys(flat_dict, separator=separator)
+    if len(keys) == 0:
+        yield '{}'
+        return
+
+    def split(key):
+        # type: (str) -> List[str]
+        return [x for x in key.split(separator) if x != '']
+
+    def open_(field):
+        # type: (str) -> str
+        return '[' if embed_re.match(field) else '{'
+
+    def prefix(field):
+        # type: (str) -> str
+        output = ', ' if counts[-1] > 0 else ''
+        if closers[-1] == '}':
+            output += json.dumps(field) + ': '
+        counts[-1] += 1
+        return output
+
+    # path holds the fields of open containers, closers and counts hold the
+    # closing character and child count of the root and each open container
+    path = []  # type: List[str]
+    char = open_(split(keys[0])[0])
+    closers = [']' if char == '[' else '}']
+    counts = [0]
+    yield char
+    prev = []  # type: List[str]
+    for key in keys:
+        fields = split(key)
+        if prev != [] and fields[:len(prev)] == prev:
+            msg = f"Duplicate key conflict. Key: '{prev[-1]}'."
+            raise KeyError(msg)
+        prev = fields
+
+        # close containers not shared with current key
+        chunk = []
+        n = 0
+        parents = fields[:-1]
+        while n < len(path) and n < len(parents) and path[n] == parents[n]:
+            n += 1
+        while len(path) > n:
+            path.pop()
+            counts.pop()
+            chunk.append(closers.pop())
+
+        # open containers for remaining parent fields
+        for i in range(n, len(parents)):
+            chunk.append(prefix(fields[i]))
+            char = open_(fields[i + 1])
+            chunk.append(char)
+            path.append(fields[i])
+            closers.append(']' if char == '[' else '}')
+            counts.append(0)
+
+        chunk.append(prefix(fields[-1]))
+        chunk.append(json.dumps(flat_dict[key]))
+        yield ''.join(chunk)
+
+    while len(closers) > 0:
+        yield closers.pop()
+
+
+# PATH-PATTERN-FUNCTIONS--------------------------------------------------------
+def compile_path_pattern(pattern, separator='/'):
+    # type: (str, str) -> List[Tuple[str, Any]]
+    '''
+    Compiles a glob-like path pattern into a list of field matchers, one per
+    field of pattern.
+
+    Pattern syntax:
+
+        * ``**``    - matches zero or more fields
+        * ``*``     - matches any characters within a field
+        * ``?``     - matches any single character within a field
+        * ``[n]``   - matches embedded type field with index n, ie <list_n>
+        * ``[*]``   - matches any embedded type field
+        * ``{a,b}`` - matches any one of the given alternatives
+
+    Args:
+        pattern (str): Path pattern, ie 'users/*/name/{first,last}'.
+        separator (str, optional): Field separator. Default: '/'.
+
+    Raises:
+        ValueError: If pattern contains unbalanced braces or brackets.
+
+    Returns:
+        list[tuple]: List of (kind, value) field matchers. Kind is one of:
+            **, literal, set or regex.
+    '''
+    special_re = re.compile(r'[*?{}\[\]]')
+    literal_set_re = re.compile(r'^\{[^*?{}\[\],]*(,[^*?{}\[\],]*)*\}$')
+    char_ = _get_field_char_regex(separator)
+
+    def translate(field):
+        # type: (str) -> str
+        output = ''
+        i = 0
+        while i < len(field):
+            char = field[i]
+            if char in '{[':
+                end = field.find('}' if char == '{' else ']', i)
+                if end == -1:
+                    msg = f'Unbalanced {char} in path pattern: {pattern}.'
+                    raise ValueError(msg)
+                body = field[i + 1:end]
+                if char == '{':
+                    alts = [translate(x) for x in body.split(',')]
+                    output += '(?:' + '|'.join(alts) + ')'
+                elif body == '*':
+                    output += r'<[a-z]+_\d+>'
+                elif re.search(r'^\d+$', body):
+                    output += f'<[a-z]+_{int(body)}>'
+                else:
+                    msg = f'Invalid index [{body}] in path pattern: {pattern}.'
+                    raise ValueError(msg)
+                i = end + 1
+                continue
+            elif char in '}]':
+                msg = f'Unbalanced {char} in path pattern: {pattern}.'
+                raise ValueError(msg)
+            elif char == '*':
+                output += char_ + '*'
+            elif char == '?':
+                output += char_
+            else:
+                output += re.escape(char)
+            i += 1
+        return output
+
+    output = []  # type: List[Tuple[str, Any]]
+    for field in pattern.split(separator):
+        if field == '**':
+            # collapse consecutive ** fields
+            if len(output) == 0 or output[-1][0] != '**':
+                output.append(('**', None))
+        elif not special_re.search(field):
+            output.append(('literal', field))
+        elif literal_set_re.match(field):
+            output.append(('set', frozenset(field[1:-1].split(','))))
+        else:
+            output.append(('regex', re.compile(translate(field) + '$')))
+    return output
+
+
+def _get_field_char_regex(separator):
+    # type: (str) -> str
+    '''
+    Gets a regular expression which matches any character within a field.
+
+    Args:
+        separator (str): Field separator.
+
+    Returns:
+        str: Regular expression.
+    '''
+    sep = re.escape(separator)
+    if len(separator) == 1:
+        return f'[^{sep}]'
+    return f'(?:(?!{sep}).)'
+
+
+def compile_path_regex(pattern, separator='/'):
+    # type: (str, str) -> re.Pattern
+    '''
+    Compiles a glob-like path pattern into a single regular expression, which
+    matches whole keys. See compile_path_pattern for syntax.
+
+    Args:
+        pattern (str): Path pattern, ie 'users/*/name/{first,last}'.
+        separator (str, optional): Field separator. Default: '/'.
+
+    Raises:
+        ValueError: If pattern contains unbalanced braces or brackets.
+
+    Returns:
+        re.Pattern: Regular expression, to be used with fullmatch.
+    '''
+    sep = re.escape(separator)
+    field = _get_field_char_regex(separator) + '*'
+    matchers = compile_path_pattern(pattern, separator=separator)
+    if matchers == [('**', None)]:
+        return re.compile('.*', re.DOTALL)
+
+    # fields are preceded by a separator, unless they come first or follow
+    # a leading **, which consumes its own separators
+    output = ''
+    lead = ''
+    for i, (kind, value) in enumerate(matchers):
+        if kind == '**':
+            if i == 0:
+                output += f'(?:{field}{sep})*'
+            else:
+                output += f'(?:{sep}{field})*'
+            continue
+
+        if kind == 'literal':
+            item = re.escape(value)
+        elif kind == 'set':
+            item = '(?:' + '|'.join(re.escape(x) for x in sorted(value)) + ')'
+        else:
+            item = value.pattern[:-1]
+        output += lead + item
+        lead = sep
+    return re.compile(output, re.DOTALL)
+
+
+def match_path_pattern(matchers, fields):
+    # type: (List[Tuple[str, Any]], List[str]) -> bool
+    '''
+    Determines whether given key fields match given compiled path pattern.
+    Fields are matched in order and rejected at the first field that cannot be
+    matched.
+
+    Args:
+        matchers (list[tuple]): Field matchers from compile_path_pattern.
+        fields (list[str]): Key fields.
+
+    Returns:
+        bool: Whether fields match.
+    '''
+    def match(matcher, field):
+        # type: (Tuple[str, Any], str) -> bool
+        kind, value = matcher
+        if kind == 'literal':
+            return field == value
+        elif kind == 'set':
+            return field in value
+        return value.match(field) is not None
+
+    i = 0
+    j = 0
+    star = -1
+    mark = 0
+    while j < len(fields):
+        if i < len(matchers) and matchers[i][0] == '**':
+            star = i
+            mark = j
+            i += 1
+        elif i < len(matchers) and match(matchers[i], fields[j]):
+            i += 1
+            j += 1
+        elif star != -1:
+            # let last ** consume one more field and retry
+            i = star + 1
+            mark += 1
+            j = mark
+        else:
+            return False
+
+    while i < len(matchers) and matchers[i][0] == '**':
+        i += 1
+    return i == len(matchers)
+
+
+# GRAPH-FUNCTIONS---------------------------------------------------------------
+def get_strongly_connected_components(successors):
+    # type: (List[List[int]]) -> List[List[int]]
+    '''
+    Finds strongly connected components of a directed graph with an iterative
+    version of Tarjan's algorithm.
+
+    Args:
+        successors (list[list[int]]): Successor node indices of each node.
+
+    Returns:
+        list[list[int]]: Components in reverse topological order, so that a
+            component is always listed after every component reachable from
+            it.
+    '''
+    size = len(successors)
+    index = [-1] * size
+    low = [0] * size
+    on_stack = [False] * size
+    stack = []  # type: List[int]
+    output = []  # type: List[List[int]]
+    count = 0
+    for root in range(size):
+        if index[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        while len(work) > 0:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = count
+                low[node] = count
+                count += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            # visit next unvisited successor
+            succ = successors[node]
+            while i < len(succ):
+                child = succ[i]
+                i += 1
+                if index[child] == -1:
+                    work.append((node, i))
+                    work.append((child, 0))
+                    break
+                if on_stack[child]:
+                    low[node] = min(low[node], index[child])
+            else:
+                # all successors visited
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        item = stack.pop()
+                        on_stack[item] = False
+                        component.append(item)
+                        if item == node:
+                            break
+                    output.append(component)
+
+                if len(work) > 0:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+    return output
+
+
+def get_reachability(successors):
+    # type: (List[List[int]]) -> List[int]
+    '''
+    Computes the set of nodes reachable from each node of a directed graph,
+    including the node itself. Sets are computed once per strongly connected
+    component, in reverse topological order.
+
+    Args:
+        successors (list[list[int]]): Successor node indices of each node.
+
+    Returns:
+        list[int]: Bitset of reachable node indices per node.
+    '''
+    output = [0] * len(successors)
+    for component in get_strongly_connected_components(successors):
+        bits = 0
+        for node in component:
+            bits |= 1 << node
+            for child in successors[node]:
+                bits |= output[child]
+        for node in component:
+            output[node] = bits
+    return output
+
+
+def count_inversions(values):
+    # type: (Iterable[int]) -> int
+    '''
+    Counts pairs of items i < j, for which values[i] > values[j]. Uses a
+    bottom-up merge count, in which each merge level is a vectorized sort and
+    search.
+
+    Args:
+        values (list[int]): Non-negative integers.
+
+    Returns:
+        int: Number of inversions.
+    '''
+    values = np.asarray(values, dtype=np.int64)
+    size = len(values)
+    if size < 2:
+        return 0
+
+    span = int(values.max()) + 1
+    position = np.arange(size)
+    output = 0
+    width = 1
+    while width < size:
+        block = position // (2 * width)
+        left = position % (2 * width) < width
+        lkeys = np.sort(block[left] * span + values[left])
+        rblock = block[~left]
+        rkeys = rblock * span + values[~left]
+
+        # count left items of same block which are greater than right item
+        end = np.searchsorted(lkeys, (rblock + 1) * span, side='left')
+        start = np.searchsorted(lkeys, rkeys, side='right')
+        output += int((end - start).sum())
+        width *= 2
+    return output
+
+
+def bitset_to_indices(bitset, size):
+    # type: (int, int) -> np.ndarray
+    '''
+    Converts given bitset into a sorted array of set bit indices.
+
+    Args:
+        bitset (int): Bitset.
+        size (int): Number of bits.
+
+    Returns:
+        numpy.ndarray: Array of indices.
+    '''
+    data = bitset.to_bytes((size + 7) // 8, 'little')
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+    return np.flatnonzero(bits[:size])
+
+
+def indices_to_bitset(indices, size):
+    # type: (Iterable[int], int) -> int
+    '''
+    Converts given indices into a bitset, with the bit of each index set.
+
+    Args:
+        indices (list[int]): Indices.
+        size (int): Number of bits.
+
+    Returns:
+        int: Bitset.
+    '''
+    bits = np.zeros(size, dtype=bool)
+    bits[np.asarray(list(indices), dtype=np.int64)] = True
+    data = np.packbits(bits, bitorder='little').tobytes()
+    return int.from_bytes(data, 'little')
+
+
+# MODULE-FUNCTIONS--------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def get_standard_modules():
+    # type: () -> FrozenSet[str]
+    '''
+    Gets top level names of python standard library modules. Computed once
+    per process.
+
+    Returns:
+        frozenset[str]: Standard module names.
+    '''
+    return frozenset(sys.stdlib_module_names)
+
+
+def is_standard_module(name, first_party=()):
+    # type: (str, Iterable[str]) -> bool
+    '''
+    Determines if given module name belongs to the python standard library,
+    by its top level name. First-party names shadow standard modules of the
+    same name.
+
+    Args:
+        name (str): Module name, ie os.path.
+        first_party (list[str], optional): Top level names of first-party
+            modules, which are never standard. Default: ().
+
+    Returns:
+        bool: Whether module is a standard module.
+    '''
+    top = name.split('.')[0]
+    return top not in first_party and top in get_standard_modules()
+
+
+@functools.lru_cache(maxsize=None)
+def get_distributions():
+    # type: () -> Dict[str, str]
+    '''
+    Gets map of top level module names to the names of the installed
+    distributions which provide them. If several distributions provide a
+    module, the first in alphabetical order is used. Computed once per
+    process.
+
+    Returns:
+        dict: Module names and distribution names.
+    '''
+    items = importlib.metadata.packages_distributions().items()
+    return {k: sorted(v)[0] for k, v in items if len(v) > 0}
+
+
+def get_distribution(name):
+    # type: (str) -> Optional[str]
+    '''
+    Gets name of installed distribution which provides given module.
+
+    Args:
+        name (str): Module name, ie yaml.loader.
+
+    Returns:
+        str or None: Distribution name, ie PyYAML. None if not found.
+    '''
+    return get_distributions().get(name.split('.')[0])
+
+
 # FILE-FUNCTIONS----------------------------------------------------------------
 def list_all_files(
     directory,           # type: Filepath
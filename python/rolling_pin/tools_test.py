@@ -7,6 +7,7 @@
 import unittest
 
 from pandas import DataFrame
+import numpy as np
 import pydot
 import pytest
 
@@ -175,6 +176,14 @@ def test_flatten_complex_separator(self):
         result = rpt.flatten(blob, separator='=>')
         self.assertEqual(result, expected)
 
+    def test_iter_flatten(self):
+        blob = self.get_complex_blob()
+        result = rpt.iter_flatten(blob, separator='.')
+        self.assertNotIsInstance(result, dict)
+        expected = list(rpt.flatten(blob, separator='.').items())
+        self.assertEqual(list(result), expected)
+        self.assertEqual(list(rpt.iter_flatten({})), [])
+
     def test_flatten_complex_no_embed(self):
         blob = self.get_complex_blob()
         expected = {
@@ -287,6 +296,226 @@ def test_unembed_nest_flatten_cycle(self):
         self.assertEqual(result, expected)
         self.assertFalse(result is expected)
 
+    # NESTED-JSON---------------------------------------------------------------
+    def test_sort_flat_keys(self):
+        blob = {
+            'b/<list_10>': 0,
+            'a/y': 1,
+            'b/<list_2>': 2,
+            'a/x': 3,
+            '/c': 4,
+        }
+        result = rpt.sort_flat_keys(blob)
+        expected = ['a/x', 'a/y', 'b/<list_2>', 'b/<list_10>', '/c']
+        self.assertEqual(result, expected)
+
+    def test_iter_nested_json(self):
+        blob = self.get_complex_blob()
+        blob['a0']['b1'][1]['c3']['d0'][0] = list(range(12))
+        blob['a0']['b2'] = []
+        blob['a0']['b3'] = {}
+        blob['e0'] = None
+        flat = rpt.flatten(blob)
+        result = ''.join(rpt.iter_nested_json(flat))
+        self.assertEqual(json.loads(result), json.loads(json.dumps(blob)))
+
+        expected = json.dumps(rpt.unembed(rpt.nest(flat)), sort_keys=True)
+        self.assertEqual(result, expected)
+
+    def test_iter_nested_json_separator(self):
+        blob = [{'a': 1}, {'a': 2, 'b': [3, 4]}]
+        flat = rpt.flatten(blob, separator='.')
+        result = ''.join(rpt.iter_nested_json(flat, separator='.'))
+        self.assertEqual(result, json.dumps(blob))
+
+    def test_iter_nested_json_empty(self):
+        result = ''.join(rpt.iter_nested_json({}))
+        self.assertEqual(result, '{}')
+
+    def test_iter_nested_json_error(self):
+        blob = {
+            'foo': 0,
+            'bar': 0,
+            'foo/bar': 0,
+        }
+        expected = "Duplicate key conflict. Key: 'foo'."
+        with self.assertRaisesRegex(KeyError, expected):
+            ''.join(rpt.iter_nested_json(blob))
+
+    # PATH-PATTERN--------------------------------------------------------------
+    def test_compile_path_pattern(self):
+        result = rpt.compile_path_pattern('a/**/**/{b,c}/[2]/d*')
+        self.assertEqual(result[0], ('literal', 'a'))
+        self.assertEqual(result[1], ('**', None))
+        self.assertEqual(result[2], ('set', frozenset(['b', 'c'])))
+        self.assertEqual(result[3][0], 'regex')
+        self.assertEqual(result[4][0], 'regex')
+        self.assertEqual(len(result), 5)
+
+        result = rpt.compile_path_pattern('a.b', separator='.')
+        self.assertEqual(result, [('literal', 'a'), ('literal', 'b')])
+
+    def test_compile_path_pattern_errors(self):
+        expected = r'Unbalanced \{ in path pattern: a/\{b'
+        with self.assertRaisesRegex(ValueError, expected):
+            rpt.compile_path_pattern('a/{b')
+
+        expected = r'Unbalanced \] in path pattern: a/b\]'
+        with self.assertRaisesRegex(ValueError, expected):
+            rpt.compile_path_pattern('a/b]')
+
+        expected = r'Invalid index \[x\] in path pattern: a/\[x\]'
+        with self.assertRaisesRegex(ValueError, expected):
+            rpt.compile_path_pattern('a/[x]')
+
+    def test_match_path_pattern(self):
+        def match(pattern, key):
+            matchers = rpt.compile_path_pattern(pattern)
+            return rpt.match_path_pattern(matchers, key.split('/'))
+
+        self.assertTrue(match('a/b', 'a/b'))
+        self.assertFalse(match('a/b', 'a/b/c'))
+        self.assertFalse(match('a/b/c', 'a/b'))
+        self.assertTrue(match('a/*/c', 'a/b/c'))
+        self.assertFalse(match('a/*/c', 'a/c'))
+        self.assertTrue(match('a/**/c', 'a/c'))
+        self.assertTrue(match('a/**/c', 'a/b/x/c'))
+        self.assertTrue(match('**/c/**/c', 'c/x/c/c'))
+        self.assertFalse(match('**/c/x', 'c/x/c'))
+        self.assertTrue(match('**', 'a/b/c'))
+        self.assertTrue(match('a/b*/c', 'a/bar/c'))
+        self.assertTrue(match('a/b?r', 'a/bar'))
+        self.assertFalse(match('a/b?r', 'a/br'))
+        self.assertTrue(match('a/{b,c}', 'a/c'))
+        self.assertTrue(match('a/{b*,c}', 'a/bar'))
+        self.assertTrue(match('a/[1]', 'a/<list_1>'))
+        self.assertTrue(match('a/[1]', 'a/<tuple_1>'))
+        self.assertFalse(match('a/[1]', 'a/<list_10>'))
+        self.assertTrue(match('a/[*]/b', 'a/<set_10>/b'))
+        self.assertFalse(match('a/[*]/b', 'a/c/b'))
+
+    def test_compile_path_regex(self):
+        patterns = [
+            'a/b', 'a/b/c', 'a/*/c', 'a/**/c', '**/c/**/c', '**/c/x', '**',
+            'a/**', '**/c', 'a/b*/c', 'a/b?r', 'a/{b,c}', 'a/{b*,c}', 'a/[1]',
+            'a/[*]/b', '*',
+        ]
+        keys = [
+            'a/b', 'a/b/c', 'a/c', 'a/b/x/c', 'c/x/c/c', 'c/x/c', 'a/bar/c',
+            'a/bar', 'a/br', 'a/<list_1>', 'a/<tuple_1>', 'a/<list_10>',
+            'a/<set_10>/b', 'a/c/b', 'a', 'c', 'a/b/c/d',
+        ]
+        for pattern in patterns:
+            regex = rpt.compile_path_regex(pattern)
+            matchers = rpt.compile_path_pattern(pattern)
+            for key in keys:
+                expected = rpt.match_path_pattern(matchers, key.split('/'))
+                result = regex.fullmatch(key) is not None
+                self.assertEqual(result, expected, (pattern, key))
+
+        regex = rpt.compile_path_regex('a::*::c', separator='::')
+        self.assertIsNotNone(regex.fullmatch('a::b:x::c'))
+        self.assertIsNone(regex.fullmatch('a::b::x::c'))
+
+    # GRAPH---------------------------------------------------------------------
+    def test_get_strongly_connected_components(self):
+        # 0 -> 1 -> 2 -> 0, 2 -> 3 -> 4 -> 3, 5
+        successors = [[1], [2], [0, 3], [4], [3], []]
+        result = rpt.get_strongly_connected_components(successors)
+        result = [sorted(x) for x in result]
+        self.assertEqual(sorted(result), [[0, 1, 2], [3, 4], [5]])
+
+        # reverse topological order
+        self.assertLess(result.index([3, 4]), result.index([0, 1, 2]))
+
+        self.assertEqual(rpt.get_strongly_connected_components([]), [])
+        self.assertEqual(rpt.get_strongly_connected_components([[0]]), [[0]])
+
+    def test_get_strongly_connected_components_deep(self):
+        size = 5000
+        successors = [[i + 1] for i in range(size - 1)] + [[0]]
+        result = rpt.get_strongly_connected_components(successors)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(sorted(result[0]), list(range(size)))
+
+    def test_get_reachability(self):
+        successors = [[1], [2], [0, 3], [4], [3], [], [0]]
+        result = rpt.get_reachability(successors)
+        result = [rpt.bitset_to_indices(x, 7).tolist() for x in result]
+        expected = [
+            [0, 1, 2, 3, 4],
+            [0, 1, 2, 3, 4],
+            [0, 1, 2, 3, 4],
+            [3, 4],
+            [3, 4],
+            [5],
+            [0, 1, 2, 3, 4, 6],
+        ]
+        self.assertEqual(result, expected)
+
+    def test_count_inversions(self):
+        self.assertEqual(rpt.count_inversions([]), 0)
+        self.assertEqual(rpt.count_inversions([3]), 0)
+        self.assertEqual(rpt.count_inversions([0, 1, 2, 3]), 0)
+        self.assertEqual(rpt.count_inversions([3, 2, 1, 0]), 6)
+        self.assertEqual(rpt.count_inversions([1, 1, 0, 0]), 4)
+        self.assertEqual(rpt.count_inversions([2, 2, 2]), 0)
+
+        values = np.random.default_rng(0).integers(0, 20, 301)
+        expected = sum(
+            1 for i in range(len(values)) for j in range(i + 1, len(values))
+            if values[i] > values[j]
+        )
+        self.assertEqual(rpt.count_inversions(values), expected)
+
+    def test_bitset_to_indices(self):
+        result = rpt.bitset_to_indices(0b100101, 6).tolist()
+        self.assertEqual(result, [0, 2, 5])
+
+        result = rpt.bitset_to_indices(1 << 20, 21).tolist()
+        self.assertEqual(result, [20])
+
+        result = rpt.bitset_to_indices(0, 0).tolist()
+        self.assertEqual(result, [])
+
+    def test_indices_to_bitset(self):
+        self.assertEqual(rpt.indices_to_bitset([0, 2, 5], 6), 0b100101)
+        self.assertEqual(rpt.indices_to_bitset([20], 21), 1 << 20)
+        self.assertEqual(rpt.indices_to_bitset([], 0), 0)
+        self.assertEqual(rpt.indices_to_bitset(np.array([3, 1]), 9), 0b1010)
+
+    # MODULE--------------------------------------------------------------------
+    def test_get_standard_modules(self):
+        result = rpt.get_standard_modules()
+        self.assertIsInstance(result, frozenset)
+        self.assertIn('os', result)
+        self.assertIn('importlib', result)
+        self.assertNotIn('numpy', result)
+        self.assertIs(rpt.get_standard_modules(), result)
+
+    def test_is_standard_module(self):
+        for name in ['os', 'os.path', 'importlib.metadata', '_thread', 're']:
+            self.assertTrue(rpt.is_standard_module(name))
+        for name in ['numpy', 'rolling_pin.tools', 'osx', 'foo.os']:
+            self.assertFalse(rpt.is_standard_module(name))
+
+        # first-party names shadow standard modules
+        self.assertFalse(rpt.is_standard_module('types', ['types', 'foo']))
+        self.assertFalse(rpt.is_standard_module('code.bar', {'code'}))
+        self.assertTrue(rpt.is_standard_module('os.path', ['types']))
+
+    def test_get_distributions(self):
+        result = rpt.get_distributions()
+        self.assertEqual(result['numpy'], 'numpy')
+        self.assertEqual(result['yaml'], 'PyYAML')
+        self.assertIs(rpt.get_distributions(), result)
+
+    def test_get_distribution(self):
+        self.assertEqual(rpt.get_distribution('yaml.loader'), 'PyYAML')
+        self.assertEqual(rpt.get_distribution('pandas'), 'pandas')
+        self.assertIsNone(rpt.get_distribution('foobarbaz'))
+        self.assertIsNone(rpt.get_distribution('os'))
+
     # MISC----------------------------------------------------------------------
     def test_list_all_files(self):
         # repo structure